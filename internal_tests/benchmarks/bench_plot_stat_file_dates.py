@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Program Name: bench_plot_stat_file_dates.py
+Contact(s): George McCabe
+Abstract: Benchmark for the plotting scripts that compares looking up each
+ expected date in a dump_row .stat file and copying the values one column
+ at a time to aligning all expected dates with a single reindex
+Usage: python3 bench_plot_stat_file_dates.py [number_of_years]
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                os.pardir,
+                                                os.pardir,
+                                                'ush',
+                                                'plotting_scripts')))
+
+import plot_util
+
+MET_VERSION = '8.1'
+MODEL_PLOT_NAME = 'MODEL_TEST'
+
+
+def write_dump_row_file(stat_file, num_years):
+    """! Write a dump_row .stat file with one SL1L2 line per day. Every
+         tenth day is left out so that some expected dates are missing.
+
+         @param stat_file path to write
+         @param num_years number of years of daily lines to write
+         @returns list of expected dates in FCST_VALID_BEG format
+    """
+    base_columns = plot_util.get_stat_file_base_columns(MET_VERSION)
+    line_type_columns = (
+        plot_util.get_stat_file_line_type_columns(None, MET_VERSION, 'SL1L2')
+    )
+    start = datetime.datetime(2015, 1, 1)
+    num_days = num_years * 365
+    expected_dates = []
+    rng = np.random.default_rng(0)
+    with open(stat_file, 'w') as file_handle:
+        file_handle.write(' '.join(base_columns + line_type_columns) + '\n')
+        for day in range(num_days):
+            valid = (start + datetime.timedelta(days=day))
+            valid = valid.strftime('%Y%m%d_%H%M%S')
+            expected_dates.append(valid)
+            if day % 10 == 9:
+                continue
+            values = rng.random(len(line_type_columns) - 1) * 100
+            file_handle.write(
+                f'V8.1 {MODEL_PLOT_NAME} NA 240000 {valid} {valid} 000000 '
+                f'{valid} {valid} HGT gpm P500 HGT gpm P500 ANL G002 '
+                'NEAREST 1 NA NA NA NA SL1L2 1000 '
+                + ' '.join(f'{value:.5f}' for value in values) + '\n'
+            )
+    return expected_dates
+
+
+def align_by_date_loop(stat_file_data, line_type_columns, expected_dates,
+                       index):
+    """! Previous approach: look up each expected date in the list of file
+         dates and copy each column into a DataFrame of NaN
+    """
+    file_dates = stat_file_data.loc[:]['FCST_VALID_BEG'].values
+    date_data = pd.DataFrame(np.nan, index=index, columns=line_type_columns)
+    for expected_date in expected_dates:
+        if expected_date in file_dates:
+            matching_date_idx = file_dates.tolist().index(expected_date)
+            matching_line = stat_file_data.loc[matching_date_idx][:]
+            for col in line_type_columns:
+                date_data.loc[(MODEL_PLOT_NAME, expected_date), col] = (
+                    matching_line.loc[:][col]
+                )
+    return date_data
+
+
+def main():
+    num_years = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    logger = logging.getLogger('bench_plot_stat_file_dates')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stat_file = os.path.join(tmp_dir, 'dump_row.stat')
+        expected_dates = write_dump_row_file(stat_file, num_years)
+        stat_file_data, line_type_columns = (
+            plot_util.read_stat_file(logger, stat_file, MET_VERSION)
+        )
+
+    index = pd.MultiIndex.from_product(
+        [[MODEL_PLOT_NAME], expected_dates],
+        names=['model_plot_name', 'dates']
+    )
+
+    start = time.perf_counter()
+    loop_data = align_by_date_loop(stat_file_data, line_type_columns,
+                                   expected_dates, index)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reindex_data = plot_util.get_stat_file_data_for_dates(
+        stat_file_data, line_type_columns, expected_dates, index
+    )
+    reindex_seconds = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(loop_data, reindex_data)
+
+    print(f'expected dates: {len(expected_dates)}, '
+          f'lines in file: {len(stat_file_data)}')
+    print(f'per date loop: {loop_seconds:.3f}s')
+    print(f'reindex:       {reindex_seconds:.3f}s')
+    print(f'speedup: {loop_seconds / reindex_seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
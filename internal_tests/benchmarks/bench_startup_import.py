@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Program Name: bench_startup_import.py
+Contact(s): George McCabe
+Abstract: Benchmark for the time it takes to start METplus. Runs
+ python -X importtime in a new interpreter to import the metplus package and
+ a single wrapper, like run_metplus.py does when the PROCESS_LIST contains
+ one tool, and reports the median import time and the slowest modules.
+ Exits with a non-zero status if the median is above the limit so it can be
+ used to catch import time regressions.
+Usage: python3 bench_startup_import.py [number_of_runs] [limit_in_seconds]
+"""
+
+import os
+import sys
+import statistics
+import subprocess
+
+METPLUS_BASE = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                            os.pardir,
+                                            os.pardir))
+
+# modules imported by run_metplus.py when PROCESS_LIST = GridStat
+IMPORT_STATEMENT = ('import produtil.setup; import metplus.util; '
+                    'import metplus.wrappers.grid_stat_wrapper')
+
+# modules that should only be imported by wrappers that need them
+HEAVY_MODULES = ('numpy', 'pandas', 'matplotlib', 'netCDF4', 'cartopy')
+
+NUM_SLOWEST = 10
+
+
+def run_import():
+    """! Import METplus in a new interpreter with -X importtime
+
+         @returns dictionary where key is module name and value is tuple of
+          self and cumulative import time in microseconds
+    """
+    env = os.environ.copy()
+    env['PYTHONPATH'] = METPLUS_BASE
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             IMPORT_STATEMENT],
+                            env=env, cwd=METPLUS_BASE, check=True,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        # skip header line
+        if not self_us.strip().isdigit():
+            continue
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main():
+    num_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    limit = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    runs = [run_import() for _ in range(num_runs)]
+    totals = [sum(self_us for self_us, _ in modules.values()) / 1e6
+              for modules in runs]
+    median = statistics.median(totals)
+
+    # report the slowest modules from the run with the median total
+    modules = runs[totals.index(sorted(totals)[len(totals) // 2])]
+    slowest = sorted(modules.items(), key=lambda item: item[1][1],
+                     reverse=True)
+
+    print(f'statement: {IMPORT_STATEMENT}')
+    print(f'runs: {num_runs}')
+    print(f'median import time: {median:.3f}s '
+          f'(min {min(totals):.3f}s, max {max(totals):.3f}s)')
+    print(f'modules imported: {len(modules)}')
+    heavy = [name for name in HEAVY_MODULES if name in modules]
+    print(f"heavy modules imported: {', '.join(heavy) or 'none'}")
+    print('slowest modules (cumulative):')
+    for name, (_, cumulative_us) in slowest[:NUM_SLOWEST]:
+        print(f'  {cumulative_us / 1e6:.3f}s {name}')
+
+    if limit is not None and median > limit:
+        print(f'median import time is above limit of {limit:.3f}s')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Program Name: bench_string_template_substitution.py
+Contact(s): George McCabe
+Abstract: Microbenchmark for do_string_sub that compares filling in
+ templates that are parsed on every call to filling in templates that
+ are parsed once and reused from the template cache
+Usage: python3 bench_string_template_substitution.py [number_of_calls]
+"""
+
+import os
+import sys
+import timeit
+import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                os.pardir,
+                                                os.pardir)))
+
+from metplus.util import do_string_sub, ti_calculate
+from metplus.util.string_template_substitution import get_compiled_template
+
+TEMPLATES = [
+    '{init?fmt=%Y%m%d%H}/gfs.t{init?fmt=%H}z.pgrb2.0p25.f{lead?fmt=%3H}',
+    '{valid?fmt=%Y%m%d}/qpe_{valid?fmt=%Y%m%d%H}_A{level?fmt=%2H}.nc',
+    'obs/{valid?fmt=%Y%m%d?shift=-1H}/ob_{valid?fmt=%H%M?truncate=3600}',
+    'grid_stat_{model}_{lead?fmt=%H%M%S}L_{valid?fmt=%Y%m%d_%H%M%S}V.stat',
+]
+
+
+def main():
+    num_calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    time_info = ti_calculate({'init': datetime.datetime(2021, 6, 1, 12),
+                              'lead': 10800})
+    time_info['level'] = 21600
+    time_info['model'] = 'GFS'
+
+    def fill_templates():
+        for template in TEMPLATES:
+            do_string_sub(template, **time_info)
+
+    def fill_templates_uncached():
+        for template in TEMPLATES:
+            get_compiled_template.cache_clear()
+            do_string_sub(template, **time_info)
+
+    uncached = timeit.timeit(fill_templates_uncached, number=num_calls)
+    get_compiled_template.cache_clear()
+    cached = timeit.timeit(fill_templates, number=num_calls)
+
+    total_calls = num_calls * len(TEMPLATES)
+    print(f'do_string_sub calls: {total_calls}')
+    print(f'parse every call: {uncached:.3f}s '
+          f'({uncached / total_calls * 1e6:.2f} us/call)')
+    print(f'cached template:  {cached:.3f}s '
+          f'({cached / total_calls * 1e6:.2f} us/call)')
+    print(f'speedup: {uncached / cached:.2f}x')
+    print(get_compiled_template.cache_info())
+
+
+if __name__ == '__main__':
+    main()
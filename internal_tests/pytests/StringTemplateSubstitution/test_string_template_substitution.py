@@ -7,6 +7,8 @@ import datetime
 from metplus.util import do_string_sub, parse_template
 from metplus.util import get_tags,format_one_time_item, format_hms
 from metplus.util import add_to_dict, populate_match_dict, get_fmt_info
+from metplus.util import CompiledTemplate, get_compiled_template
+from metplus.util import get_template_regex
 
 def test_cycle_hour():
     cycle_string = 0
@@ -595,3 +597,75 @@ def test_do_string_sub_no_recurse_no_missing(templ, expected_filename):
                              basin=basin_regex,
                              cyclone=cyclone_regex)
     assert(filename == expected_filename)
+
+@pytest.mark.parametrize(
+    'templ, expected_segments, expected_filename', [
+        ("no_tags.nc", ['no_tags.nc'], 'no_tags.nc'),
+        ("{init?fmt=%Y%m%d}/f{lead?fmt=%3H}.nc",
+         ['init', '/f', 'lead', '.nc'], '20170604/f006.nc'),
+        ("{valid?fmt=%Y%m%d%H?shift=-1H}_{lead}",
+         ['valid', '_', 'lead'], '2017060405_21600S'),
+        ("{valid?fmt=%Y%m?shift=1m}_{missing}",
+         ['valid', '_', 'missing'], '201707_{missing}'),
+        ("{{init?fmt=%H}}", ['{', 'init', '}'], '{00}'),
+    ]
+)
+def test_compiled_template(templ, expected_segments, expected_filename):
+    time_info = {'init': datetime.datetime.strptime("2017060400", '%Y%m%d%H'),
+                 'valid': datetime.datetime.strptime("2017060406", '%Y%m%d%H'),
+                 'lead': 21600,
+                 }
+    compiled = CompiledTemplate(templ)
+    segments = [segment if isinstance(segment, str) else segment.key
+                for segment in compiled.segments]
+    assert(segments == expected_segments)
+    assert(compiled.render(time_info, skip_missing_tags=True) ==
+           expected_filename)
+    assert(do_string_sub(templ, skip_missing_tags=True, **time_info) ==
+           expected_filename)
+
+    # template should only be parsed once
+    assert(get_compiled_template(templ) is get_compiled_template(templ))
+
+def test_compiled_template_missing_tag():
+    with pytest.raises(TypeError):
+        do_string_sub("{init?fmt=%Y}_{lead?fmt=%H}", lead=3600)
+
+@pytest.mark.parametrize(
+    'template, filepath', [
+        ("{init?fmt=%Y%m%d%H}_A{lead?fmt=%HH}h", "2017060400_A06h"),
+        ("{valid?fmt=%Y%m%d}/{valid?fmt=%Y%m%d}_{valid?fmt=%H%M}",
+         "20180201/20180201_0013"),
+        ("{valid?fmt=%Y%m%d}/{valid?fmt=%Y%m%d}_{valid?fmt=%H%M}",
+         "20180201/20180202_0013"),
+        ("f{lead?fmt=%H}00.nc", "f0600.nc"),
+        ("{lead?fmt=%H}{valid?fmt=%H}", "0612"),
+        ("{init?fmt=%Y%j%H}_{lead?fmt=%3H}", "201815512_012"),
+        ("{init?fmt=%Y%j%H}_{lead?fmt=%3H}", "201815512_01"),
+        ("qpe_{valid?fmt=%Y%m%d%H?shift=-1H}_A{level?fmt=%2H}.nc",
+         "qpe_2017051004_A06.nc"),
+        ("{da_init?fmt=%2H}z.prepbufr.tm{offset?fmt=%2H}.{da_init?fmt=%Y%m%d}",
+         "14z.prepbufr.tm02.20200201"),
+        ("a{storm_id}_x_{storm_id}_{init?fmt=%Y%m%d_%H}",
+         "a0519_x_0519_20190201_06"),
+        ("{valid?fmt=%Y%m%d}.nc", "20190201_extra.nc"),
+        ("{valid?fmt=%Y%m%d}.nc", "2019020.nc"),
+    ]
+)
+def test_template_regex(template, filepath):
+    # regex should extract the same information as populate_match_dict
+    template_regex = get_template_regex(template)
+    assert(template_regex is not None)
+    assert(template_regex.match(filepath) ==
+           populate_match_dict(template, filepath))
+
+@pytest.mark.parametrize(
+    'template', [
+        "no_tags",
+        "{init?fmt=%Y?fmt=%m}",
+        "{init?fmt=%Q}",
+        "{init?fmt=%Y%m%d%H?shift=1H}",
+    ]
+)
+def test_template_regex_not_supported(template):
+    assert(get_template_regex(template) is None)
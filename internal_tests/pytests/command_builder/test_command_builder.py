@@ -4,6 +4,7 @@ import os
 import sys
 import re
 import logging
+import sqlite3
 from collections import namedtuple
 import produtil
 import pytest
@@ -885,3 +886,491 @@ def test_handle_met_config_dict_nested(metplus_config):
     cbw.handle_met_config_dict(dict_name, dict_items)
     print(f"env_var_dict: {cbw.env_var_dict}")
     assert(cbw.env_var_dict.get('METPLUS_OUTER_DICT') == expected_value)
+
+@pytest.mark.parametrize(
+    'num_workers', [
+        1, 3,
+    ]
+)
+def test_run_command_queue(metplus_config, num_workers):
+    config = metplus_config()
+    config.set('config', 'METPLUS_COMMAND_WORKERS', num_workers)
+    cbw = CommandBuilder(config)
+    cbw.log_name = 'test_run_command_queue'
+
+    log_dir = config.getdir('LOG_DIR')
+    log_file = os.path.join(log_dir, f"{cbw.log_name}.log")
+    if os.path.exists(log_file):
+        os.remove(log_file)
+    files_before = set(os.listdir(log_dir))
+
+    cmds = ["echo first",
+            "sh -c 'exit 1'",
+            "echo second",
+            ]
+    for cmd in cmds:
+        assert(cbw.run_command(cmd, queue=True))
+
+    assert(not cbw.wait_for_commands())
+    assert(cbw.errors == 1)
+    assert(not cbw.queued_commands)
+    assert([cmd for cmd, _ in cbw.all_commands] == cmds)
+
+    # output from each command should be written to the log in one block
+    with open(log_file, 'r') as file_handle:
+        blocks = file_handle.read().split('COMMAND:\n')[1:]
+
+    outputs = {}
+    for block in blocks:
+        cmd, output = block.split('OUTPUT:\n')
+        outputs[cmd.strip()] = output.strip()
+
+    assert(outputs == {"echo first": 'first',
+                       "sh -c 'exit 1'": '',
+                       "echo second": 'second'})
+    # files used to capture the output of each command should be removed
+    new_files = set(os.listdir(log_dir)) - files_before
+    assert(new_files == {os.path.basename(log_file)})
+
+def test_wait_for_commands_exception(metplus_config):
+    from concurrent.futures import Future
+    config = metplus_config()
+    cbw = CommandBuilder(config)
+
+    failed = Future()
+    failed.set_exception(OSError('could not write log'))
+    succeeded = Future()
+    succeeded.set_result((0, 'echo second'))
+    cbw.queued_commands = [('echo first', 'test', failed),
+                           ('echo second', 'test', succeeded),
+                           ]
+    assert(not cbw.wait_for_commands())
+    assert(cbw.errors == 1)
+    assert(not cbw.queued_commands)
+
+    # submitting a command that is None should not cause an error
+    cbw.queued_commands.append((None, 'test',
+                                cbw.cmdrunner.submit_cmd(None)))
+    assert(cbw.wait_for_commands())
+
+def write_copy_script(tmp_path, can_fail=False):
+    # write script that copies input to output and counts how many times it
+    # ran. If can_fail is True, it fails after writing partial output if the
+    # input contains fail. Returns script and function to get the count
+    count_file = tmp_path / 'count'
+    script = tmp_path / 'copy.sh'
+    script_text = f'#!/bin/sh\necho run >> {count_file}\ncp $1 $2\n'
+    if can_fail:
+        script_text += 'if grep -q fail $1; then exit 1; fi\n'
+    script.write_text(script_text)
+    script.chmod(0o755)
+
+    def get_count():
+        return count_file.read_text().count('run')
+
+    return script, get_count
+
+@pytest.mark.parametrize(
+    'queue, use_links', [
+        (False, False),
+        (True, False),
+        (False, True),
+    ]
+)
+def test_run_command_result_cache(metplus_config, tmp_path, queue,
+                                  use_links):
+    config = metplus_config()
+    config.set('config', 'METPLUS_RESULT_CACHE_DIR', str(tmp_path / 'cache'))
+    config.set('config', 'METPLUS_RESULT_CACHE_USE_LINKS', use_links)
+    cbw = CommandBuilder(config)
+    cbw.log_name = 'test_run_command_result_cache'
+    cbw.result_cache.pop_stats()
+
+    script, get_count = write_copy_script(tmp_path)
+    input_file = tmp_path / 'input.txt'
+    input_file.write_text('first')
+
+    def run_copy(output_dir):
+        output_path = str(tmp_path / output_dir / 'output.txt')
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        cbw.set_output_path(output_path)
+        cbw.add_env_var('METPLUS_TEST', 'value')
+        assert(cbw.run_command(f'{script} {input_file} {output_path}',
+                               queue=queue))
+        if queue:
+            assert(cbw.wait_for_commands())
+        with open(output_path, 'r') as file_handle:
+            return file_handle.read()
+
+    assert(run_copy('out1') == 'first')
+    # same command writing to another directory uses the cached output
+    assert(run_copy('out2') == 'first')
+    assert(get_count() == 1)
+
+    # changing the input file runs the command again
+    input_file.write_text('second')
+    assert(run_copy('out2') == 'second')
+    assert(get_count() == 2)
+    # output of first command that was linked or copied to out2 is still
+    # in the cache after out2 is written again
+    cached_outputs = []
+    for entry_dir, _, _ in cbw.result_cache.get_entries():
+        with open(os.path.join(entry_dir, 'output'), 'r') as file_handle:
+            cached_outputs.append(file_handle.read())
+    assert(sorted(cached_outputs) == ['first', 'second'])
+
+    hits, misses, _, _ = cbw.result_cache.pop_stats()
+    assert(hits == 1)
+    assert(misses == 2)
+    assert(cbw.errors == 0)
+
+def test_result_cache_evict(tmp_path):
+    from metplus.util.result_cache import ResultCache
+    result_cache = ResultCache(str(tmp_path / 'cache'), max_bytes=250)
+    keys = ['aa1', 'bb2', 'cc3']
+    for index, key in enumerate(keys):
+        output_path = str(tmp_path / f'{key}.txt')
+        with open(output_path, 'w') as file_handle:
+            file_handle.write('x' * 100)
+        assert(result_cache.store(key, output_path))
+        entry_dir = result_cache.get_entry_dir(key)
+        os.utime(os.path.join(entry_dir, 'manifest.json'),
+                 ns=(index * 10**9, index * 10**9))
+        if index == 1:
+            # use first entry so the second is the least recently used
+            assert(result_cache.fetch(keys[0], str(tmp_path / 'out.txt')))
+
+    entries = sorted(os.path.basename(entry_dir)
+                     for entry_dir, _, _ in result_cache.get_entries())
+    assert(entries == ['aa1', 'cc3'])
+    assert(result_cache.num_evicted == 1)
+
+def test_result_cache_evict_scans(tmp_path):
+    from metplus.util.result_cache import ResultCache
+    result_cache = ResultCache(str(tmp_path / 'cache'), max_bytes=250)
+    num_scans = []
+    get_entries = result_cache.get_entries
+    def count_scans():
+        num_scans.append(1)
+        return get_entries()
+    result_cache.get_entries = count_scans
+
+    # cache is only scanned on first store and when it is over the limit
+    for index, key in enumerate(['aa1', 'bb2', 'cc3', 'dd4']):
+        output_path = str(tmp_path / f'{key}.txt')
+        with open(output_path, 'w') as file_handle:
+            file_handle.write('x' * 100)
+        assert(result_cache.store(key, output_path))
+        assert(len(num_scans) == [1, 1, 2, 3][index])
+    assert(result_cache.num_evicted == 2)
+
+def test_result_cache_env_files(tmp_path):
+    from metplus.util.result_cache import ResultCache, get_env_files
+    result_cache = ResultCache(str(tmp_path / 'cache'))
+    input_file = tmp_path / 'input.nc'
+    input_file.write_text('first')
+    output_path = str(tmp_path / 'output.nc')
+    env = {'METPLUS_FCST_FILE': f'file_name = ["{input_file}", "other"];',
+           'METPLUS_OUTPUT': f'out = "{output_path}";',
+           'MODEL': 'GFS'}
+    open(output_path, 'w').close()
+    assert(get_env_files(env, output_path) == [str(input_file)])
+
+    cmd = f'grid_stat {output_path}'
+    key = result_cache.get_key(cmd, env, output_path)
+    assert(result_cache.get_key(cmd, env, output_path) == key)
+    # changing a file referenced in the environment changes the key
+    input_file.write_text('second')
+    assert(result_cache.get_key(cmd, env, output_path) != key)
+
+@pytest.mark.parametrize(
+    'queue', [
+        False, True,
+    ]
+)
+def test_run_command_run_ledger(metplus_config, tmp_path, queue):
+    config = metplus_config()
+    config.set('config', 'METPLUS_RUN_LEDGER', True)
+    config.set('config', 'METPLUS_RUN_LEDGER_FILE',
+               str(tmp_path / 'run_ledger.db'))
+    cbw = CommandBuilder(config)
+    cbw.app_name = 'test'
+    cbw.log_name = 'test_run_command_run_ledger'
+    cbw.c_dict['SKIP_IF_OUTPUT_EXISTS'] = True
+
+    script, get_count = write_copy_script(tmp_path, can_fail=True)
+    input_file = tmp_path / 'input.txt'
+    output_path = str(tmp_path / 'out' / 'output.txt')
+
+    def run_copy():
+        if not cbw.find_and_check_output_file(
+                output_path_template=output_path
+        ):
+            return None
+        success = cbw.run_command(f'{script} {input_file} {output_path}',
+                                  queue=queue)
+        if queue:
+            success = cbw.wait_for_commands()
+        return success
+
+    # output that exists but was not recorded in the ledger is skipped
+    os.makedirs(os.path.dirname(output_path))
+    with open(output_path, 'w') as file_handle:
+        file_handle.write('old')
+    assert(run_copy() is None)
+
+    # failed command is run again even though its output exists
+    os.remove(output_path)
+    input_file.write_text('fail')
+    assert(not run_copy())
+    assert(os.path.exists(output_path))
+    assert(not run_copy())
+    assert(get_count() == 2)
+
+    # successful command is not run again
+    input_file.write_text('first')
+    assert(run_copy())
+    assert(run_copy())
+    assert(get_count() == 3)
+
+    # command is run again if output changed or input changed
+    with open(output_path, 'a') as file_handle:
+        file_handle.write('partial')
+    assert(run_copy())
+    assert(get_count() == 4)
+    input_file.write_text('second')
+    assert(run_copy())
+    assert(get_count() == 5)
+
+    connection = sqlite3.connect(str(tmp_path / 'run_ledger.db'))
+    rows = connection.execute('SELECT command, return_code, duration'
+                              ' FROM commands').fetchall()
+    assert(len(rows) == 1)
+    assert(rows[0][1] == 0)
+    assert(rows[0][2] >= 0)
+    assert(connection.execute('SELECT path FROM outputs').fetchall() ==
+           [(output_path,)])
+    cbw.run_ledger.close()
+
+def test_run_ledger_env_files(tmp_path):
+    from metplus.util.run_ledger import RunLedger
+    run_ledger = RunLedger(str(tmp_path / 'run_ledger.db'))
+    input_file = tmp_path / 'input.nc'
+    input_file.write_text('first')
+    env = {'METPLUS_FCST_FILE': f'file_name = ["{input_file}"];'}
+    cmd = f'grid_stat {tmp_path}/output.nc'
+    entry = run_ledger.get_entry(cmd, env)
+    assert(entry.inputs == [(str(input_file), 5,
+                             os.stat(input_file).st_mtime_ns)])
+    # changing a file referenced in the environment changes the hash
+    input_file.write_text('second')
+    assert(run_ledger.get_entry(cmd, env).inputs_hash != entry.inputs_hash)
+
+def test_run_ledger_output_dir(metplus_config, tmp_path):
+    config = metplus_config()
+    config.set('config', 'METPLUS_RUN_LEDGER', True)
+    config.set('config', 'METPLUS_RUN_LEDGER_FILE',
+               str(tmp_path / 'run_ledger.db'))
+    cbw = CommandBuilder(config)
+    cbw.app_name = 'test'
+    cbw.log_name = 'test_run_ledger_output_dir'
+    output_dir = str(tmp_path / 'out')
+    script = tmp_path / 'write.sh'
+    script.write_text('#!/bin/sh\necho $3 > $1/$2\n')
+    script.chmod(0o755)
+
+    # commands write into the same output directory one after the other
+    commands = {}
+    for hour in (0, 6):
+        cbw.clear()
+        valid = datetime.datetime(2018, 2, 1, hour)
+        assert(cbw.find_and_check_output_file({'valid': valid},
+                                              is_directory=True,
+                                              output_path_template=output_dir))
+        output_name = f"test_{valid.strftime('%Y%m%d_%H%M%S')}V.stat"
+        cmd = f'{script} {output_dir} {output_name} {hour}'
+        assert(cbw.run_command(cmd))
+        commands[os.path.join(output_dir, output_name)] = cmd
+
+    # each command only records the output file that is named for it
+    connection = sqlite3.connect(str(tmp_path / 'run_ledger.db'))
+    rows = connection.execute('SELECT path, command FROM outputs'
+                              ' JOIN commands USING (command_id)').fetchall()
+    assert(dict(rows) == commands)
+    cbw.run_ledger.close()
+
+@pytest.mark.parametrize(
+    'template, window, expected_files', [
+        # exact file path
+        ('{valid?fmt=%Y%m%d}/{valid?fmt=%Y%m%d}_0013', 0,
+         ['20180201/20180201_0013']),
+        # wildcard expression
+        ('{valid?fmt=%Y%m%d}/*', 0, ['20180201/20180201_0013']),
+        ('2018020?/*_0013', 0, ['20180201/20180201_0013',
+                                '20180202/20180202_0013']),
+        # file that does not exist
+        ('{valid?fmt=%Y%m%d}/missing', 0, None),
+        # file window
+        ('{valid?fmt=%Y%m%d}/{valid?fmt=%Y%m%d}_{valid?fmt=%H%M}', 3600,
+         ['20180131/20180131_2345', '20180201/20180201_0013']),
+        ('{valid?fmt=%Y%m%d}_{valid?fmt=%H%M}', 3600, ['20180201_0045']),
+    ]
+)
+def test_find_data_file_index(metplus_config, template, window,
+                              expected_files):
+    input_dir = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir,
+                             'data', 'obs')
+    input_dir = os.path.abspath(input_dir)
+    task_info = {}
+    task_info['valid'] = datetime.datetime.strptime("201802010000",
+                                                    '%Y%m%d%H%M')
+    task_info['lead'] = 0
+    time_info = time_util.ti_calculate(task_info)
+
+    results = []
+    for use_index in (False, True):
+        config = metplus_config()
+        config.set('config', 'METPLUS_INPUT_DIR_INDEX', use_index)
+        cbw = CommandBuilder(config)
+        assert(bool(cbw.file_index) == use_index)
+        cbw.c_dict['ALLOW_MULTIPLE_FILES'] = True
+        cbw.c_dict['OBS_FILE_WINDOW_BEGIN'] = -window
+        cbw.c_dict['OBS_FILE_WINDOW_END'] = window
+        cbw.c_dict['OBS_INPUT_DIR'] = input_dir
+        cbw.c_dict['OBS_INPUT_TEMPLATE'] = template
+        found_files = cbw.find_data(time_info, data_type='OBS_',
+                                    return_list=True, mandatory=False)
+        results.append(sorted(found_files) if found_files else found_files)
+
+    # results should be the same with or without the index
+    assert(results[0] == results[1])
+    if expected_files is None:
+        assert(results[1] is None)
+    else:
+        assert(results[1] == [os.path.join(input_dir, expected_file)
+                              for expected_file in expected_files])
+
+def test_file_index_invalidation(tmp_path):
+    from metplus.util.file_index import DirectoryIndex
+    file_index = DirectoryIndex()
+    input_dir = tmp_path / 'input'
+    input_dir.mkdir()
+    (input_dir / 'file_a').touch()
+
+    # set modification time in the past so the listing is trusted
+    old_time = 1000000000
+    os.utime(input_dir, (old_time, old_time))
+    assert(file_index.isfile(str(input_dir / 'file_a')))
+    assert(not file_index.isfile(str(input_dir / 'file_b.gz')))
+
+    # listing should be reused if the directory has not changed
+    (input_dir / 'file_b.gz').touch()
+    os.utime(input_dir, (old_time, old_time))
+    assert(not file_index.isfile(str(input_dir / 'file_b.gz')))
+
+    # listing should be read again if the modification time changes
+    os.utime(input_dir, (old_time + 1, old_time + 1))
+    assert(file_index.isfile(str(input_dir / 'file_b.gz')))
+    assert(sorted(file_index.glob(str(input_dir / 'file_*'))) ==
+           [str(input_dir / 'file_a'), str(input_dir / 'file_b.gz')])
+
+    # removed directory should not be found
+    (input_dir / 'file_a').unlink()
+    (input_dir / 'file_b.gz').unlink()
+    input_dir.rmdir()
+    assert(not file_index.isfile(str(input_dir / 'file_a')))
+    assert(file_index.glob(str(input_dir / 'file_*')) == [])
+
+def test_valid_time_index(tmp_path):
+    from metplus.util.file_index import DirectoryIndex
+    file_index = DirectoryIndex()
+    data_dir = tmp_path / 'obs'
+    data_dir.mkdir()
+    template = '{valid?fmt=%Y%m%d}/obs_{valid?fmt=%H}.nc'
+    for day, hours in (('20180131', ('22', '23')), ('20180201', ('00', '01'))):
+        (data_dir / day).mkdir()
+        for hour in hours:
+            (data_dir / day / f'obs_{hour}.nc').touch()
+    (data_dir / '20180201' / 'other.nc').touch()
+
+    old_time = 1000000000
+    for path in (data_dir, data_dir / '20180131', data_dir / '20180201'):
+        os.utime(path, (old_time, old_time))
+
+    def valid_seconds(valid_time):
+        valid_dt = datetime.datetime.strptime(valid_time, '%Y%m%d%H')
+        return int(valid_dt.strftime('%s'))
+
+    valid_time_index = file_index.get_valid_time_index(str(data_dir),
+                                                       template)
+    assert(len(valid_time_index) == 4)
+    found = valid_time_index.find(valid_seconds('2018013123'),
+                                  valid_seconds('2018020100'))
+    assert([os.path.basename(fullpath) for _, fullpath in found] ==
+           ['obs_23.nc', 'obs_00.nc'])
+
+    # index should be reused if no directories have changed
+    assert(file_index.get_valid_time_index(str(data_dir), template) is
+           valid_time_index)
+
+    # directories are only checked for changes once per run time
+    (data_dir / '20180201' / 'obs_02.nc').touch()
+    os.utime(data_dir / '20180201', (old_time + 1, old_time + 1))
+    assert(file_index.get_valid_time_index(str(data_dir), template) is
+           valid_time_index)
+
+    # index should be reused in the next run time if nothing changed
+    file_index.start_run_time()
+    os.utime(data_dir / '20180201', (old_time, old_time))
+    assert(file_index.get_valid_time_index(str(data_dir), template) is
+           valid_time_index)
+
+    # index should be rebuilt if a directory changes
+    file_index.start_run_time()
+    os.utime(data_dir / '20180201', (old_time + 1, old_time + 1))
+    new_index = file_index.get_valid_time_index(str(data_dir), template)
+    assert(new_index is not valid_time_index)
+    assert(len(new_index) == 5)
+
+def test_file_index_walk_symlink(tmp_path):
+    from metplus.util.file_index import DirectoryIndex
+    file_index = DirectoryIndex()
+    data_dir = tmp_path / 'obs'
+    (data_dir / 'sub').mkdir(parents=True)
+    (data_dir / 'sub' / 'obs.nc').touch()
+    # link back to the top directory would loop forever if followed
+    os.symlink(str(data_dir), str(data_dir / 'sub' / 'loop'))
+
+    expected = [(dirpath, sorted(dirnames), sorted(filenames))
+                for dirpath, dirnames, filenames in os.walk(str(data_dir))]
+    assert(list(file_index.walk(str(data_dir))) == expected)
+    assert(len(file_index.get_tree_version(str(data_dir))) == 2)
+
+def test_run_profile_command(metplus_config):
+    from metplus.util import profile_util
+    config = metplus_config()
+    config.set('config', 'METPLUS_PROFILE', True)
+    profile = profile_util.init_run_profile(config)
+    try:
+        cbw = CommandBuilder(config)
+        with profile.context('Test', '20180201000000'):
+            cbw.cmdrunner.run_cmd('sh -c "exit 3"', ismetcmd=False)
+            future = cbw.cmdrunner.submit_cmd('echo submitted',
+                                              ismetcmd=False)
+        future.result()
+
+        commands = profile.get_command_rows()
+        assert([command['return_code'] for command in commands] == [3, 0])
+        for command in commands:
+            assert(command['wrapper'] == 'Test')
+            assert(command['run_time'] == '20180201000000')
+            assert(command['wall_seconds'] > 0)
+            assert(command['user_cpu_seconds'] is not None)
+
+        stages = {(row['wrapper'], row['stage']): row['count']
+                  for row in profile.get_stage_rows()}
+        assert(stages[('Test', 'command')] == 2)
+        assert(stages[('CommandBuilder', 'config')] == 1)
+    finally:
+        config.set('config', 'METPLUS_PROFILE', False)
+        profile_util.init_run_profile(config)
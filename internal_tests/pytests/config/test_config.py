@@ -324,3 +324,44 @@ def test_getraw_nested_curly_braces(metplus_config,
     config = metplus_config(config_files)
     sec, name = config_name.split('.', 1)
     assert(config.getraw(sec, name) == expected_result)
+
+@pytest.mark.parametrize(
+    'get_method, value, expected_result', [
+        ('getstr', '{TEST_BASE}/out', 'base/out'),
+        ('getraw', '{TEST_BASE}/{valid?fmt=%Y}', 'base/{valid?fmt=%Y}'),
+        ('getbool', 'True', True),
+        ('getint', '4', 4),
+    ]
+)
+def test_config_value_cache(metplus_config, get_method, value,
+                            expected_result):
+    conf = metplus_config()
+    conf.set('config', 'TEST_BASE', 'base')
+    conf.set('config', 'TEST_CACHE', value)
+    get_value = getattr(conf, get_method)
+
+    hits = conf.cache_hits
+    assert(get_value('config', 'TEST_CACHE') == expected_result)
+    assert(get_value('config', 'TEST_CACHE') == expected_result)
+    assert(conf.cache_hits > hits)
+    assert(conf.get_cache_info()['size'] > 0)
+
+    # changing any value should clear the cache
+    conf.set('config', 'TEST_BASE', 'new')
+    assert(conf.get_cache_info()['size'] == 0)
+    if isinstance(expected_result, str):
+        assert(get_value('config', 'TEST_CACHE') ==
+               expected_result.replace('base', 'new'))
+
+def test_config_value_cache_env(metplus_config, monkeypatch):
+    conf = metplus_config()
+    conf.set('config', 'TEST_ENV', '{ENV[TEST_CACHE_ENV]}')
+    conf.set('config', 'TEST_NESTED_ENV', '{TEST_ENV}/dir')
+    monkeypatch.setenv('TEST_CACHE_ENV', 'first')
+    assert(conf.getstr('config', 'TEST_NESTED_ENV') == 'first/dir')
+    assert(conf.getraw('config', 'TEST_NESTED_ENV') == 'first/dir')
+
+    # values that reference the environment should not be cached
+    monkeypatch.setenv('TEST_CACHE_ENV', 'second')
+    assert(conf.getstr('config', 'TEST_NESTED_ENV') == 'second/dir')
+    assert(conf.getraw('config', 'TEST_NESTED_ENV') == 'second/dir')
@@ -111,3 +111,87 @@ def test_get_grid(metplus_config, lat, lon, expected_result):
     etw = extract_tiles_wrapper(metplus_config)
     storm_data = {'ALAT': lat, 'ALON': lon}
     assert(etw.get_grid('FCST', storm_data) == expected_result)
+
+def get_create_tiles_wrapper(metplus_config):
+    config = get_config(metplus_config)
+    config.set('config', 'DO_NOT_RUN_EXE', True)
+    config.set('config', 'METPLUS_COMMAND_WORKERS', 2)
+    input_dir = os.path.join(config.getdir('OUTPUT_BASE'),
+                             'extract_tiles_input')
+    os.makedirs(input_dir, exist_ok=True)
+    for data_type in ['FCST', 'OBS']:
+        config.set('config', f'{data_type}_EXTRACT_TILES_INPUT_DIR',
+                   input_dir)
+        config.set('config', f'{data_type}_EXTRACT_TILES_OUTPUT_TEMPLATE',
+                   f'{{storm_id}}/{data_type}_{{valid?fmt=%H}}.nc')
+    config.set('config', 'EXTRACT_TILES_TC_STAT_INPUT_DIR', input_dir)
+    config.set('config', 'EXTRACT_TILES_TC_STAT_INPUT_TEMPLATE',
+               'filter_{init?fmt=%Y%m%d_%H}.tcst')
+    config.set('config', 'EXTRACT_TILES_VAR_LIST', '')
+    config.set('config', 'BOTH_VAR1_NAME', 'TMP')
+    config.set('config', 'BOTH_VAR1_LEVELS', 'Z2')
+
+    # create filter file with 2 storms that have track points at the
+    # same times
+    header, *lines = get_storm_lines(ExtractTilesWrapper(config))
+    with open(os.path.join(input_dir, 'filter_20141214_00.tcst'), 'w') as file_handle:
+        file_handle.write(header)
+        for storm_id in ['ML02', 'ML01']:
+            for line in lines[:2]:
+                values = line.split()
+                values[4] = storm_id
+                file_handle.write(' '.join(values) + '\n')
+
+    for filename in ['gfs_4_20141214_0000_000.grb2',
+                     'gfs_4_20141214_0000_006.grb2',
+                     'gfs_4_20141214_0600_000.grb2']:
+        open(os.path.join(input_dir, filename), 'w').close()
+
+    etw = ExtractTilesWrapper(config)
+    assert(etw.isOK)
+    return etw, input_dir
+
+def get_tile_commands(etw):
+    # get input and output file from each command
+    return [[item for item in cmd.split()
+             if item.endswith('.grb2') or item.endswith('.nc')]
+            for cmd, _ in etw.all_commands]
+
+def test_create_tiles(metplus_config):
+    etw, input_dir = get_create_tiles_wrapper(metplus_config)
+    etw.run_at_time({'init': datetime.datetime(2014, 12, 14, 0)})
+
+    fcst_0 = os.path.join(input_dir, 'gfs_4_20141214_0000_000.grb2')
+    fcst_6 = os.path.join(input_dir, 'gfs_4_20141214_0000_006.grb2')
+    obs_6 = os.path.join(input_dir, 'gfs_4_20141214_0600_000.grb2')
+    out_dir = etw.c_dict['OUTPUT_DIR']
+    assert(get_tile_commands(etw) == [
+        [fcst_0, f'{out_dir}/ML01/FCST_00.nc'],
+        [fcst_6, f'{out_dir}/ML01/FCST_06.nc'],
+        [fcst_0, f'{out_dir}/ML02/FCST_00.nc'],
+        [fcst_6, f'{out_dir}/ML02/FCST_06.nc'],
+        [fcst_0, f'{out_dir}/ML01/OBS_00.nc'],
+        [obs_6, f'{out_dir}/ML01/OBS_06.nc'],
+        [fcst_0, f'{out_dir}/ML02/OBS_00.nc'],
+        [obs_6, f'{out_dir}/ML02/OBS_06.nc'],
+    ])
+    assert(etw.regrid_data_plane.errors == 0)
+
+def test_create_tiles_skip_obs_if_fcst_fails(metplus_config):
+    from concurrent.futures import Future
+    etw, _ = get_create_tiles_wrapper(metplus_config)
+
+    # forecast tile of ML01 at 6 hours fails
+    def submit_cmd(cmd, **kwargs):
+        future = Future()
+        future.set_result((int('ML01/FCST_06' in cmd), cmd))
+        return future
+    etw.regrid_data_plane.cmdrunner.submit_cmd = submit_cmd
+
+    etw.run_at_time({'init': datetime.datetime(2014, 12, 14, 0)})
+    out_dir = etw.c_dict['OUTPUT_DIR']
+    outputs = [command[-1] for command in get_tile_commands(etw)]
+    assert(f'{out_dir}/ML01/OBS_00.nc' in outputs)
+    assert(f'{out_dir}/ML01/OBS_06.nc' not in outputs)
+    assert(f'{out_dir}/ML02/OBS_06.nc' in outputs)
+    assert(etw.regrid_data_plane.errors == 1)
@@ -107,3 +107,32 @@ def test_run_gen_vx_mask_twice(metplus_config):
 
     assert(test_passed)
 
+
+def test_run_gen_vx_mask_twice_parallel(metplus_config):
+    input_dict = {'valid': datetime.datetime.strptime("201802010000",'%Y%m%d%H%M'),
+                  'lead': 0}
+    time_info = time_util.ti_calculate(input_dict)
+
+    config = metplus_config()
+    config.set('config', 'DO_NOT_RUN_EXE', True)
+    config.set('config', 'METPLUS_PARALLEL_WORKERS', 2)
+    wrap = GenVxMaskWrapper(config)
+    wrap.c_dict['INPUT_TEMPLATE'] = '{valid?fmt=%Y%m%d%H}_ZENITH'
+    wrap.c_dict['MASK_INPUT_TEMPLATES'] = ['LAT', 'LON']
+    wrap.c_dict['OUTPUT_DIR'] = os.path.join(wrap.config.getdir('OUTPUT_BASE'),
+                                             'GenVxMask_test')
+    wrap.c_dict['OUTPUT_TEMPLATE'] = '{valid?fmt=%Y%m%d%H}_ZENITH_LAT_LON_MASK.nc'
+    wrap.c_dict['COMMAND_OPTIONS'] = ["-type lat", "-type lon"]
+
+    wrap.run_at_time_all(time_info)
+
+    # temporary file should be written to a directory for this process
+    temp_dir = os.path.join(wrap.config.getdir('STAGING_DIR'),
+                            'gen_vx_mask', str(os.getpid()))
+    temp_file = os.path.join(temp_dir, 'temp_0.nc')
+    assert(len(wrap.all_commands) == 2)
+    assert(temp_file in wrap.all_commands[0][0])
+    assert(temp_file in wrap.all_commands[1][0])
+
+    # directory should be removed after the last command
+    assert(not os.path.exists(temp_dir))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+
+from metplus.wrappers.met_db_load_wrapper import METDbLoadWrapper
+
+
+def met_db_load_wrapper(metplus_config, config_overrides):
+    config = metplus_config()
+    config.set('config', 'MET_DATA_DB_DIR', '/METdatadb')
+    config.set('config', 'MET_DB_LOAD_RUNTIME_FREQ', 'RUN_ONCE')
+    config.set('config', 'MET_DB_LOAD_XML_FILE', '/path/to/load.xml')
+    config.set('config', 'MET_DB_LOAD_INPUT_TEMPLATE', '/path/to/stat')
+    for key, value in config_overrides.items():
+        config.set('config', key, value)
+    return METDbLoadWrapper(config)
+
+
+def write_file(path, content='text'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file_handle:
+        file_handle.write(content)
+
+
+@pytest.mark.parametrize(
+    'num_workers', [
+        1,
+        3,
+    ]
+)
+def test_get_stat_directories(metplus_config, tmp_path, num_workers):
+    # Test that directories containing stat files are found and only
+    # directories with new or changed stat files are returned after
+    # the load manifest is updated
+    input_dir = str(tmp_path / 'input')
+    stat_dir = os.path.join(input_dir, 'stat')
+    nested_dir = os.path.join(stat_dir, 'nested')
+    tcst_dir = os.path.join(input_dir, 'other', 'tcst')
+    write_file(os.path.join(stat_dir, 'grid_stat.stat'))
+    write_file(os.path.join(nested_dir, 'point_stat.stat'))
+    write_file(os.path.join(tcst_dir, 'tc_pairs.tcst'))
+    write_file(os.path.join(input_dir, 'other', 'not_stat.txt'))
+    os.makedirs(os.path.join(input_dir, 'empty'))
+    other_input_dir = str(tmp_path / 'other_input')
+    write_file(os.path.join(other_input_dir, 'ensemble_stat.stat'))
+    input_paths = f'{input_dir}, {other_input_dir}'
+    all_stat_dirs = sorted([stat_dir, nested_dir, tcst_dir, other_input_dir])
+
+    # all directories are found every time if manifest is not used
+    wrapper = met_db_load_wrapper(metplus_config, {
+        'MET_DB_LOAD_SCAN_WORKERS': num_workers,
+    })
+    assert wrapper.get_stat_directories(input_paths) == all_stat_dirs
+    assert wrapper.get_stat_directories(input_paths) == all_stat_dirs
+
+    manifest_file = str(tmp_path / 'manifest' / 'load_manifest.json')
+    wrapper = met_db_load_wrapper(metplus_config, {
+        'MET_DB_LOAD_SCAN_WORKERS': num_workers,
+        'MET_DB_LOAD_MANIFEST_FILE': manifest_file,
+    })
+    stat_dirs = wrapper.get_stat_directories(input_paths)
+    assert stat_dirs == all_stat_dirs
+
+    # directories are not returned after they are loaded
+    wrapper.update_load_manifest(stat_dirs)
+    assert wrapper.get_stat_directories(input_paths) == []
+
+    # directory is returned if a stat file is added or changed
+    write_file(os.path.join(nested_dir, 'new.stat'))
+    write_file(os.path.join(tcst_dir, 'tc_pairs.tcst'), 'changed text')
+    stat_dirs = wrapper.get_stat_directories(input_paths)
+    assert stat_dirs == sorted([nested_dir, tcst_dir])
+
+    # adding other files does not cause directory to be loaded again
+    wrapper.update_load_manifest(stat_dirs)
+    write_file(os.path.join(stat_dir, 'not_stat.txt'))
+    assert wrapper.get_stat_directories(input_paths) == []
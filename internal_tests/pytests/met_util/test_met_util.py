@@ -6,6 +6,9 @@ import datetime
 import os
 import subprocess
 import shutil
+import gzip
+import bz2
+import zipfile
 from dateutil.relativedelta import relativedelta
 from csv import reader
 import pprint
@@ -555,6 +558,109 @@ def test_preprocess_file_stage(metplus_config, filename, ext):
     outpath = util.preprocess_file(filepath, None, conf)
     assert(stagepath == outpath and os.path.exists(outpath))
 
+@pytest.mark.parametrize(
+    'ext', [
+        '.gz', '.bz2', '.zip',
+    ]
+)
+def test_preprocess_file_corrupt(metplus_config, ext):
+    conf = metplus_config()
+    input_dir = os.path.join(conf.getdir('OUTPUT_BASE'), 'corrupt_input')
+    os.makedirs(input_dir, exist_ok=True)
+    filepath = os.path.join(input_dir, 'corrupt.txt')
+    with open(filepath + ext, 'wb') as file_handle:
+        file_handle.write(b'not a compressed file')
+
+    stagepath = conf.getdir('STAGING_DIR') + filepath
+    if os.path.exists(stagepath):
+        os.remove(stagepath)
+
+    assert(util.preprocess_file(filepath, None, conf) is None)
+    # no partial or temporary files should be left in the staging dir
+    assert(not os.path.exists(stagepath))
+    assert(not os.path.exists(util.get_tmp_stage_path(stagepath)))
+
+def write_compressed_file(filepath, ext, content):
+    if ext == '.gz':
+        with gzip.open(filepath + ext, 'wb') as file_handle:
+            file_handle.write(content)
+    elif ext == '.bz2':
+        with bz2.open(filepath + ext, 'wb') as file_handle:
+            file_handle.write(content)
+    else:
+        with zipfile.ZipFile(filepath + ext, 'w') as zip_file:
+            zip_file.writestr(os.path.basename(filepath), content)
+
+@pytest.mark.parametrize(
+    'ext', [
+        '.gz', '.bz2', '.zip',
+    ]
+)
+def test_preprocess_file_changed(metplus_config, ext):
+    conf = metplus_config()
+    input_dir = os.path.join(conf.getdir('OUTPUT_BASE'), 'changed_input')
+    os.makedirs(input_dir, exist_ok=True)
+    filepath = os.path.join(input_dir, f'changed_{ext[1:]}.txt')
+    stagepath = conf.getdir('STAGING_DIR') + filepath
+    if os.path.exists(stagepath):
+        os.remove(stagepath)
+
+    # content is larger than the chunk size to test reading in pieces
+    content = b'first version\n' * (util.UNCOMPRESS_CHUNK_SIZE // 7)
+    write_compressed_file(filepath, ext, content)
+    os.utime(filepath + ext, (1000000000, 1000000000))
+
+    assert(util.preprocess_file(filepath, None, conf) == stagepath)
+    with open(stagepath, 'rb') as file_handle:
+        assert(file_handle.read() == content)
+
+    # staged file is reused if compressed file has not changed
+    staged_inode = os.stat(stagepath).st_ino
+    assert(util.preprocess_file(filepath, None, conf) == stagepath)
+    assert(os.stat(stagepath).st_ino == staged_inode)
+
+    # staged file is replaced if compressed file has changed
+    write_compressed_file(filepath, ext, b'second version\n')
+    os.utime(filepath + ext, (1000000100, 1000000100))
+    assert(util.preprocess_file(filepath, None, conf) == stagepath)
+    with open(stagepath, 'rb') as file_handle:
+        assert(file_handle.read() == b'second version\n')
+
+@pytest.mark.parametrize(
+    'num_workers', [
+        1, 3,
+    ]
+)
+def test_preprocess_files(metplus_config, num_workers):
+    conf = metplus_config()
+    conf.set('config', 'METPLUS_DECOMPRESS_WORKERS', num_workers)
+    input_dir = os.path.join(conf.getdir('OUTPUT_BASE'),
+                             f'multi_input_{num_workers}')
+    os.makedirs(input_dir, exist_ok=True)
+    stage_dir = conf.getdir('STAGING_DIR')
+
+    filepaths = []
+    expected = []
+    for index, ext in enumerate(['.gz', '.bz2', '.zip', '.gz', '']):
+        filepath = os.path.join(input_dir, f'file{index}.txt')
+        if ext:
+            write_compressed_file(filepath, ext, f'file{index}'.encode())
+            expected.append(stage_dir + filepath)
+        else:
+            with open(filepath, 'w') as file_handle:
+                file_handle.write(f'file{index}')
+            expected.append(filepath)
+        filepaths.append(filepath)
+
+    # file that does not exist returns None in the same position
+    filepaths.insert(2, os.path.join(input_dir, 'missing.txt'))
+    expected.insert(2, None)
+
+    assert(util.preprocess_files(filepaths, None, conf) == expected)
+    for index, outpath in enumerate(path for path in expected if path):
+        with open(outpath, 'r') as file_handle:
+            assert(file_handle.read() == f'file{index}')
+
 @pytest.mark.parametrize(
     'filename, data_type, allow_dir, expected', [
         # filename is None or empty string - return None
@@ -1560,6 +1666,42 @@ def test_get_storms(metplus_config, filename, expected_result):
     if storm_dict:
         assert(storm_dict['header'].split()[storm_id_index] == 'STORM_ID')
 
+def test_get_storms_column_match(metplus_config):
+    config = metplus_config()
+    input_dir = os.path.join(config.getdir('OUTPUT_BASE'), 'storm_input')
+    os.makedirs(input_dir, exist_ok=True)
+    filepath = os.path.join(input_dir, 'storms.tcst')
+    # storm ID AL01 is part of AL0101 and is also the value of the DESC
+    # column of a line for AL02, so only the STORM_ID column should be used
+    lines = [
+        'VERSION AMODEL DESC STORM_ID LEAD\n',
+        'V9.1    GFSO   NA   AL0101   000000\n',
+        'V9.1    GFSO   AL01 AL02     000000\n',
+        'V9.1    GFSO   NA   AL01     000000\n',
+        '\n',
+        'V9.1    GFSO   NA   AL01     060000\n',
+    ]
+    with open(filepath, 'w') as file_handle:
+        file_handle.writelines(lines)
+
+    storm_dict = util.get_storms(filepath)
+    assert(list(storm_dict.keys()) == ['header', 'AL01', 'AL0101', 'AL02'])
+    assert(storm_dict['header'] == lines[0])
+    assert(storm_dict['AL01'] == [lines[3], lines[5]])
+    assert(storm_dict['AL0101'] == [lines[1]])
+    assert(storm_dict['AL02'] == [lines[2]])
+
+    # same table is returned if the file has not changed
+    storm_table = util.get_storm_table(filepath)
+    assert(util.get_storm_table(filepath) is storm_table)
+    assert(storm_table.columns['STORM_ID'] == 3)
+
+    # file is read again if it changes
+    with open(filepath, 'a') as file_handle:
+        file_handle.write('V9.1    GFSO   NA   AL03     000000\n')
+    assert(util.get_storm_table(filepath) is not storm_table)
+    assert(util.get_storm_ids(filepath) == ['AL01', 'AL0101', 'AL02', 'AL03'])
+
 @pytest.mark.parametrize(
     'config_value, expected_result', [
         # 2 items semi-colon at end
@@ -1672,3 +1814,358 @@ def test_parse_var_list_py_embed_multi_levels(metplus_config, config_overrides,
 )
 def test_format_level(level, expected_result):
     assert(util.format_level(level) == expected_result)
+
+@pytest.mark.parametrize(
+    'num_workers', [
+        1, 2, 8,
+    ]
+)
+def test_loop_over_times_and_call_parallel(metplus_config, num_workers):
+    from metplus.wrappers.gen_vx_mask_wrapper import GenVxMaskWrapper
+    config = metplus_config()
+    config.set('config', 'DO_NOT_RUN_EXE', True)
+    config.set('config', 'LOOP_BY', 'VALID')
+    config.set('config', 'VALID_TIME_FMT', '%Y%m%d%H')
+    config.set('config', 'VALID_BEG', '2018020100')
+    config.set('config', 'VALID_END', '2018020200')
+    config.set('config', 'VALID_INCREMENT', '6H')
+    config.set('config', 'METPLUS_PARALLEL_WORKERS', num_workers)
+    config.set('config', 'GEN_VX_MASK_INPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_ZENITH')
+    config.set('config', 'GEN_VX_MASK_INPUT_MASK_TEMPLATE', 'LAT')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_DIR',
+               '{OUTPUT_BASE}/GenVxMask_parallel')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_MASK.nc')
+    config.set('config', 'GEN_VX_MASK_OPTIONS', '-type lat')
+
+    wrapper = GenVxMaskWrapper(config)
+    out_dir = wrapper.c_dict['OUTPUT_DIR']
+    expected_cmds = [
+        f"{wrapper.app_path} {valid}_ZENITH LAT {out_dir}/{valid}_MASK.nc -type lat -v 2"
+        for valid in ['2018020100', '2018020106', '2018020112',
+                      '2018020118', '2018020200']
+    ]
+
+    all_commands = util.loop_over_times_and_call(config, [wrapper])
+    assert([cmd for cmd, _ in all_commands] == expected_cmds)
+    assert(wrapper.errors == 0)
+
+@pytest.mark.parametrize(
+    'num_workers', [
+        1, 2,
+    ]
+)
+def test_run_profile(metplus_config, num_workers):
+    import json
+    from metplus.util import profile_util
+    from metplus.wrappers.gen_vx_mask_wrapper import GenVxMaskWrapper
+    config = metplus_config()
+    config.set('config', 'METPLUS_PROFILE', True)
+    config.set('config', 'DO_NOT_RUN_EXE', True)
+    config.set('config', 'LOOP_BY', 'VALID')
+    config.set('config', 'VALID_TIME_FMT', '%Y%m%d%H')
+    config.set('config', 'VALID_BEG', '2018020100')
+    config.set('config', 'VALID_END', '2018020112')
+    config.set('config', 'VALID_INCREMENT', '6H')
+    config.set('config', 'METPLUS_PARALLEL_WORKERS', num_workers)
+    config.set('config', 'GEN_VX_MASK_INPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_ZENITH')
+    config.set('config', 'GEN_VX_MASK_INPUT_MASK_TEMPLATE', 'LAT')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_DIR',
+               '{OUTPUT_BASE}/GenVxMask_profile')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_MASK.nc')
+    config.set('config', 'GEN_VX_MASK_OPTIONS', '-type lat')
+
+    profile = profile_util.init_run_profile(config)
+    try:
+        wrapper = GenVxMaskWrapper(config)
+        util.loop_over_times_and_call(config, [wrapper])
+
+        stages = {(row['wrapper'], row['run_time'], row['stage']): row
+                  for row in profile.get_stage_rows()}
+        assert(('GenVxMask', '', 'config') in stages)
+        for run_time in ['20180201000000', '20180201060000',
+                         '20180201120000']:
+            for stage in ['find_files', 'string_sub', 'set_environment']:
+                row = stages[('GenVxMask', run_time, stage)]
+                assert(row['count'] >= 1)
+                assert(row['wall_seconds'] >= 0)
+
+        json_path, csv_path = profile_util.write_profile_report(config)
+        assert(os.path.dirname(json_path) == config.getdir('LOG_DIR'))
+        with open(json_path, 'r') as file_handle:
+            report = json.load(file_handle)
+        assert(len(report['stages']) == len(stages))
+        assert(report['commands'] == [])
+        with open(csv_path, 'r') as file_handle:
+            csv_rows = list(reader(file_handle))
+        assert(csv_rows[0] == profile_util.CSV_COLUMNS)
+        assert(len(csv_rows) == len(stages) + 1)
+    finally:
+        config.set('config', 'METPLUS_PROFILE', False)
+        profile_util.init_run_profile(config)
+
+def test_loop_over_times_and_call_prefetch(metplus_config, tmp_path):
+    from metplus.util import prefetch_util
+    from metplus.wrappers.gen_vx_mask_wrapper import GenVxMaskWrapper
+    config = metplus_config()
+    input_dir = str(tmp_path / 'input')
+    os.makedirs(input_dir)
+    valids = ['2018020100', '2018020106', '2018020112', '2018020118']
+    for valid in valids:
+        with gzip.open(os.path.join(input_dir, f'{valid}_ZENITH.gz'),
+                       'wb') as file_handle:
+            file_handle.write(b'data')
+
+    config.set('config', 'DO_NOT_RUN_EXE', True)
+    config.set('config', 'LOOP_BY', 'VALID')
+    config.set('config', 'VALID_TIME_FMT', '%Y%m%d%H')
+    config.set('config', 'VALID_BEG', valids[0])
+    config.set('config', 'VALID_END', valids[-1])
+    config.set('config', 'VALID_INCREMENT', '6H')
+    config.set('config', 'METPLUS_PREFETCH_RUN_TIMES', 2)
+    config.set('config', 'METPLUS_PREFETCH_WORKERS', 2)
+    config.set('config', 'STAGING_DIR', str(tmp_path / 'stage'))
+    config.set('config', 'GEN_VX_MASK_INPUT_DIR', input_dir)
+    config.set('config', 'GEN_VX_MASK_INPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_ZENITH')
+    config.set('config', 'GEN_VX_MASK_INPUT_MASK_TEMPLATE', 'LAT')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_DIR',
+               '{OUTPUT_BASE}/GenVxMask_prefetch')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_MASK.nc')
+    config.set('config', 'GEN_VX_MASK_OPTIONS', '-type lat')
+
+    wrapper = GenVxMaskWrapper(config)
+    stage_dir = config.getdir('STAGING_DIR')
+    out_dir = wrapper.c_dict['OUTPUT_DIR']
+    expected_cmds = [
+        f"{wrapper.app_path} {stage_dir}{input_dir}/{valid}_ZENITH LAT "
+        f"{out_dir}/{valid}_MASK.nc -type lat -v 2"
+        for valid in valids
+    ]
+
+    all_commands = util.loop_over_times_and_call(config, [wrapper])
+    assert([cmd for cmd, _ in all_commands] == expected_cmds)
+    assert(wrapper.errors == 0)
+
+    # first run time is staged when it is processed and the rest are
+    # staged ahead of time
+    shutil.rmtree(stage_dir)
+    loop_times = [datetime.datetime.strptime(valid, '%Y%m%d%H')
+                  for valid in valids]
+    prefetcher = prefetch_util.get_run_time_prefetcher(config, [wrapper],
+                                                       loop_times, False)
+    for index in range(len(valids)):
+        prefetcher.start_run_time(index)
+        prefetcher.finish_run_time(index)
+    prefetcher.shutdown()
+    assert(prefetcher.num_files == len(valids) - 1)
+    assert(prefetcher.num_deferred == 0)
+    assert(not os.path.exists(f"{stage_dir}{input_dir}/{valids[0]}_ZENITH"))
+
+def test_prefetch_staging_budget(metplus_config, tmp_path):
+    from metplus.util import prefetch_util
+    from metplus.wrappers.gen_vx_mask_wrapper import GenVxMaskWrapper
+    config = metplus_config()
+    input_dir = str(tmp_path / 'input')
+    os.makedirs(input_dir)
+    loop_times = [datetime.datetime(2018, 2, 1, hour) for hour in (0, 6, 12)]
+    for loop_time in loop_times:
+        with gzip.open(os.path.join(input_dir,
+                                    loop_time.strftime('%Y%m%d%H.gz')),
+                       'wb') as file_handle:
+            file_handle.write(os.urandom(4096))
+
+    config.set('config', 'DO_NOT_RUN_EXE', True)
+    config.set('config', 'STAGING_DIR', str(tmp_path / 'stage'))
+    config.set('config', 'GEN_VX_MASK_INPUT_DIR', input_dir)
+    config.set('config', 'GEN_VX_MASK_INPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}')
+    config.set('config', 'GEN_VX_MASK_INPUT_MASK_TEMPLATE', 'LAT')
+    config.set('config', 'GEN_VX_MASK_OPTIONS', '-type lat')
+    wrapper = GenVxMaskWrapper(config)
+    stage_dir = config.getdir('STAGING_DIR')
+
+    # budget only fits one compressed file, so the second upcoming run time
+    # is not prefetched until the first one starts
+    file_size = os.path.getsize(os.path.join(input_dir, '2018020100.gz'))
+    prefetcher = prefetch_util.RunTimePrefetcher(config, [wrapper],
+                                                 loop_times, False,
+                                                 num_run_times=2,
+                                                 max_bytes=file_size)
+    prefetcher.start_run_time(0)
+    prefetcher.finish_run_time(0)
+    assert(prefetcher.num_deferred == 1)
+    prefetcher.start_run_time(1)
+    prefetcher.finish_run_time(1)
+    # wait for the last run time to finish staging before shutdown cancels
+    # staging that has not started
+    prefetcher.start_run_time(2)
+    prefetcher.finish_run_time(2)
+    prefetcher.shutdown()
+    assert(prefetcher.num_files == 2)
+    for loop_time in loop_times[1:]:
+        assert(os.path.exists(f"{stage_dir}{input_dir}/"
+                              f"{loop_time.strftime('%Y%m%d%H')}"))
+    assert(not os.path.exists(f"{stage_dir}{input_dir}/2018020100"))
+
+def test_distributed_run_worker(metplus_config):
+    import threading
+    from multiprocessing import Pipe
+    from metplus.util import distributed_util
+    from metplus.wrappers.gen_vx_mask_wrapper import GenVxMaskWrapper
+    config = metplus_config()
+    config.set('config', 'DO_NOT_RUN_EXE', True)
+    config.set('config', 'GEN_VX_MASK_INPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_ZENITH')
+    config.set('config', 'GEN_VX_MASK_INPUT_MASK_TEMPLATE', 'LAT')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_DIR',
+               '{OUTPUT_BASE}/GenVxMask_distributed')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_MASK.nc')
+    config.set('config', 'GEN_VX_MASK_OPTIONS', '-type lat')
+
+    process_keys = [
+        distributed_util.get_process_key(GenVxMaskWrapper(config))
+    ]
+    rank0, worker = Pipe()
+    thread = threading.Thread(target=distributed_util.run_worker,
+                              args=(config, worker))
+    thread.start()
+
+    loop_time = datetime.datetime(2018, 2, 1, 6)
+    rank0.send(('run', 3, loop_time, process_keys, False))
+    status, index, result = rank0.recv()
+    rank0.send(('run', 4, loop_time, [('metplus.wrappers', 'NotAWrapper',
+                                       None)], False))
+    failed = rank0.recv()
+    rank0.send(('stop',))
+    thread.join()
+
+    assert((status, index) == ('done', 3))
+    commands, errors, _, _ = result
+    assert(len(commands) == 1)
+    assert(commands[0][0].split()[1:3] == ['2018020106_ZENITH', 'LAT'])
+    assert(errors == [0])
+    assert(failed[:2] == ('failed', 4))
+
+def test_loop_over_times_and_call_distributed(metplus_config):
+    from metplus.wrappers.gen_vx_mask_wrapper import GenVxMaskWrapper
+    config = metplus_config()
+    config.set('config', 'DO_NOT_RUN_EXE', True)
+    config.set('config', 'LOOP_BY', 'VALID')
+    config.set('config', 'VALID_TIME_FMT', '%Y%m%d%H')
+    config.set('config', 'VALID_BEG', '2018020100')
+    config.set('config', 'VALID_END', '2018020200')
+    config.set('config', 'VALID_INCREMENT', '6H')
+    config.set('config', 'GEN_VX_MASK_INPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_ZENITH')
+    config.set('config', 'GEN_VX_MASK_INPUT_MASK_TEMPLATE', 'LAT')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_DIR',
+               '{OUTPUT_BASE}/GenVxMask_distributed')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_MASK.nc')
+    config.set('config', 'GEN_VX_MASK_OPTIONS', '-type lat')
+
+    wrapper = GenVxMaskWrapper(config)
+    expected_cmds = util.loop_over_times_and_call(config, [wrapper])
+
+    config.set('config', 'METPLUS_DISTRIBUTED_RANKS', 2)
+    config.set('config', 'METPLUS_DISTRIBUTED_LAUNCHER', 'LOCAL')
+    config.set('config', 'METPLUS_DISTRIBUTED_HOST', 'localhost')
+    wrapper = GenVxMaskWrapper(config)
+    all_commands = util.loop_over_times_and_call(config, [wrapper])
+    assert([cmd for cmd, _ in all_commands] ==
+           [cmd for cmd, _ in expected_cmds])
+    assert(wrapper.errors == 0)
+
+@pytest.mark.parametrize(
+    'launcher', [
+        'BAD',
+        'MPI',
+    ]
+)
+def test_loop_over_times_and_call_distributed_fallback(metplus_config,
+                                                       monkeypatch,
+                                                       launcher):
+    import produtil.run
+    from metplus.wrappers.gen_vx_mask_wrapper import GenVxMaskWrapper
+    config = metplus_config()
+    config.set('config', 'DO_NOT_RUN_EXE', True)
+    config.set('config', 'LOOP_BY', 'VALID')
+    config.set('config', 'VALID_TIME_FMT', '%Y%m%d%H')
+    config.set('config', 'VALID_BEG', '2018020100')
+    config.set('config', 'VALID_END', '2018020112')
+    config.set('config', 'VALID_INCREMENT', '6H')
+    config.set('config', 'GEN_VX_MASK_INPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_ZENITH')
+    config.set('config', 'GEN_VX_MASK_INPUT_MASK_TEMPLATE', 'LAT')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_DIR',
+               '{OUTPUT_BASE}/GenVxMask_distributed_fallback')
+    config.set('config', 'GEN_VX_MASK_OUTPUT_TEMPLATE',
+               '{valid?fmt=%Y%m%d%H}_MASK.nc')
+    config.set('config', 'GEN_VX_MASK_OPTIONS', '-type lat')
+
+    wrapper = GenVxMaskWrapper(config)
+    expected_cmds = util.loop_over_times_and_call(config, [wrapper])
+
+    # MPI launcher cannot be used if no MPI implementation is found
+    detect_mpi = produtil.run.detect_mpi
+    class NoMPI:
+        def __init__(self, mpiimpl):
+            self.mpiimpl = mpiimpl
+        def __getattr__(self, name):
+            return getattr(self.mpiimpl, name)
+        def can_run_mpi(self):
+            return False
+    monkeypatch.setattr(produtil.run, 'detect_mpi',
+                        lambda: NoMPI(detect_mpi()))
+
+    config.set('config', 'METPLUS_DISTRIBUTED_RANKS', 2)
+    config.set('config', 'METPLUS_DISTRIBUTED_LAUNCHER', launcher)
+    wrapper = GenVxMaskWrapper(config)
+    all_commands = util.loop_over_times_and_call(config, [wrapper])
+
+    # run times are processed on this node and worker config is removed
+    assert([cmd for cmd, _ in all_commands] ==
+           [cmd for cmd, _ in expected_cmds])
+    assert(len(all_commands) == 3)
+    assert(wrapper.errors == 0)
+    log_dir = config.getdir('LOG_DIR')
+    assert(not [name for name in os.listdir(log_dir)
+                if name.startswith('.metplus_distributed.')])
+
+@pytest.mark.parametrize(
+    'class_name, module_name', [
+        ('GridStatWrapper', 'grid_stat_wrapper'),
+        ('ASCII2NCWrapper', 'ascii2nc_wrapper'),
+        ('METDbLoadWrapper', 'met_db_load_wrapper'),
+        ('TCMPRPlotterWrapper', 'tcmpr_plotter_wrapper'),
+        ('CommandBuilder', 'command_builder'),
+        ('camel_to_underscore', None),
+    ]
+)
+def test_get_wrapper_module_name(class_name, module_name):
+    from metplus import wrappers
+    assert(wrappers.get_wrapper_module_name(class_name) == module_name)
+
+def test_import_wrappers_lazily():
+    metplus_base = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                os.pardir, os.pardir,
+                                                os.pardir))
+    script = (
+        "import sys, metplus\n"
+        "print(sorted(m for m in sys.modules "
+        "if m.startswith('metplus.wrappers.')))\n"
+        "print(metplus.GridStatWrapper.__module__)\n"
+        "print('metplus.wrappers.grid_stat_wrapper' in sys.modules)\n"
+    )
+    env = os.environ.copy()
+    env['PYTHONPATH'] = metplus_base
+    output = subprocess.run([sys.executable, '-c', script], env=env,
+                            check=True, stdout=subprocess.PIPE,
+                            universal_newlines=True).stdout.splitlines()
+    assert(output == ['[]', 'metplus.wrappers.grid_stat_wrapper', 'True'])
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import os
+import datetime
+import pytest
+
+from metplus.wrappers.plot_data_plane_wrapper import PlotDataPlaneWrapper
+from metplus.util import time_util
+
+def set_minimum_config_settings(config):
+    config.set('config', 'PLOT_DATA_PLANE_INPUT_TEMPLATE',
+               'PYTHON_NUMPY')
+    config.set('config', 'PLOT_DATA_PLANE_OUTPUT_DIR',
+               '{OUTPUT_BASE}/plot_data_plane')
+    config.set('config', 'PLOT_DATA_PLANE_OUTPUT_TEMPLATE',
+               '{field_name}_{valid?fmt=%Y%m%d%H}.ps')
+    config.set('config', 'PLOT_DATA_PLANE_FIELD_NAME', 'script.py {field}')
+    config.set('config', 'PLOT_DATA_PLANE_CONVERT_TO_IMAGE', True)
+    config.set('config', 'CONVERT', '/bin/echo')
+    config.set('config', 'METPLUS_COMMAND_WORKERS', 3)
+
+@pytest.mark.parametrize(
+    'do_not_run_exe', [
+        True, False,
+    ]
+)
+def test_plot_data_plane_queue(metplus_config, do_not_run_exe):
+    config = metplus_config()
+    set_minimum_config_settings(config)
+    config.set('config', 'DO_NOT_RUN_EXE', do_not_run_exe)
+    config.set('config', 'MET_BIN_DIR', '/path/does/not/exist')
+
+    wrapper = PlotDataPlaneWrapper(config)
+    assert(wrapper.isOK)
+
+    time_info = time_util.ti_calculate({'valid': datetime.datetime(2018, 2, 1),
+                                        'lead': 0})
+    out_dir = wrapper.c_dict['OUTPUT_DIR']
+    fields = ['TMP', 'RH', 'UGRD']
+    for field in fields:
+        wrapper.c_dict['OUTPUT_TEMPLATE'] = f'{field}_{{valid?fmt=%Y%m%d%H}}.ps'
+        assert(wrapper.run_at_time_once(dict(time_info, field=field),
+                                        queue=True))
+
+    success = wrapper.wait_for_commands()
+    assert(success == do_not_run_exe)
+    assert(not wrapper.queued_commands)
+    assert(not wrapper.queued_conversions)
+
+    plot_cmds = [cmd for cmd, _ in wrapper.all_commands
+                 if not cmd.startswith('/bin/echo')]
+    convert_cmds = [cmd for cmd, _ in wrapper.all_commands
+                    if cmd.startswith('/bin/echo')]
+    assert(len(plot_cmds) == len(fields))
+
+    # images are only converted if plot_data_plane succeeded
+    if not do_not_run_exe:
+        assert(not convert_cmds)
+        return
+
+    assert(convert_cmds == [
+        (f'/bin/echo -rotate 90 -background white -flatten '
+         f'{out_dir}/{field}_2018020100.ps {out_dir}/{field}_2018020100.png')
+        for field in fields
+    ])
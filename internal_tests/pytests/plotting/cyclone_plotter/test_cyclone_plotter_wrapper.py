@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import pytest
+
+from metplus.wrappers.cyclone_plotter_wrapper import get_track_data
+
+TRACK_HEADER = 'VERSION AMODEL STORM_ID INIT LEAD VALID ALAT ALON BLAT BLON'
+
+
+def write_track_file(path, lines):
+    with open(path, 'w') as file_handle:
+        file_handle.write(f'{TRACK_HEADER}\n')
+        for line in lines:
+            file_handle.write(f'V9.1 {line} NA NA\n')
+
+
+@pytest.mark.parametrize(
+    'num_workers', [
+        1,
+        2,
+    ]
+)
+def test_get_track_data(tmp_path, num_workers):
+    file_one = str(tmp_path / 'one.tcst')
+    file_two = str(tmp_path / 'two.tcst')
+    empty_file = str(tmp_path / 'empty.tcst')
+    write_track_file(file_one, [
+        # NA lat/lon is skipped, so first point of ML01 is the next line
+        'GFSO ML01 20141214_000000 0 20141214_000000 NA NA',
+        'GFSO ML01 20141214_000000 60000 20141214_060000 -50.3 190.0',
+        # wrong model, init date, or init hour is skipped
+        'OTHER ML02 20141214_000000 0 20141214_000000 -40.0 10.0',
+        'GFSO ML02 20141215_000000 0 20141215_000000 -40.0 10.0',
+        'GFSO ML02 20141214_060000 0 20141214_060000 -40.0 10.0',
+        'GFSO ML01 20141214_000000 120000 20141214_120000 -51.0 181.5',
+    ])
+    write_track_file(file_two, [
+        'GFSO ML01 20141214_000000 180000 20141214_180000 -52.0 182.0',
+        'GFSO ML02 20141214_000000 30000 20141214_030000 -41.0 11.0',
+    ])
+    open(empty_file, 'w').close()
+
+    tracks = get_track_data([file_one, empty_file, file_two],
+                            '20141214', '00', 'GFSO', num_workers)
+    assert tracks['storm_id'].tolist() == ['ML01', 'ML01', 'ML01', 'ML02']
+    assert tracks['lon'].tolist() == [-170.0, -178.5, -178.0, 11.0]
+    assert tracks['lat'].tolist() == [-50.3, -51.0, -52.0, -41.0]
+    assert tracks['fcst_lead_hh'].tolist() == ['60000', '120000', '180000',
+                                               '30000']
+    assert tracks['first_point'].tolist() == [True, False, False, True]
+    assert tracks['valid_dd'].tolist() == ['14', '', '', '14']
+    assert tracks['valid_hh'].tolist() == ['06', '', '', '03']
+    assert tracks['lead_group'].tolist() == ['6', '0', '6', '']
+
+
+def test_get_track_data_whitespace(tmp_path):
+    # columns are padded to line up and lines may end with whitespace
+    track_file = str(tmp_path / 'padded.tcst')
+    with open(track_file, 'w') as file_handle:
+        file_handle.write('VERSION AMODEL STORM_ID INIT            LEAD   '
+                          'VALID           ALAT   ALON   BLAT BLON  \n')
+        file_handle.write('V9.1    GFSO   ML01     20141214_000000 60000  '
+                          '20141214_060000 -50.3  190.0  NA   NA  \t\n')
+        file_handle.write('V9.1    GFSO   ML01     20141214_000000 120000 '
+                          '20141214_120000 -51.0  181.5  NA   NA   \n')
+
+    tracks = get_track_data([track_file], '20141214', '00', 'GFSO')
+    assert tracks['storm_id'].tolist() == ['ML01', 'ML01']
+    assert tracks['lon'].tolist() == [-170.0, -178.5]
+    assert tracks['lat'].tolist() == [-50.3, -51.0]
+    assert tracks['fcst_lead_hh'].tolist() == ['60000', '120000']
@@ -10,6 +10,7 @@ import datetime
 import produtil.setup
 
 from metplus.wrappers.make_plots_wrapper import MakePlotsWrapper
+from metplus.wrappers.make_plots_wrapper import run_plotting_scripts
 from metplus.util import met_util as util
 
 #
@@ -161,3 +162,77 @@ def test_create_c_dict(metplus_config):
     assert(c_dict['EVENT_EQUALIZATION'] == 'False')
     assert(c_dict['LOG_METPLUS'] == mp.config.getdir('OUTPUT_BASE')
                                     +'/logs/metplus.log')
+
+def test_run_plotting_scripts(tmp_path, monkeypatch):
+    # Test running plotting scripts in process with environment
+    # variables set from a dictionary
+    monkeypatch.setenv('KEEP_VAR', 'KEPT')
+    scripts_dir = str(tmp_path)
+    output_file = os.path.join(scripts_dir, 'output.txt')
+    log_file = os.path.join(scripts_dir, 'plot.log')
+    with open(os.path.join(scripts_dir, 'write_env.py'), 'w') as file_handle:
+        file_handle.write(
+            "import os\n"
+            "import logging\n"
+            "logger = logging.getLogger(os.environ['LOG_METPLUS'])\n"
+            "logger.addHandler(logging.FileHandler(os.environ['LOG_METPLUS']))\n"
+            "with open(os.environ['OUTPUT_FILE'], 'a') as output:\n"
+            "    output.write(os.environ['MODEL'] + ' '\n"
+            "                 + os.environ.get('KEEP_VAR', '') + '\\n')\n"
+        )
+    with open(os.path.join(scripts_dir, 'exit.py'), 'w') as file_handle:
+        file_handle.write("exit(1)\n")
+    with open(os.path.join(scripts_dir, 'raise.py'), 'w') as file_handle:
+        file_handle.write("raise ValueError('bad value')\n")
+
+    env = {'MODEL': 'MODEL_TEST',
+           'OUTPUT_FILE': output_file,
+           'LOG_METPLUS': log_file}
+    original_env = dict(os.environ)
+    results = run_plotting_scripts(scripts_dir,
+                                   ['write_env.py', 'exit.py',
+                                    'raise.py', 'write_env.py'],
+                                   env)
+    assert(dict(os.environ) == original_env)
+    assert([error for _, error in results] ==
+           [None, 'exited with 1', 'ValueError: bad value', None])
+    with open(output_file, 'r') as file_handle:
+        assert(file_handle.read() == 'MODEL_TEST KEPT\nMODEL_TEST KEPT\n')
+    # handlers added by scripts are removed after each script
+    assert(logging.getLogger(log_file).handlers == [])
+
+def test_create_plots_in_process(metplus_config, tmp_path, monkeypatch):
+    # Test that plotting scripts run in process are added to the list of
+    # all commands and do not change the environment of the wrapper
+    monkeypatch.setattr(MakePlotsWrapper, 'get_met_version',
+                        lambda self: 8.1)
+    mp = make_plots_wrapper(metplus_config)
+    scripts_dir = str(tmp_path / 'scripts')
+    os.makedirs(scripts_dir)
+    output_file = os.path.join(scripts_dir, 'output.txt')
+    with open(os.path.join(scripts_dir, 'write_env.py'), 'w') as file_handle:
+        file_handle.write(
+            "import os\n"
+            "os.environ['SET_BY_SCRIPT'] = 'yes'\n"
+            "with open(os.environ['OUTPUT_FILE'], 'a') as output:\n"
+            "    output.write(os.environ['MODEL'] + '\\n')\n"
+        )
+    mp.c_dict['IN_PROCESS'] = True
+    mp.c_dict['WORKERS'] = 2
+    mp.c_dict['USER_SCRIPT_LIST'] = ['write_env.py']
+    mp.c_dict['SCRIPTS_BASE_DIR'] = scripts_dir
+    mp.c_dict['OUTPUT_BASE_DIR'] = str(tmp_path / 'output')
+    runtime_settings_dict_list = [
+        {'MODEL': model, 'OBTYPE': 'OBS', 'OUTPUT_FILE': output_file}
+        for model in ['MODEL_A', 'MODEL_B']
+    ]
+    original_env = dict(os.environ)
+    mp.create_plots(runtime_settings_dict_list)
+    assert(dict(os.environ) == original_env)
+    assert(mp.errors == 0)
+    script_path = os.path.join(scripts_dir, 'write_env.py')
+    assert([cmd for cmd, _ in mp.all_commands] ==
+           [f'python {script_path}', f'python {script_path}'])
+    assert(any('MODEL=MODEL_B' in item for item in mp.all_commands[1][1]))
+    with open(output_file, 'r') as file_handle:
+        assert(sorted(file_handle.read().split()) == ['MODEL_A', 'MODEL_B'])
@@ -811,3 +811,113 @@ def test_calculate_stat():
         assert(test_stat_values_array[1,0,l] ==
                 expected_stat_values_array[1,0,l])
     assert(test_stat_plot_name == expected_stat_plot_name)
+
+def test_read_stat_file(tmp_path):
+    # Test that a .stat file read from the stat file cache matches
+    # the file parsed from text and that a changed file is parsed again
+    met_version = '8.1'
+    stat_file = str(tmp_path / 'test_dump_row.stat')
+    with open(METPLUS_BASE+'/internal_tests/data/stat_data/'
+              +'test_20190101.stat', 'r') as file_handle:
+        stat_lines = file_handle.readlines()
+    with open(stat_file, 'w') as file_handle:
+        file_handle.writelines(stat_lines)
+    cache_dir = str(tmp_path / 'stat_cache')
+    expected_data = pd.read_csv(stat_file, sep=" ", skiprows=1,
+                                skipinitialspace=True, header=None)
+    expected_data.columns = (
+        plot_util.get_stat_file_base_columns(met_version)
+        + plot_util.get_stat_file_line_type_columns(logger, met_version,
+                                                    'SL1L2')
+    )
+    # parse text, then read from cache with in memory data cleared
+    for _ in range(2):
+        plot_util._STAT_FILE_DATA.clear()
+        test_data, test_line_type_columns = plot_util.read_stat_file(
+            logger, stat_file, met_version, cache_dir
+        )
+        pd.testing.assert_frame_equal(test_data, expected_data)
+        assert(test_line_type_columns == [ 'TOTAL', 'FBAR', 'OBAR', 'FOBAR',
+                                           'FFBAR', 'OOBAR', 'MAE' ])
+    assert(len(os.listdir(cache_dir)) == 1)
+    # changing returned data does not change cached data
+    test_data.loc[0, 'FBAR'] = -1
+    test_data, _ = plot_util.read_stat_file(logger, stat_file, met_version,
+                                            cache_dir)
+    assert(test_data.loc[0, 'FBAR'] == expected_data.loc[0, 'FBAR'])
+    # changed file is parsed again and replaces old cache entry
+    with open(stat_file, 'w') as file_handle:
+        file_handle.writelines(stat_lines[:2])
+    test_data, _ = plot_util.read_stat_file(logger, stat_file, met_version,
+                                            cache_dir)
+    assert(len(test_data) == 1)
+    assert(len(os.listdir(cache_dir)) == 1)
+
+def test_stat_cache_entry_types(tmp_path):
+    # Test that the stat file cache keeps the type of each value
+    # in text and mixed type columns
+    stat_file_data = pd.DataFrame({
+        'VERSION': [ 'V8.1', 'V8.1', 'V8.1' ],
+        'MODEL': [ 'GFS', np.nan, 'GFS' ],
+        'FCST_LEV': [ 'P850', 500, np.nan ],
+        'TOTAL': [ 10, 20, 30 ],
+        'FBAR': [ 1.5, np.nan, 2.5 ],
+    })
+    stat_file_data['VERSION'] = stat_file_data['VERSION'].astype(object)
+    entry_dir = str(tmp_path / 'entry')
+    plot_util.write_stat_cache_entry(logger, entry_dir, 'test.stat',
+                                     stat_file_data)
+    test_data = plot_util.read_stat_cache_entry(logger, entry_dir)
+    pd.testing.assert_frame_equal(test_data, stat_file_data)
+    for column in stat_file_data.columns:
+        for test_value, expected_value in zip(test_data[column],
+                                              stat_file_data[column]):
+            assert(type(test_value) == type(expected_value))
+
+def test_read_stat_file_max_files(tmp_path, monkeypatch):
+    # Test that only the most recently read files are kept in memory
+    monkeypatch.setattr(plot_util, 'STAT_FILE_DATA_MAX_FILES', 2)
+    plot_util._STAT_FILE_DATA.clear()
+    with open(METPLUS_BASE+'/internal_tests/data/stat_data/'
+              +'test_20190101.stat', 'r') as file_handle:
+        stat_lines = file_handle.readlines()
+    stat_files = []
+    for index in range(3):
+        stat_file = str(tmp_path / f'test_{index}.stat')
+        with open(stat_file, 'w') as file_handle:
+            file_handle.writelines(stat_lines)
+        stat_files.append(stat_file)
+
+    plot_util.read_stat_file(logger, stat_files[0], '8.1')
+    plot_util.read_stat_file(logger, stat_files[1], '8.1')
+    plot_util.read_stat_file(logger, stat_files[0], '8.1')
+    plot_util.read_stat_file(logger, stat_files[2], '8.1')
+    assert(list(plot_util._STAT_FILE_DATA) == [ stat_files[0],
+                                                stat_files[2] ])
+    plot_util._STAT_FILE_DATA.clear()
+
+def test_get_stat_file_data_for_dates():
+    # Independently test aligning .stat file lines to the expected dates
+    stat_file_data = pd.DataFrame({
+        'FCST_VALID_BEG': [ '20190102_000000', '20190101_000000',
+                            '20190102_000000', '20190104_000000' ],
+        'LINE_TYPE': [ 'SL1L2' ] * 4,
+        'TOTAL': [ 10, 20, 30, 40 ],
+        'FBAR': [ 1.5, 2.5, 3.5, 4.5 ],
+    })
+    expected_dates = [ '20190101_000000', '20190102_000000',
+                       '20190103_000000', '20190104_000000' ]
+    index = pd.MultiIndex.from_product(
+        [[ 'MODEL_TEST' ], expected_dates],
+        names=[ 'model_plot_name', 'dates' ]
+    )
+    # first line for a date is used and missing dates are NaN
+    expected_data = pd.DataFrame({
+        'TOTAL': [ 20.0, 10.0, np.nan, 40.0 ],
+        'FBAR': [ 2.5, 1.5, np.nan, 4.5 ],
+        'MAE': [ np.nan ] * 4,
+    }, index=index)
+    test_data = plot_util.get_stat_file_data_for_dates(
+        stat_file_data, [ 'TOTAL', 'FBAR', 'MAE' ], expected_dates, index
+    )
+    pd.testing.assert_frame_equal(test_data, expected_data)
@@ -801,3 +801,62 @@ def test_get_netcdf_min_max(metplus_config):
     min, max = wrapper.get_netcdf_min_max(filepath, variable_name)
     assert(min == expected_min)
     assert(max == expected_max)
+
+def test_get_netcdf_stats(metplus_config):
+    numpy = pytest.importorskip('numpy')
+    netCDF4 = pytest.importorskip('netCDF4')
+    from metplus.wrappers import series_analysis_wrapper as module
+
+    wrapper = series_analysis_wrapper(metplus_config)
+    output_dir = os.path.join(wrapper.config.getdir('OUTPUT_BASE'),
+                              'series_netcdf_stats')
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, 'series.nc')
+
+    def write_file(total, rmse):
+        with netCDF4.Dataset(filepath, 'w') as nc_file:
+            nc_file.createDimension('lat', total.shape[0])
+            nc_file.createDimension('lon', total.shape[1])
+            for name, values in (('series_cnt_TOTAL', total),
+                                 ('series_cnt_RMSE', rmse)):
+                nc_var = nc_file.createVariable(name, 'f4', ('lat', 'lon'),
+                                                fill_value=-9999.0)
+                nc_var[:] = values
+
+    rmse = numpy.ma.masked_array(numpy.arange(12.0).reshape(4, 3),
+                                 mask=numpy.zeros((4, 3)))
+    rmse.mask[0, 0] = True
+    rmse.mask[3, 2] = True
+    write_file(numpy.full((4, 3), 5.0), rmse)
+    os.utime(filepath, (1000000000, 1000000000))
+
+    # read a few rows at a time
+    chunk_size = module.NETCDF_CHUNK_SIZE
+    module.NETCDF_CHUNK_SIZE = 4
+    try:
+        assert(module.get_netcdf_stats(filepath, 'series_cnt_RMSE') ==
+               (1.0, 10.0, 10))
+    finally:
+        module.NETCDF_CHUNK_SIZE = chunk_size
+    # all series_cnt variables are read when the file is first opened
+    cached = module._NETCDF_STATS_CACHE[filepath][1]
+    assert(cached['series_cnt_TOTAL'] == (5.0, 5.0, 12))
+    assert(wrapper.get_netcdf_min_max(filepath, 'series_cnt_TOTAL') ==
+           (5.0, 5.0))
+    assert(wrapper.get_netcdf_min_max(filepath, 'series_cnt_FBAR') ==
+           (None, None))
+
+    # file is read again if it changes
+    write_file(numpy.full((4, 3), 7.0), rmse)
+    assert(wrapper.get_netcdf_min_max(filepath, 'series_cnt_TOTAL') ==
+           (7.0, 7.0))
+
+    # minimum and maximum are None instead of a masked value if all values
+    # are masked so no plot range is set
+    rmse.mask[:] = True
+    write_file(numpy.full((4, 3), 7.0), rmse)
+    os.utime(filepath, (1000000001, 1000000001))
+    assert(module.get_netcdf_stats(filepath, 'series_cnt_RMSE') ==
+           (None, None, 0))
+    assert(wrapper.get_netcdf_min_max(filepath, 'series_cnt_RMSE') ==
+           (None, None))
@@ -795,3 +795,108 @@ def test_get_level_list(metplus_config, data_type, config_list, expected_list):
     saw = StatAnalysisWrapper(config)
 
     assert(saw.get_level_list(data_type) == expected_list)
+
+@pytest.mark.parametrize(
+    'merge_jobs, expected_num_commands', [
+        (False, 4),
+        (True, 1),
+    ]
+)
+def test_run_stat_analysis_merge_jobs(metplus_config, merge_jobs,
+                                      expected_num_commands):
+    st = stat_analysis_wrapper(metplus_config)
+    # write a different dump_row file for each job
+    st.c_dict['MODEL_INFO_LIST'][0]['dump_row_filename_template'] = (
+        '{fcst_valid_hour?fmt=%H}Z/{model?fmt=%s}/'
+        '{model?fmt=%s}_{valid?fmt=%Y%m%d}_{fcst_lead?fmt=%s}.stat'
+    )
+    st.c_dict['FCST_VALID_HOUR_LIST'] = ['000000', '120000']
+    st.c_dict['FCST_LEAD_LIST'] = ['000000', '060000']
+    st.c_dict['LOOP_LIST_ITEMS'] = ['FCST_VALID_HOUR_LIST', 'MODEL_LIST',
+                                    'FCST_LEAD_LIST']
+    st.c_dict['MERGE_JOBS'] = merge_jobs
+    st.c_dict['DATE_BEG'] = '20190101'
+    st.c_dict['DATE_END'] = '20190101'
+    st.c_dict['DATE_TYPE'] = 'VALID'
+    st.config.set('config', 'DO_NOT_RUN_EXE', True)
+
+    assert st.run_stat_analysis()
+    assert len(st.all_commands) == expected_num_commands
+
+    jobs = []
+    for _, env in st.all_commands:
+        jobs_env = [item for item in env if item.startswith('METPLUS_JOBS=')]
+        jobs.extend(jobs_env[0].split('-job ')[1:])
+
+    # each job filters by the lead and valid hour it was created for
+    assert len(jobs) == 4
+    for lead in ['000000', '060000']:
+        for valid_hour in ['000000', '120000']:
+            dump_row = (f"{st.c_dict['OUTPUT_DIR']}/{valid_hour[0:2]}Z/"
+                        f'MODEL_TEST/MODEL_TEST_20190101_{lead}.stat')
+            expected_job = f'filter -dump_row {dump_row}'
+            if merge_jobs:
+                expected_job += (f' -fcst_lead {lead}'
+                                 f' -fcst_valid_hour {valid_hour}'
+                                 f' -fcst_valid_beg 20190101_{valid_hour}'
+                                 f' -fcst_valid_end 20190101_{valid_hour}')
+            assert any(job.startswith(expected_job) for job in jobs)
+
+    env = dict(item.split('=', 1) for item in st.all_commands[-1][1]
+               if '=' in item)
+    if merge_jobs:
+        assert env['METPLUS_FCST_LEAD'] == ''
+        assert env['METPLUS_FCST_VALID_HOUR'] == ''
+    else:
+        assert env['METPLUS_FCST_LEAD'] == 'fcst_lead = "060000";'
+        assert env['METPLUS_FCST_VALID_HOUR'] == 'fcst_valid_hour = ["120000"];'
+
+@pytest.mark.parametrize(
+    'merge_jobs, expected_num_commands, expected_num_running', [
+        (False, 4, [2, 2]),
+        (True, 2, [1, 1]),
+    ]
+)
+def test_run_stat_analysis_same_output_file(metplus_config, merge_jobs,
+                                            expected_num_commands,
+                                            expected_num_running):
+    st = stat_analysis_wrapper(metplus_config)
+    # dump_row file does not include the lead, so the jobs for each lead
+    # write the same file
+    st.c_dict['FCST_VALID_HOUR_LIST'] = ['000000', '120000']
+    st.c_dict['FCST_LEAD_LIST'] = ['000000', '060000']
+    st.c_dict['LOOP_LIST_ITEMS'] = ['FCST_VALID_HOUR_LIST', 'MODEL_LIST',
+                                    'FCST_LEAD_LIST']
+    st.c_dict['MERGE_JOBS'] = merge_jobs
+    st.c_dict['DATE_BEG'] = '20190101'
+    st.c_dict['DATE_END'] = '20190101'
+    st.c_dict['DATE_TYPE'] = 'VALID'
+    st.config.set('config', 'DO_NOT_RUN_EXE', True)
+
+    # record the number of commands that are running each time they finish
+    num_running = []
+    wait_for_commands = st.wait_for_commands
+    def record_wait():
+        num_running.append(len(st.queued_commands))
+        return wait_for_commands()
+    st.wait_for_commands = record_wait
+
+    assert st.run_stat_analysis()
+    assert len(st.all_commands) == expected_num_commands
+    assert num_running == expected_num_running
+
+    # a single call never writes the same file twice and the files are
+    # written in the same order with or without merging
+    dump_rows = []
+    for _, env in st.all_commands:
+        jobs_env = [item for item in env if item.startswith('METPLUS_JOBS=')]
+        command_files = [job.split()[2].rstrip('"];,')
+                         for job in jobs_env[0].split('-job ')[1:]]
+        assert len(command_files) == len(set(command_files))
+        dump_rows.extend(command_files)
+
+    assert dump_rows == [
+        f"{st.c_dict['OUTPUT_DIR']}/{valid_hour}Z/MODEL_TEST/"
+        'MODEL_TEST_20190101.stat'
+        for valid_hour in ['00', '12', '00', '12']
+    ]
@@ -4,6 +4,7 @@ import os
 import sys
 import re
 import csv
+import datetime
 import pytest
 
 import produtil
@@ -145,3 +146,57 @@ def test_filter_by_region_data(metplus_config):
     actual_num = len(filtered_by_region)
     assert actual_num == num_expected_wp_al
 
+
+
+@pytest.mark.parametrize(
+    'num_workers', [
+        1,
+        2,
+    ]
+)
+def test_reformat_files(metplus_config, tmp_path, num_workers):
+    # Test that the third column is removed even if its value is found in
+    # other columns and that files are only reformatted again if the input
+    # file or reformat settings change
+    deck_dir = str(tmp_path / 'deck')
+    reformat_dir = str(tmp_path / 'reformat')
+    os.makedirs(deck_dir)
+    deck_files = [os.path.join(deck_dir, f'deck{index}.dat')
+                  for index in range(3)]
+    for deck_file in deck_files:
+        with open(deck_file, 'w') as file_handle:
+            file_handle.write('EP,  0006, 03, 03, -99, 1500W\n\n'
+                              'EP,  0007, 12, 12,  12, -99\n')
+
+    rtcp = tc_pairs_wrapper(metplus_config)
+    rtcp.c_dict['ADECK_DIR'] = deck_dir
+    rtcp.c_dict['REFORMAT_DIR'] = reformat_dir
+    rtcp.c_dict['REFORMAT_WORKERS'] = num_workers
+    rtcp.c_dict['SKIP_REFORMAT'] = False
+    rtcp.c_dict['MISSING_VAL_TO_REPLACE'] = '-99'
+    rtcp.c_dict['MISSING_VAL'] = '-9999'
+    time_info = {'init': datetime.datetime(2014, 12, 14)}
+
+    outfiles = rtcp.reformat_files(deck_files, 'A', time_info)
+    assert outfiles == [deck_file.replace(deck_dir, reformat_dir)
+                        for deck_file in deck_files]
+    for outfile in outfiles:
+        with open(outfile, 'r') as file_handle:
+            assert file_handle.read() == ('EP, 120006, 03, -9999, 1500W\n'
+                                          'EP, 120007, 12,  12, -9999\n')
+    assert not [name for name in os.listdir(reformat_dir)
+                if name.endswith('.tmp')]
+
+    # not reformatted again if nothing changed
+    for outfile in outfiles:
+        os.utime(outfile, ns=(0, 0))
+    rtcp.reformat_files(deck_files, 'A', time_info)
+    assert all(os.stat(outfile).st_mtime_ns == 0 for outfile in outfiles)
+
+    # reformatted again if storm month changes
+    time_info = {'init': datetime.datetime(2015, 1, 14)}
+    rtcp.reformat_files(deck_files, 'A', time_info)
+    for outfile in outfiles:
+        assert os.stat(outfile).st_mtime_ns != 0
+        with open(outfile, 'r') as file_handle:
+            assert file_handle.readline() == 'EP, 010006, 03, -9999, 1500W\n'
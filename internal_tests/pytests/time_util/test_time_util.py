@@ -109,3 +109,50 @@ def test_ti_calculate(input_dict, expected_time_info):
     for key, value in expected_time_info.items():
         assert(time_info[key] == value)
         assert(time_info2[key] == value)
+
+@pytest.mark.parametrize(
+    'loop_by, input_dict', [
+        ('init', {}),
+        ('valid', {}),
+        ('init', {'now': datetime(2021, 1, 1, 12), 'instance': ''}),
+        ('valid', {'offset_hours': 2, 'custom': 'abc'}),
+        ('init', {'offset': -1800}),
+    ]
+)
+def test_ti_calculate_table(loop_by, input_dict):
+    times = [datetime(2019, 12, 31, 18), datetime(2020, 2, 28, 12),
+             datetime(2020, 3, 1)]
+    leads = [0, 3600, -3600, 90000, 86400 * 40,
+             relativedelta(hours=25),
+             relativedelta(minutes=30),
+             relativedelta(months=1),
+             '*',
+             ]
+    time_table = time_util.ti_calculate_grid(times, leads, loop_by=loop_by,
+                                             input_dict=input_dict)
+    assert(len(time_table) == len(times) * len(leads))
+
+    # each row should match output of ti_calculate
+    index = 0
+    for loop_time in times:
+        for lead in leads:
+            expected_input = input_dict.copy()
+            expected_input[loop_by] = loop_time
+            expected_input['lead'] = lead
+            expected_time_info = time_util.ti_calculate(expected_input)
+            time_info = time_table[index]
+            assert(time_info.copy() == expected_time_info)
+            assert(list(time_info.keys()) == list(expected_time_info.keys()))
+            index += 1
+
+def test_ti_calculate_table_time_info():
+    time_table = time_util.ti_calculate_table([datetime(2020, 1, 1)],
+                                              [3600])
+    time_info = time_table[0]
+    assert(time_info['valid_fmt'] == '20200101010000')
+    assert(time_info.get('level') is None)
+    time_info['level'] = 'P500'
+    assert(time_info.pop('level') == 'P500')
+    assert(dict(**time_info) == time_util.ti_calculate(
+        {'init': datetime(2020, 1, 1), 'lead': 3600}
+    ))
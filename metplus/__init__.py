@@ -19,6 +19,16 @@ def get_metplus_info(info_rel_path):
 __version__ = get_metplus_version()
 __release_date__ = get_metplus_release_date()
 
-# import util and wrappers
+# import util now and each wrapper the first time it is used
 from .util import *
-from .wrappers import *
+from . import wrappers
+
+def __getattr__(name):
+    """! Get wrapper classes, i.e. metplus.GridStatWrapper, from the wrappers
+         package, which imports the module of a wrapper when it is first used
+    """
+    try:
+        return getattr(wrappers, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute "
+                             f"{name!r}") from None
@@ -579,6 +579,14 @@ class METplusConfig(ProdConfig):
         # set interpolation to None so you can supply filename template
         # that contain % to config.set
         conf = ConfigParser(strict=False, inline_comment_prefixes=(';',), interpolation=None) if (conf is None) else conf
+
+        # cache of resolved values so repeated lookups do not need to
+        # resolve references to other variables again. The cache is cleared
+        # whenever the configuration is changed
+        self._value_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
         super().__init__(conf)
         self._cycle = None
         self._logger = logging.getLogger('metplus')
@@ -605,6 +613,111 @@ class METplusConfig(ProdConfig):
                 return logging.getLogger('metplus.'+sublog)
         return self._logger
 
+    def clear_cache(self):
+        """! Remove all resolved values from the cache. Called when any
+             configuration value is changed because other values may
+             reference it.
+        """
+        self._value_cache.clear()
+
+    def get_cache_info(self):
+        """! Get statistics of the resolved value cache
+             @returns dictionary with number of lookups that used a cached
+              value (hits), number that resolved the value (misses), number
+              of values in the cache (size), and fraction of lookups that used
+              a cached value (hit_rate)
+        """
+        total = self.cache_hits + self.cache_misses
+        return {'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'size': len(self._value_cache),
+                'hit_rate': self.cache_hits / total if total else 0.0,
+                }
+
+    def set(self, section, key, value):
+        """!Overrides method in ProdConfig to clear the resolved value cache"""
+        self.clear_cache()
+        super().set(section, key, value)
+
+    def set_options(self, section, **kwargs):
+        """!Overrides method in ProdConfig to clear the resolved value cache"""
+        self.clear_cache()
+        super().set_options(section, **kwargs)
+
+    def add_section(self, sec):
+        """!Overrides method in ProdConfig to clear the resolved value cache"""
+        self.clear_cache()
+        return super().add_section(sec)
+
+    def read(self, source):
+        """!Overrides method in ProdConfig to clear the resolved value cache"""
+        self.clear_cache()
+        return super().read(source)
+
+    def readfp(self, source):
+        """!Overrides method in ProdConfig to clear the resolved value cache"""
+        self.clear_cache()
+        return super().readfp(source)
+
+    def readstr(self, string):
+        """!Overrides method in ProdConfig to clear the resolved value cache"""
+        self.clear_cache()
+        return super().readstr(string)
+
+    def setcycle(self, cycle):
+        """!Overrides method in ProdConfig to clear the resolved value cache"""
+        self.clear_cache()
+        super().setcycle(cycle)
+
+    def _references_environment(self, sec, opt, depth=0):
+        """! Check if the value of a config variable or any variable it
+             references uses an environment variable. These values are not
+             cached because the environment can change.
+             @param sec section to look for variable
+             @param opt name of config variable
+             @param depth counter used to stop recursion
+             @returns True if an environment variable is referenced or if
+              references are nested too deeply to check
+        """
+        if depth >= 10:
+            return True
+
+        for section in (sec, 'config', 'dir'):
+            if self._conf.has_option(section, opt):
+                raw_value = self._conf.get(section, opt, raw=True)
+                break
+        else:
+            return False
+
+        if 'ENV' in raw_value:
+            return True
+
+        for var_name in re.findall(r'\{([^}{?]*)', raw_value):
+            if self._references_environment(sec, var_name.strip(), depth+1):
+                return True
+
+        return False
+
+    def _interp(self, sec, opt, morevars=None, taskvars=None):
+        """!Overrides method in ProdConfig that reads and resolves a value
+            for all of the get methods. Use the resolved value cache
+            unless additional variables are provided to resolve the value.
+        """
+        if morevars is not None or taskvars is not None:
+            return super()._interp(sec, opt, morevars=morevars,
+                                   taskvars=taskvars)
+
+        key = ('interp', sec, opt)
+        if key in self._value_cache:
+            self.cache_hits += 1
+            return self._value_cache[key]
+
+        self.cache_misses += 1
+        value = super()._interp(sec, opt)
+        if not self._references_environment(sec, opt):
+            self._value_cache[key] = value
+        return value
+
     def move_all_to_config_section(self):
         """! Move all configuration variables that are found in the
              previously supported sections into the config section.
@@ -620,6 +733,7 @@ class METplusConfig(ProdConfig):
                          super().getraw(section, key))
 
             self._conf.remove_section(section)
+            self.clear_cache()
 
     def find_section(self, sec, opt):
         """! Search through list of previously supported config sections
@@ -668,6 +782,14 @@ class METplusConfig(ProdConfig):
         if sec in self.OLD_SECTIONS:
             sec = 'config'
 
+        key = ('raw', sec, opt, default)
+        if count == 0 and key in self._value_cache:
+            self.cache_hits += 1
+            return self._value_cache[key]
+
+        if count == 0:
+            self.cache_misses += 1
+
         in_template = super().getraw(sec, opt, '')
         # if default is set but variable was not, set variable to default value
         if not in_template and default:
@@ -696,7 +818,10 @@ class METplusConfig(ProdConfig):
         # when they encounter double slash. This is a GitHub issue MET #1277
         # This fix will prevent using URLs with https:// so the MET issue must
         # be resolved before we can remove the replace call
-        return in_template.replace('//', '/')
+        value = in_template.replace('//', '/')
+        if count == 0 and not self._references_environment(sec, opt):
+            self._value_cache[key] = value
+        return value
 
     def check_default(self, sec, name, default):
         """!helper function for get methods, report error and raise NoOptionError if
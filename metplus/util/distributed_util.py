@@ -0,0 +1,401 @@
+"""
+Program Name: distributed_util.py
+Contact(s): George McCabe
+Abstract: Distribute run times across MPI ranks on multiple nodes
+History Log:  Initial version
+Usage: Call run_times_distributed from loop_over_times_and_call, or run
+ python3 -m metplus.util.distributed_util HOST PORT CONF to start a worker
+Parameters: None
+Input Files: Configuration file written by rank 0
+Output Files: N/A
+"""
+
+import os
+import sys
+import socket
+import secrets
+import importlib
+import threading
+import traceback
+from collections import deque
+from multiprocessing.connection import Listener, Client
+
+import produtil.run
+
+from . import met_util
+from . import config_metplus
+
+'''!@namespace DistributedUtil
+@brief Runs the run times of a METplus run on worker ranks that are launched
+ with produtil, i.e. with srun on a cluster allocation. Rank 0 is the
+ process that runs run_metplus.py. It writes the configuration to a file,
+ launches the worker ranks, and sends each worker a run time to process
+ when the worker is ready for more work. Each worker reads the
+ configuration, creates the wrappers, processes the run time with the
+ normal wrapper code, and sends the commands that were run and the errors
+ that occurred back to rank 0. The workers connect to rank 0 over TCP with
+ a random authentication key, so the workers do not need an MPI library.
+ Nothing is distributed unless METPLUS_DISTRIBUTED_RANKS is set.
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used in other METplus wrappers
+@endcode
+'''
+
+# environment variable used to pass the authentication key to the workers
+AUTHKEY_ENV_VAR = 'METPLUS_DISTRIBUTED_AUTHKEY'
+
+# launchers that can be used to start the worker ranks
+LAUNCHERS = ('MPI', 'LOCAL')
+
+
+def get_distributed_ranks(config):
+    """! Read METPLUS_DISTRIBUTED_RANKS to determine how many worker ranks
+         should process run times
+
+         @param config METplusConfig object
+         @returns number of worker ranks, 0 if run times should not be
+          distributed
+    """
+    num_ranks = config.getint('config', 'METPLUS_DISTRIBUTED_RANKS', 0)
+    if num_ranks is None or num_ranks < 0:
+        config.logger.warning('METPLUS_DISTRIBUTED_RANKS must be a '
+                              'non-negative integer. Not distributing '
+                              'run times')
+        return 0
+    return num_ranks
+
+
+def get_process_key(process):
+    """! Get information needed to create a wrapper in a worker
+
+         @param process CommandBuilder subclass object
+         @returns tuple of module name, class name, and instance name
+    """
+    return (process.__class__.__module__, process.__class__.__name__,
+            process.instance)
+
+
+def create_process(config, process_key):
+    """! Create a wrapper from the information returned by get_process_key
+
+         @param config METplusConfig object
+         @param process_key tuple of module name, class name, and instance
+         @returns CommandBuilder subclass object
+    """
+    module_name, class_name, instance = process_key
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)(config, instance=instance)
+
+
+def write_worker_config(config):
+    """! Write the configuration to a file that the workers read so that
+         they use the same settings as rank 0
+
+         @param config METplusConfig object
+         @returns path to configuration file
+    """
+    log_timestamp = config.getstr('config', 'LOG_TIMESTAMP')
+    conf_path = os.path.join(config.getdir('LOG_DIR'),
+                             f'.metplus_distributed.{log_timestamp}.conf')
+    with open(conf_path, 'wt') as file_handle:
+        config.write(file_handle)
+    return conf_path
+
+
+def load_worker_config(conf_path):
+    """! Read the configuration written by write_worker_config and set up
+         logging to the same log file as rank 0
+
+         @param conf_path path to configuration file
+         @returns METplusConfig object
+    """
+    config = config_metplus.load(conf_path)
+    log_timestamp = config.getstr('config', 'LOG_TIMESTAMP')
+    config_metplus.get_logger(config)
+
+    # use time stamp of rank 0 instead of the time the worker started
+    config.set('config', 'LOG_TIMESTAMP', log_timestamp)
+    return config
+
+
+def get_worker_runners(config, launcher, num_ranks, address, conf_path,
+                       authkey):
+    """! Get produtil Runner objects that start the worker ranks
+
+         @param config METplusConfig object
+         @param launcher MPI to start the ranks with the MPI launcher
+          detected by produtil, or LOCAL to start each rank as a process on
+          this node
+         @param num_ranks number of worker ranks to start
+         @param address tuple of host name and port of rank 0
+         @param conf_path path to configuration file for the workers
+         @param authkey authentication key that workers use to connect
+         @returns list of produtil.prog.Runner objects to run at the same time
+          or None if the ranks cannot be launched
+    """
+    host, port = address
+    worker = produtil.run.exe(sys.executable)[
+        '-m', __name__, host, str(port), conf_path
+    ]
+    env = {AUTHKEY_ENV_VAR: authkey.hex()}
+
+    # workers import metplus from the same location as rank 0
+    metplus_base = config.getdir('METPLUS_BASE')
+    python_path = os.environ.get('PYTHONPATH')
+    env['PYTHONPATH'] = (f'{metplus_base}:{python_path}' if python_path
+                         else metplus_base)
+
+    if launcher == 'LOCAL':
+        return [worker.env(**env) for _ in range(num_ranks)]
+
+    mpiimpl = produtil.run.detect_mpi()
+    if not mpiimpl.can_run_mpi():
+        config.logger.warning('Could not find an MPI implementation to '
+                              'launch METPLUS_DISTRIBUTED_RANKS worker ranks. '
+                              'Set METPLUS_DISTRIBUTED_LAUNCHER to LOCAL to '
+                              'run the workers on this node')
+        return None
+
+    ranks = produtil.run.mpiserial(worker) * num_ranks
+    return [produtil.run.mpirun(ranks, mpiimpl=mpiimpl).env(**env)]
+
+
+class RunTimeDispatcher:
+    """! Sends run times to workers as they request them and keeps the
+         results that they send back
+    """
+    def __init__(self, config, processes, loop_times, use_init):
+        """! @param config METplusConfig object
+             @param processes list of CommandBuilder subclass objects to call
+             @param loop_times list of datetime objects of each run time
+             @param use_init True if looping by init, False if by valid
+        """
+        self.logger = config.logger
+        self.process_keys = [get_process_key(process)
+                             for process in processes]
+        self.loop_times = loop_times
+        self.use_init = use_init
+
+        self._lock = threading.Lock()
+        self._pending = deque(range(len(loop_times)))
+        # key is run time index, value is result from _run_time_in_worker
+        self.results = {}
+
+    def next_run_time(self):
+        """! Get the next run time that has not been sent to a worker
+
+             @returns index of run time or None if all have been sent
+        """
+        with self._lock:
+            return self._pending.popleft() if self._pending else None
+
+    def serve(self, connection):
+        """! Send run times to a worker until there are none left. Run times
+             that the worker fails to process are not retried here.
+
+             @param connection multiprocessing Connection to worker
+        """
+        try:
+            while True:
+                index = self.next_run_time()
+                if index is None:
+                    connection.send(('stop',))
+                    break
+
+                connection.send(('run', index, self.loop_times[index],
+                                 self.process_keys, self.use_init))
+                message = connection.recv()
+                if message[0] == 'done':
+                    with self._lock:
+                        self.results[index] = message[2]
+                    continue
+
+                self.logger.warning("Worker could not process run time "
+                                    f"{self.loop_times[index]}: "
+                                    f"{message[2]}")
+        except (EOFError, OSError) as err:
+            self.logger.warning(f"Lost connection to worker: {err}")
+        finally:
+            connection.close()
+
+
+def run_times_distributed(config, processes, loop_times, use_init,
+                          num_ranks):
+    """! Process run times on worker ranks. The commands run by each worker
+    are merged in run time order so the all_commands file is the same
+    regardless of where the run times were processed. Run times that were
+    not processed by a worker, i.e. because a worker failed, are processed
+    in this process after the workers finish. If the worker ranks cannot be
+    launched, nothing is run and None is returned so that the caller can
+    process the run times on this node instead.
+
+    @param config METplusConfig object
+    @param processes list of CommandBuilder subclass objects (Wrappers) to call
+    @param loop_times list of datetime objects of each run time
+    @param use_init True if looping by init, False if looping by valid
+    @param num_ranks number of worker ranks to launch
+    @returns list of tuples with all commands run and the environment variables
+    that were set for each or None if the worker ranks could not be launched
+    """
+    launcher = config.getstr('config', 'METPLUS_DISTRIBUTED_LAUNCHER',
+                             'MPI').upper()
+    if launcher not in LAUNCHERS:
+        config.logger.warning(f"Invalid METPLUS_DISTRIBUTED_LAUNCHER: "
+                              f"{launcher}. Options are "
+                              f"{', '.join(LAUNCHERS)}")
+        return None
+
+    num_ranks = min(num_ranks, len(loop_times))
+    host = config.getstr('config', 'METPLUS_DISTRIBUTED_HOST',
+                         socket.gethostname())
+    authkey = secrets.token_bytes(32)
+    conf_path = write_worker_config(config)
+    dispatcher = RunTimeDispatcher(config, processes, loop_times, use_init)
+
+    try:
+        with Listener(('', 0), authkey=authkey) as listener:
+            port = listener.address[1]
+            runners = get_worker_runners(config, launcher, num_ranks,
+                                         (host, port), conf_path, authkey)
+            if runners is None:
+                return None
+
+            config.logger.info(f"Processing {len(loop_times)} run times "
+                               f"using {num_ranks} {launcher} worker ranks "
+                               f"that connect to {host}:{port}")
+
+            stopping = threading.Event()
+            handlers = []
+
+            def accept_workers():
+                while True:
+                    try:
+                        connection = listener.accept()
+                    except OSError as err:
+                        if stopping.is_set():
+                            return
+                        config.logger.warning("Worker could not connect: "
+                                              f"{err}")
+                        continue
+                    if stopping.is_set():
+                        connection.close()
+                        return
+                    handler = threading.Thread(target=dispatcher.serve,
+                                               args=(connection,),
+                                               daemon=True)
+                    handler.start()
+                    handlers.append(handler)
+
+            accept_thread = threading.Thread(target=accept_workers,
+                                             daemon=True)
+            accept_thread.start()
+
+            launch_threads = [
+                threading.Thread(target=produtil.run.run, args=(runner,),
+                                 kwargs={'logger': config.logger},
+                                 daemon=True)
+                for runner in runners
+            ]
+            for launch_thread in launch_threads:
+                launch_thread.start()
+
+            # workers exit after all run times have been sent
+            for launch_thread in launch_threads:
+                launch_thread.join()
+
+            # connect to wake up accept so it can stop
+            stopping.set()
+            try:
+                Client(('localhost', port), authkey=authkey).close()
+            except OSError:
+                pass
+            accept_thread.join()
+            for handler in handlers:
+                handler.join()
+    finally:
+        try:
+            os.remove(conf_path)
+        except OSError:
+            pass
+
+    all_commands = []
+    for index, loop_time in enumerate(loop_times):
+        result = dispatcher.results.get(index)
+        if result is None:
+            config.logger.warning(f"Processing run time {loop_time} on rank "
+                                  "0 because it was not processed by a "
+                                  "worker")
+            all_commands.extend(
+                met_util.run_processes_at_time(config, processes, loop_time,
+                                               use_init)
+            )
+            continue
+
+        all_commands.extend(
+            met_util.merge_run_time_results(config, processes, [result])
+        )
+
+    return all_commands
+
+
+def run_worker(config, connection):
+    """! Process run times that are sent by rank 0 until it sends stop
+
+         @param config METplusConfig object
+         @param connection multiprocessing Connection to rank 0
+    """
+    # key is tuple from get_process_key, value is wrapper object
+    wrappers = {}
+    current_keys = None
+    while True:
+        message = connection.recv()
+        if message[0] == 'stop':
+            break
+
+        _, index, loop_time, process_keys, use_init = message
+        try:
+            for process_key in process_keys:
+                if process_key not in wrappers:
+                    wrappers[process_key] = create_process(config,
+                                                           process_key)
+
+            # set the wrappers that are called when they change
+            if process_keys != current_keys:
+                met_util._init_parallel_worker(
+                    config,
+                    [wrappers[process_key] for process_key in process_keys],
+                    use_init
+                )
+                current_keys = process_keys
+
+            result = met_util._run_time_in_worker(loop_time)
+        except Exception:
+            config.logger.exception(f"Could not process run time {loop_time}")
+            connection.send(('failed', index, traceback.format_exc()))
+            continue
+
+        connection.send(('done', index, result))
+
+
+def main(argv):
+    """! Start a worker rank that connects to rank 0
+
+         @param argv list of command line arguments: host and port of rank 0
+          and path to configuration file
+         @returns exit code
+    """
+    if len(argv) != 4:
+        print(f"Usage: {argv[0]} HOST PORT CONF", file=sys.stderr)
+        return 2
+
+    _, host, port, conf_path = argv
+    authkey = bytes.fromhex(os.environ[AUTHKEY_ENV_VAR])
+    config = load_worker_config(conf_path)
+    with Client((host, int(port)), authkey=authkey) as connection:
+        run_worker(config, connection)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
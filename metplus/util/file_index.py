@@ -0,0 +1,399 @@
+"""
+Program Name: file_index.py
+Contact(s): George McCabe
+Abstract: In-memory index of input directory listings
+History Log:  Initial version
+Usage: Call get_file_index to obtain the index if it is enabled
+Parameters: None
+Input Files: N/A
+Output Files: N/A
+"""
+
+import os
+import time
+import fnmatch
+import itertools
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from .met_util import get_time_from_file
+
+'''!@namespace FileIndex
+@brief Caches directory listings so that repeated searches for input files
+ do not query the filesystem for every file that is checked. Each directory
+ is read once and is read again only if its modification time changes.
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used in other METplus wrappers
+@endcode
+'''
+
+# number of seconds before the time a directory was read that its
+# modification time must be to trust the listing. Filesystems that store
+# modification times with a coarse resolution can report the same time for
+# a directory before and after a file is added if both occur within the same
+# second, so listings read shortly after a change are read again on next use
+MTIME_SETTLE_SECONDS = 2
+
+WILDCARD_CHARS = ('*', '?', '[')
+
+
+class DirectoryIndex:
+    """! Cache of directory listings keyed by absolute directory path.
+         Listings are read with os.scandir on first use and reused until the
+         modification time of the directory changes.
+    """
+    def __init__(self):
+        # key is directory path, value is tuple of (mtime_ns, read_time,
+        # set of file names, set of subdirectory names, set of subdirectory
+        # names that are symbolic links, version)
+        self._listings = {}
+        self._lock = threading.Lock()
+
+        # number that is incremented each time a directory is read
+        self._versions = itertools.count()
+
+        # key is tuple of directory and template, value is ValidTimeIndex
+        self._valid_time_indices = {}
+
+        # number that is incremented when a wrapper starts a run time so
+        # that directory trees are checked for changes once per run time
+        self._run_time_count = 0
+
+    def clear(self):
+        """! Remove all cached directory listings """
+        with self._lock:
+            self._listings.clear()
+            self._valid_time_indices.clear()
+
+    def start_run_time(self):
+        """! Note that a wrapper is starting to process a run time. The
+             directory trees of valid time indices are checked for changes
+             the first time each index is used after this is called instead
+             of each time a file is searched for, since checking a tree
+             reads the modification time of every directory under it.
+        """
+        with self._lock:
+            self._run_time_count += 1
+
+    def _read_dir(self, dirpath):
+        """! Read contents of directory and store the listing
+
+             @param dirpath directory to read
+             @returns tuple of (set of file names, set of subdirectory names)
+              or None if the directory does not exist
+        """
+        try:
+            mtime = os.stat(dirpath).st_mtime_ns
+            read_time = time.time()
+            files = set()
+            subdirs = set()
+            links = set()
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            subdirs.add(entry.name)
+                            if entry.is_symlink():
+                                links.add(entry.name)
+                        else:
+                            files.add(entry.name)
+                    except OSError:
+                        continue
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            with self._lock:
+                self._listings.pop(dirpath, None)
+            return None
+
+        with self._lock:
+            self._listings[dirpath] = (mtime, read_time, files, subdirs,
+                                       links, next(self._versions))
+        return files, subdirs
+
+    def listdir(self, dirpath):
+        """! Get the files and subdirectories of a directory, reading the
+             directory only if it has not been read or has changed since it
+             was last read.
+
+             @param dirpath directory to list
+             @returns tuple of (set of file names, set of subdirectory names)
+              or None if the directory does not exist
+        """
+        dirpath = os.path.abspath(dirpath)
+        with self._lock:
+            cached = self._listings.get(dirpath)
+
+        if cached is None:
+            return self._read_dir(dirpath)
+
+        mtime, read_time, files, subdirs, _, _ = cached
+        try:
+            current_mtime = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            with self._lock:
+                self._listings.pop(dirpath, None)
+            return None
+
+        if (current_mtime != mtime or
+                mtime / 1e9 > read_time - MTIME_SETTLE_SECONDS):
+            return self._read_dir(dirpath)
+
+        return files, subdirs
+
+    def isfile(self, path):
+        """! Check if file exists using the cached listing of its directory
+
+             @param path file path to check
+             @returns True if file exists, False if not
+        """
+        listing = self.listdir(os.path.dirname(os.path.abspath(path)))
+        if listing is None:
+            return False
+        return os.path.basename(path) in listing[0]
+
+    def isdir(self, path):
+        """! Check if directory exists using the cached listing of its parent
+
+             @param path directory path to check
+             @returns True if directory exists, False if not
+        """
+        path = os.path.abspath(path)
+        if path == os.path.dirname(path):
+            return os.path.isdir(path)
+        listing = self.listdir(os.path.dirname(path))
+        if listing is None:
+            return False
+        return os.path.basename(path) in listing[1]
+
+    def glob(self, pattern):
+        """! Find paths that match a wildcard expression. Behaves like
+             glob.glob for absolute and relative patterns but reads each
+             directory from the index.
+
+             @param pattern path that may contain *, ?, or [] wildcards
+             @returns list of matching paths (unsorted)
+        """
+        if not any(char in pattern for char in WILDCARD_CHARS):
+            if self.isfile(pattern) or self.isdir(pattern):
+                return [pattern]
+            return []
+
+        components = pattern.split(os.path.sep)
+        if os.path.isabs(pattern):
+            paths = [os.path.sep]
+            components = components[1:]
+        else:
+            paths = ['']
+
+        for index, component in enumerate(components):
+            if not component:
+                continue
+            is_last = index == len(components) - 1
+            next_paths = []
+            for base in paths:
+                if not any(char in component for char in WILDCARD_CHARS):
+                    candidate = os.path.join(base, component)
+                    if is_last:
+                        if self.isfile(candidate) or self.isdir(candidate):
+                            next_paths.append(candidate)
+                    else:
+                        next_paths.append(candidate)
+                    continue
+
+                listing = self.listdir(base or os.curdir)
+                if listing is None:
+                    continue
+                files, subdirs = listing
+                names = files | subdirs if is_last else subdirs
+                # hidden files only match if pattern starts with a dot
+                if not component.startswith('.'):
+                    names = [name for name in names
+                             if not name.startswith('.')]
+                for name in fnmatch.filter(names, component):
+                    next_paths.append(os.path.join(base, name))
+            paths = next_paths
+
+        return paths
+
+    def get_real_subdirs(self, dirpath):
+        """! Get the subdirectories of a directory that are not symbolic
+             links. Like os.walk, links to directories are listed but are
+             not followed so that a link to a parent directory does not
+             cause an infinite loop.
+
+             @param dirpath directory to list
+             @returns list of subdirectory names or None if the directory
+              does not exist
+        """
+        dirpath = os.path.abspath(dirpath)
+        listing = self.listdir(dirpath)
+        if listing is None:
+            return None
+        with self._lock:
+            cached = self._listings.get(dirpath)
+        links = cached[4] if cached else set()
+        return [subdir for subdir in listing[1] if subdir not in links]
+
+    def walk(self, top):
+        """! Generate directory tree like os.walk using the index. Symbolic
+             links to directories are not followed, like os.walk.
+
+             @param top directory to walk
+             @returns generator of (dirpath, list of subdirectories,
+              list of files)
+        """
+        listing = self.listdir(top)
+        if listing is None:
+            return
+        files, subdirs = listing
+        yield top, sorted(subdirs), sorted(files)
+        for subdir in sorted(self.get_real_subdirs(top) or []):
+            yield from self.walk(os.path.join(top, subdir))
+
+    def get_tree_version(self, top):
+        """! Get a value that changes if any directory under top is read
+             again because it was modified
+
+             @param top directory to check
+             @returns tuple of version numbers for each directory
+        """
+        versions = []
+        dirs_to_check = [os.path.abspath(top)]
+        while dirs_to_check:
+            dirpath = dirs_to_check.pop()
+            listing = self.listdir(dirpath)
+            if listing is None:
+                continue
+            with self._lock:
+                cached = self._listings.get(dirpath)
+            versions.append(cached[5] if cached else None)
+            links = cached[4] if cached else set()
+            dirs_to_check.extend(os.path.join(dirpath, subdir)
+                                 for subdir in listing[1]
+                                 if subdir not in links)
+        return tuple(versions)
+
+    def get_valid_time_index(self, data_dir, template, logger=None):
+        """! Get index of the valid times of files under a directory that
+             match a template. The directories under data_dir are checked for
+             changes the first time the index is used in each run time (see
+             start_run_time) and the index is built again only if a
+             directory has changed since it was built.
+
+             @param data_dir directory to search
+             @param template filename template relative to data_dir
+             @param logger (optional) logger to output debug information
+             @returns ValidTimeIndex object
+        """
+        key = (os.path.abspath(data_dir), template)
+        with self._lock:
+            valid_time_index = self._valid_time_indices.get(key)
+            run_time_count = self._run_time_count
+
+        if valid_time_index is not None:
+            if valid_time_index.run_time_count == run_time_count:
+                return valid_time_index
+
+            tree_version = self.get_tree_version(data_dir)
+            if valid_time_index.tree_version == tree_version:
+                valid_time_index.run_time_count = run_time_count
+                return valid_time_index
+        else:
+            tree_version = self.get_tree_version(data_dir)
+
+        valid_time_index = ValidTimeIndex(
+            get_file_valid_times(self.walk(data_dir), data_dir, template,
+                                 logger),
+            tree_version
+        )
+        valid_time_index.run_time_count = run_time_count
+        with self._lock:
+            self._valid_time_indices[key] = valid_time_index
+        return valid_time_index
+
+
+class ValidTimeIndex:
+    """! Files that match a template sorted by valid time so that the files
+         within a time window can be found with a binary search
+    """
+    def __init__(self, file_valid_times, tree_version=None):
+        """! @param file_valid_times list of tuples containing valid time in
+              seconds and file path in the order the files were found
+             @param tree_version version of directory tree that was read
+        """
+        self.tree_version = tree_version
+        # value of DirectoryIndex run time count when the tree was checked
+        self.run_time_count = None
+        # sort by valid time, then by the order that files were found
+        self.entries = sorted(
+            (valid_seconds, order, fullpath)
+            for order, (valid_seconds, fullpath) in enumerate(file_valid_times)
+        )
+        self.valid_times = [entry[0] for entry in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def find(self, lower_limit, upper_limit):
+        """! Get files with valid times within range (inclusive)
+
+             @param lower_limit earliest valid time in seconds
+             @param upper_limit latest valid time in seconds
+             @returns list of tuples containing valid time in seconds and
+              file path in the order that the files were found
+        """
+        start = bisect_left(self.valid_times, lower_limit)
+        end = bisect_right(self.valid_times, upper_limit)
+        entries = sorted(self.entries[start:end], key=lambda entry: entry[1])
+        return [(valid_seconds, fullpath)
+                for valid_seconds, _, fullpath in entries]
+
+
+def get_file_valid_times(walk, data_dir, template, logger=None):
+    """! Extract valid time from each file found in a directory tree
+
+         @param walk generator of (dirpath, subdirectories, files) tuples
+          like os.walk
+         @param data_dir top directory that was walked
+         @param template filename template relative to data_dir
+         @param logger (optional) logger to output debug information
+         @returns generator of tuples containing valid time in seconds and
+          full path of each file that matches the template
+    """
+    for dirpath, _, all_files in walk:
+        for filename in sorted(all_files):
+            fullpath = os.path.join(dirpath, filename)
+
+            # remove input data directory to get relative path
+            rel_path = fullpath.replace(f'{data_dir}/', "")
+            # extract time information from relative path using template
+            file_time_info = get_time_from_file(rel_path, template, logger)
+            if file_time_info is None:
+                continue
+
+            # get valid time and check if it is within the time range
+            file_valid_time = file_time_info['valid'].strftime("%Y%m%d%H%M%S")
+            # skip if could not extract valid time
+            if not file_valid_time:
+                continue
+            file_valid_dt = datetime.strptime(file_valid_time, "%Y%m%d%H%M%S")
+            yield int(file_valid_dt.strftime("%s")), fullpath
+
+
+# index shared by all wrappers in the run
+_FILE_INDEX = DirectoryIndex()
+
+
+def get_file_index(config):
+    """! Get the directory index if it is enabled by the
+         METPLUS_INPUT_DIR_INDEX configuration variable
+
+         @param config METplusConfig object
+         @returns DirectoryIndex object or None if the index is not enabled
+    """
+    if config is None:
+        return None
+    if not config.getbool('config', 'METPLUS_INPUT_DIR_INDEX', False):
+        return None
+    return _FILE_INDEX
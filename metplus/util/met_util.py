@@ -9,9 +9,13 @@ import calendar
 import re
 import gzip
 import bz2
+import zlib
 import zipfile
 import struct
 import getpass
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from os import stat
 from pwd import getpwuid
 from csv import reader
@@ -28,6 +32,9 @@ from .string_template_substitution import parse_template
 from .string_template_substitution import get_tags
 from . import time_util as time_util
 from .doc_util import get_wrapper_name
+from .profile_util import get_run_profile, init_run_profile
+from .profile_util import write_profile_report, get_process_name
+from .result_cache import get_result_cache, log_result_cache_summary
 
 from .. import get_metplus_version
 
@@ -38,6 +45,9 @@ from .. import get_metplus_version
 # list of compression extensions that are handled by METplus
 VALID_EXTENSIONS = ['.gz', '.bz2', '.zip']
 
+# number of bytes to read at a time when uncompressing files
+UNCOMPRESS_CHUNK_SIZE = 4 * 1024 * 1024
+
 PYTHON_EMBEDDING_TYPES = ['PYTHON_NUMPY', 'PYTHON_XARRAY', 'PYTHON_PANDAS']
 
 valid_comparisons = {">=": "ge",
@@ -113,6 +123,12 @@ def pre_run_setup(config_inputs):
 
 def run_metplus(config, process_list):
     total_errors = 0
+    profile = init_run_profile(config)
+
+    # reset result cache counts from any previous run
+    result_cache = get_result_cache(config)
+    if result_cache:
+        result_cache.pop_stats()
 
     try:
         processes = []
@@ -156,7 +172,8 @@ def run_metplus(config, process_list):
         if loop_order == "processes":
             all_commands = []
             for process in processes:
-                new_commands = process.run_all_times()
+                with profile.context(wrapper=get_process_name(process)):
+                    new_commands = process.run_all_times()
                 if new_commands:
                     all_commands.extend(new_commands)
 
@@ -170,6 +187,12 @@ def run_metplus(config, process_list):
         # write out all commands and environment variables to file
         write_all_commands(all_commands, config)
 
+        # write time spent in each stage of the run if requested
+        write_profile_report(config)
+
+        # log how many commands used output from the result cache
+        log_result_cache_summary(config)
+
        # compute total number of errors that occurred and output results
         for process in processes:
             if process.errors != 0:
@@ -206,6 +229,11 @@ def post_run_cleanup(config, app_name, total_errors):
     total_run_time = end_clock_time - start_clock_time
     logger.debug(f"{app_name} took {total_run_time} to run.")
 
+    cache_info = config.get_cache_info()
+    logger.debug(f"Config lookups: {cache_info['hits']} cached, "
+                 f"{cache_info['misses']} resolved "
+                 f"({cache_info['hit_rate']:.1%} cached)")
+
     log_message = f"Check the log file for more information: {config.getstr('config', 'LOG_METPLUS')}"
     if total_errors == 0:
         logger.info(log_message)
@@ -958,7 +986,15 @@ def get_start_end_interval_times(config, warn=False):
     return start_time, end_time, time_interval
 
 def loop_over_times_and_call(config, processes):
-    """! Loop over all run times and call wrappers listed in config
+    """! Loop over all run times and call wrappers listed in config.
+    If METPLUS_DISTRIBUTED_RANKS is greater than 0, the run times are sent
+    to worker ranks that may run on other nodes, or processed on this node
+    if the ranks cannot be launched. If METPLUS_PARALLEL_WORKERS
+    is greater than 1, the run times are split across a pool of worker
+    processes. Each rank or worker runs every wrapper in processes for a
+    single run time. Otherwise, if METPLUS_PREFETCH_RUN_TIMES
+    is set, the input files of the next run times are staged in the
+    background while each run time is processed.
 
     @param config METplusConfig object
     @param processes list of CommandBuilder subclass objects (Wrappers) to call
@@ -975,28 +1011,217 @@ def loop_over_times_and_call(config, processes):
         config.logger.error("Could not get [INIT/VALID] time information from configuration file")
         return None
 
+    if not isinstance(processes, list):
+        processes = [processes]
+
+    # get list of all run times so they can be distributed to workers
+    loop_times = []
+    while loop_time <= end_time:
+        loop_times.append(loop_time)
+        loop_time += time_interval
+
+    # distributed_util is imported here because it imports this module
+    from .distributed_util import get_distributed_ranks, run_times_distributed
+    num_ranks = get_distributed_ranks(config)
+    if num_ranks > 0:
+        all_commands = run_times_distributed(config, processes, loop_times,
+                                             use_init, num_ranks)
+        if all_commands is not None:
+            return all_commands
+
+        config.logger.warning("Could not launch worker ranks. Processing "
+                              "run times on this node")
+
+    num_workers = get_parallel_workers(config)
+    if num_workers > 1 and len(loop_times) > 1:
+        return run_times_in_parallel(config, processes, loop_times, use_init,
+                                     num_workers)
+
+    # stage input files for upcoming run times in the background if enabled
+    # prefetch_util is imported here because it imports this module
+    from .prefetch_util import get_run_time_prefetcher
+    prefetcher = get_run_time_prefetcher(config, processes, loop_times,
+                                         use_init)
+
     # keep track of commands that were run
     all_commands = []
-    while loop_time <= end_time:
-        log_runtime_banner(loop_time, config, use_init)
-        if not isinstance(processes, list):
-            processes = [processes]
-        for process in processes:
-            input_dict = set_input_dict(loop_time,
-                                        config,
-                                        use_init,
-                                        instance=process.instance)
+    try:
+        for index, loop_time in enumerate(loop_times):
+            if prefetcher:
+                prefetcher.start_run_time(index)
+            all_commands.extend(run_processes_at_time(config, processes,
+                                                      loop_time, use_init))
+            if prefetcher:
+                prefetcher.finish_run_time(index)
+    finally:
+        if prefetcher:
+            prefetcher.shutdown()
+
+    return all_commands
+
+def run_processes_at_time(config, processes, loop_time, use_init):
+    """! Call each wrapper for a single run time
 
-            process.clear()
+    @param config METplusConfig object
+    @param processes list of CommandBuilder subclass objects (Wrappers) to call
+    @param loop_time datetime object of current run time
+    @param use_init True if looping by init, False if looping by valid
+    @returns list of tuples with all commands run and the environment variables
+    that were set for each
+    """
+    all_commands = []
+    log_runtime_banner(loop_time, config, use_init)
+    for process in processes:
+        input_dict = set_input_dict(loop_time,
+                                    config,
+                                    use_init,
+                                    instance=process.instance)
+
+        process.clear()
+        if process.file_index:
+            process.file_index.start_run_time()
+        with get_run_profile().context(get_process_name(process), loop_time):
             process.run_at_time(input_dict)
-            if process.all_commands:
-                all_commands.extend(process.all_commands)
-            process.all_commands.clear()
+        if process.all_commands:
+            all_commands.extend(process.all_commands)
+        process.all_commands.clear()
 
-        loop_time += time_interval
+    return all_commands
+
+def get_parallel_workers(config):
+    """! Read METPLUS_PARALLEL_WORKERS to determine how many run times can be
+    processed at once. Parallel processing requires the fork start method,
+    so a single worker is used if it is not available on this platform.
+
+    @param config METplusConfig object
+    @returns number of worker processes to use, 1 if run times should be
+     processed serially
+    """
+    num_workers = config.getint('config', 'METPLUS_PARALLEL_WORKERS', 1)
+    if num_workers is None or num_workers < 1:
+        config.logger.warning('METPLUS_PARALLEL_WORKERS must be a positive '
+                              'integer. Processing run times serially')
+        return 1
+
+    if (num_workers > 1 and
+            'fork' not in multiprocessing.get_all_start_methods()):
+        config.logger.warning('Cannot process run times in parallel on this '
+                              'platform. Processing run times serially')
+        return 1
+
+    return num_workers
+
+def run_times_in_parallel(config, processes, loop_times, use_init,
+                          num_workers):
+    """! Process run times in a pool of worker processes. Each worker is
+    forked from the current process, so it gets its own copy of every
+    wrapper, including its own all_commands list and error count. The
+    commands run by each worker are merged in run time order so the
+    all_commands file is the same regardless of the order that the run
+    times finish.
+
+    @param config METplusConfig object
+    @param processes list of CommandBuilder subclass objects (Wrappers) to call
+    @param loop_times list of datetime objects of each run time
+    @param use_init True if looping by init, False if looping by valid
+    @param num_workers number of worker processes to use
+    @returns list of tuples with all commands run and the environment variables
+    that were set for each
+    """
+    num_workers = min(num_workers, len(loop_times))
+    config.logger.info(f"Processing {len(loop_times)} run times using "
+                       f"{num_workers} parallel workers")
+
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             mp_context=multiprocessing.get_context('fork'),
+                             initializer=_init_parallel_worker,
+                             initargs=(config, processes, use_init)) as pool:
+        # map returns results in the order of the run times
+        return merge_run_time_results(config, processes,
+                                      pool.map(_run_time_in_worker,
+                                               loop_times))
+
+def merge_run_time_results(config, processes, results):
+    """! Combine the results of run times that were processed in other
+    processes. The errors that occurred are added to the wrapper objects and
+    the times and counts are added to the run profile and result cache.
+
+    @param config METplusConfig object
+    @param processes list of CommandBuilder subclass objects (Wrappers) that
+     were called
+    @param results iterable of tuples returned by _run_time_in_worker in
+     the order of the run times
+    @returns list of tuples with all commands run and the environment variables
+    that were set for each
+    """
+    result_cache = get_result_cache(config)
+    all_commands = []
+    for commands, errors, profile_records, cache_stats in results:
+        all_commands.extend(commands)
+        get_run_profile().merge_records(profile_records)
+        if result_cache:
+            result_cache.merge_stats(cache_stats)
+
+        # add errors that occurred in the worker to the wrapper objects
+        for process, num_errors in zip(processes, errors):
+            process.errors += num_errors
+            if num_errors:
+                process.isOK = False
 
     return all_commands
 
+# wrappers and settings used by a worker process to process run times
+_PARALLEL_WORKER_STATE = {}
+
+def _init_parallel_worker(config, processes, use_init):
+    """! Store the objects needed to process run times in a worker process
+    and open a new handle to each log file so that the workers do not share
+    a file object with the main process.
+    """
+    _PARALLEL_WORKER_STATE['config'] = config
+    _PARALLEL_WORKER_STATE['processes'] = processes
+    _PARALLEL_WORKER_STATE['use_init'] = use_init
+
+    # remove times and counts copied from the main process so they are not
+    # sent back
+    get_run_profile().clear()
+    result_cache = get_result_cache(config)
+    if result_cache:
+        result_cache.pop_stats()
+
+    loggers = [config.logger] + [process.logger for process in processes]
+    for logger in set(loggers):
+        for handler in logger.handlers:
+            if not isinstance(handler, logging.FileHandler):
+                continue
+            handler.acquire()
+            try:
+                handler.stream = handler._open()
+            finally:
+                handler.release()
+
+def _run_time_in_worker(loop_time):
+    """! Run all wrappers for a run time in a worker process
+
+    @param loop_time datetime object of run time to process
+    @returns tuple containing the list of commands that were run, a list
+     of the number of errors that occurred in each wrapper, the times
+     recorded by the run profile, and the result cache counts
+    """
+    config = _PARALLEL_WORKER_STATE['config']
+    processes = _PARALLEL_WORKER_STATE['processes']
+    use_init = _PARALLEL_WORKER_STATE['use_init']
+
+    errors_before = [process.errors for process in processes]
+    all_commands = run_processes_at_time(config, processes, loop_time,
+                                         use_init)
+    errors = [process.errors - before
+              for process, before in zip(processes, errors_before)]
+    result_cache = get_result_cache(config)
+    cache_stats = result_cache.pop_stats() if result_cache else (0, 0, 0, 0)
+    return (all_commands, errors, get_run_profile().pop_records(),
+            cache_stats)
+
 def log_runtime_banner(loop_time, config, use_init):
     run_time = loop_time.strftime("%Y-%m-%d %H:%M")
     config.logger.info("****************************************")
@@ -1418,70 +1643,168 @@ def get_filepaths_for_grbfiles(base_dir):
                 continue
     return file_paths
 
-def get_storms(filter_filename):
-    """! Get each storm as identified by its STORM_ID in the filter file.
-         Create dictionary storm ID as the key and a list of lines for that
-         storm as the value.
+# maximum number of tcst files to keep in the storm table cache
+STORM_TABLE_CACHE_SIZE = 32
 
-         @param filter_filename name of tcst file to read and extract storm id
-         @returns 2 item tuple - 1)dictionary where key is storm ID and value is list
-          of relevant lines from tcst file, 2) header line from tcst file.
-          Also, item with key 'header' contains the header of the tcst file
+# key is absolute path of tcst file, value is StormTable object
+_STORM_TABLE_CACHE = {}
+_STORM_TABLE_CACHE_LOCK = threading.Lock()
+
+class StormTable:
+    """! Lines of a tcst file grouped by the value of the STORM_ID column.
+         The file is read in a single pass. The lines are stored once and
+         each storm keeps the row numbers of its lines in the order they
+         appear in the file.
+    """
+    def __init__(self, header, columns, lines, storm_rows, file_stat=None):
+        """! @param header header line of the tcst file
+             @param columns dictionary where key is column name and value is
+              the index of that column
+             @param lines list of lines that follow the header
+             @param storm_rows dictionary where key is storm ID and value is
+              list of indices into lines for that storm
+             @param file_stat tuple of modification time and size of the file
+              that was read, used to check if the file has changed
+        """
+        self.header = header
+        self.columns = columns
+        self.lines = lines
+        self.storm_rows = storm_rows
+        self.file_stat = file_stat
+
+    @classmethod
+    def from_file(cls, filter_filename):
+        """! Read tcst file and group lines by storm ID
+
+             @param filter_filename path to tcst file
+             @returns StormTable object or None if the file does not exist
+              or does not contain a STORM_ID column
+        """
+        try:
+            file_stat = _get_file_stat(filter_filename)
+            with open(filter_filename, "r") as file_handle:
+                header = file_handle.readline()
+                columns = {column: index
+                           for index, column in enumerate(header.split())}
+                storm_id_column = columns['STORM_ID']
+
+                lines = []
+                storm_rows = {}
+                for line in file_handle:
+                    values = line.split(maxsplit=storm_id_column + 1)
+                    # skip lines that do not have a STORM_ID value
+                    if len(values) <= storm_id_column:
+                        continue
+
+                    storm_id = values[storm_id_column]
+                    storm_rows.setdefault(storm_id, []).append(len(lines))
+                    lines.append(line)
+        except (KeyError, OSError):
+            return None
+
+        return cls(header, columns, lines, storm_rows, file_stat)
+
+    def get_storm_ids(self):
+        """! Get unique storm IDs found in the file
+
+             @returns sorted list of storm IDs
+        """
+        return sorted(self.storm_rows)
+
+    def get_lines(self, storm_id):
+        """! Get lines that contain data for a storm
+
+             @param storm_id value from STORM_ID column
+             @returns list of lines in the order they appear in the file
+        """
+        return [self.lines[row] for row in self.storm_rows.get(storm_id, [])]
+
+def _get_file_stat(filename):
+    """! Get values used to check if a file has changed since it was read
+
+         @param filename path to file
+         @returns tuple of modification time in nanoseconds and size in bytes
+    """
+    file_stat = os.stat(filename)
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+def get_storm_table(filter_filename, use_cache=True):
+    """! Get lines of a tcst file grouped by storm ID. Tables are kept in
+         memory so reading the same file again does not read it from disk
+         unless the modification time or size of the file has changed.
+
+         @param filter_filename path to tcst file
+         @param use_cache (optional) if False, always read the file and do
+          not store the result
+         @returns StormTable object or None if the file does not exist or
+          does not contain a STORM_ID column
     """
-    # Initialize a set because we want unique storm ids.
-    storm_id_list = set()
+    if not use_cache:
+        return StormTable.from_file(filter_filename)
 
+    key = os.path.abspath(filter_filename)
     try:
-        with open(filter_filename, "r") as file_handle:
-            header, *lines = file_handle.readlines()
+        file_stat = _get_file_stat(key)
+    except OSError:
+        return None
 
-        storm_id_column = header.split().index('STORM_ID')
-        for line in lines:
-            storm_id_list.add(line.split()[storm_id_column])
-    except (ValueError, FileNotFoundError):
-        return {}
+    with _STORM_TABLE_CACHE_LOCK:
+        storm_table = _STORM_TABLE_CACHE.get(key)
+    if storm_table is not None and storm_table.file_stat == file_stat:
+        return storm_table
+
+    storm_table = StormTable.from_file(key)
+    with _STORM_TABLE_CACHE_LOCK:
+        _STORM_TABLE_CACHE.pop(key, None)
+        if storm_table is None:
+            return None
 
-    # sort the unique storm ids, copy the original
-    # set by using sorted rather than sort.
-    sorted_storms = sorted(storm_id_list)
+        # remove the table that was added first if the cache is full
+        if len(_STORM_TABLE_CACHE) >= STORM_TABLE_CACHE_SIZE:
+            _STORM_TABLE_CACHE.pop(next(iter(_STORM_TABLE_CACHE)))
+        _STORM_TABLE_CACHE[key] = storm_table
+
+    return storm_table
+
+def get_storms(filter_filename, use_cache=True):
+    """! Get each storm as identified by its STORM_ID in the filter file.
+         Create dictionary storm ID as the key and a list of lines for that
+         storm as the value.
 
-    if not sorted_storms:
+         @param filter_filename name of tcst file to read and extract storm id
+         @param use_cache (optional) if False, read the file even if it was
+          read before and has not changed
+         @returns dictionary where key is storm ID and value is list
+          of relevant lines from tcst file. Item with key 'header' contains
+          the header of the tcst file. Storm IDs are sorted.
+    """
+    storm_table = get_storm_table(filter_filename, use_cache=use_cache)
+    if storm_table is None or not storm_table.storm_rows:
         return {}
 
-    storm_dict = {'header': header}
-    # for each storm, get all lines for that storm
-    for storm in sorted_storms:
-        storm_dict[storm] = [line for line in lines if storm in line]
+    storm_dict = {'header': storm_table.header}
+    for storm_id in storm_table.get_storm_ids():
+        storm_dict[storm_id] = storm_table.get_lines(storm_id)
 
     return storm_dict
 
-def get_storm_ids(filter_filename, logger=None):
+def get_storm_ids(filter_filename, logger=None, use_cache=True):
     """! Get each storm as identified by its STORM_ID in the filter file
         save these in a set so we only save the unique ids and sort them.
         Args:
             @param filter_filename:  The name of the filter file to read
                                        and extract the storm id
             @param logger:  The name of the logger for logging useful info
+            @param use_cache: (optional) if False, read the file even if it
+                                was read before and has not changed
         Returns:
             sorted_storms (List):  a list of unique, sorted storm ids
     """
-    # Initialize a set because we want unique storm ids.
-    storm_id_list = set()
-
-    try:
-        with open(filter_filename, "r") as file_handle:
-            header, *lines = file_handle.readlines()
-
-        storm_id_column = header.split().index('STORM_ID')
-        for line in lines:
-            storm_id_list.add(line.split()[storm_id_column])
-    except (ValueError, FileNotFoundError):
+    storm_table = get_storm_table(filter_filename, use_cache=use_cache)
+    if storm_table is None:
         return []
 
-    # sort the unique storm ids, copy the original
-    # set by using sorted rather than sort.
-    sorted_storms = sorted(storm_id_list)
-    return sorted_storms
+    return storm_table.get_storm_ids()
 
 def get_files(filedir, filename_regex, logger=None):
     """! Get all the files (with a particular
@@ -2628,18 +2951,25 @@ def get_time_from_file(filepath, template, logger=None):
 
     return None
 
-def preprocess_file(filename, data_type, config, allow_dir=False):
+def preprocess_file(filename, data_type, config, allow_dir=False,
+                    file_index=None):
     """ Decompress gzip, bzip, or zip files or convert Gempak files to NetCDF
         Args:
             @param filename: Path to file without zip extensions
             @param config: Config object
+            @param file_index: (optional) DirectoryIndex object used to check
+             if input files exist instead of querying the filesystem
         Returns:
             Path to staged unzipped file or original file if already unzipped
     """
     if not filename:
         return None
 
-    if allow_dir and os.path.isdir(filename):
+    # check for input files in the directory index if it is provided
+    isfile = file_index.isfile if file_index else os.path.isfile
+    isdir = file_index.isdir if file_index else os.path.isdir
+
+    if allow_dir and isdir(filename):
         return filename
 
     # if using python embedding for input, return the keyword
@@ -2651,7 +2981,7 @@ def preprocess_file(filename, data_type, config, allow_dir=False):
 
     stage_dir = config.getdir('STAGING_DIR')
 
-    if os.path.isfile(filename):
+    if isfile(filename):
         # if filename provided ends with a valid compression extension,
         # remove the extension and call function again so the
         # file will be uncompressed properly. This is done so that
@@ -2660,7 +2990,8 @@ def preprocess_file(filename, data_type, config, allow_dir=False):
         # without an extension but the compressed equivalent exists
         for ext in VALID_EXTENSIONS:
             if filename.endswith(ext):
-                return preprocess_file(filename[:-len(ext)], data_type, config)
+                return preprocess_file(filename[:-len(ext)], data_type, config,
+                                       file_index=file_index)
         # if extension is grd (Gempak), then look in staging dir for nc file
         if filename.endswith('.grd') or data_type == "GEMPAK":
             if filename.endswith('.grd'):
@@ -2672,68 +3003,180 @@ def preprocess_file(filename, data_type, config, allow_dir=False):
             # if it does not exist, run GempakToCF and return staged nc file
             # Create staging area if it does not exist
             outdir = os.path.dirname(stagefile)
-            if not os.path.exists(outdir):
-                os.makedirs(outdir, mode=0o0775)
+            os.makedirs(outdir, mode=0o0775, exist_ok=True)
 
             # only import GempakToCF if needed
             from ..wrappers import GempakToCFWrapper
 
+            # write to a temporary file and rename it when it is complete
+            tmp_stagefile = get_tmp_stage_path(stagefile)
             run_g2c = GempakToCFWrapper(config)
             run_g2c.infiles.append(filename)
-            run_g2c.set_output_path(stagefile)
+            run_g2c.set_output_path(tmp_stagefile)
             cmd = run_g2c.get_command()
             if cmd is None:
                 config.logger.error("GempakToCF could not generate command")
                 return None
             if config.logger:
                 config.logger.debug("Converting Gempak file into {}".format(stagefile))
-            run_g2c.build()
+            if not run_g2c.build():
+                # remove partially written file so it is not left in staging
+                if os.path.exists(tmp_stagefile):
+                    os.remove(tmp_stagefile)
+                return None
+
+            if os.path.exists(tmp_stagefile):
+                os.replace(tmp_stagefile, stagefile)
             return stagefile
 
         return filename
 
     # nc file requested and the Gempak equivalent exists
-    if os.path.isfile(filename[:-2]+'grd'):
-        return preprocess_file(filename[:-2]+'grd', data_type, config)
+    if isfile(filename[:-2]+'grd'):
+        return preprocess_file(filename[:-2]+'grd', data_type, config,
+                               file_index=file_index)
 
-    # if file exists in the staging area, return that path
     outpath = stage_dir + filename
+
+    # find gz, bz2, or zip file
+    for ext in VALID_EXTENSIONS:
+        if isfile(filename+ext):
+            compressed_path = filename + ext
+            break
+    else:
+        compressed_path = None
+
+    # if file exists in the staging area and it was uncompressed from the
+    # current version of the compressed file, return that path
     if os.path.isfile(outpath):
-        return outpath
+        if (compressed_path is None or
+                is_staged_file_current(outpath, compressed_path)):
+            return outpath
+
+        if config.logger:
+            config.logger.debug(f"{compressed_path} has changed since it was "
+                                "uncompressed. Uncompressing again")
+
+    if compressed_path is None:
+        return None
 
     # Create staging area if it does not exist
     outdir = os.path.dirname(outpath)
-    if not os.path.exists(outdir):
-        os.makedirs(outdir, mode=0o0775)
+    os.makedirs(outdir, mode=0o0775, exist_ok=True)
 
-    # uncompress gz, bz2, or zip file
-    if os.path.isfile(filename+".gz"):
-        if config.logger:
-            config.logger.debug("Uncompressing gz file to {}".format(outpath))
-        with gzip.open(filename+".gz", 'rb') as infile:
-            with open(outpath, 'wb') as outfile:
-                outfile.write(infile.read())
-                infile.close()
-                outfile.close()
-                return outpath
-    elif os.path.isfile(filename+".bz2"):
-        if config.logger:
-            config.logger.debug("Uncompressing bz2 file to {}".format(outpath))
-        with open(filename+".bz2", 'rb') as infile:
-            with open(outpath, 'wb') as outfile:
-                outfile.write(bz2.decompress(infile.read()))
-                infile.close()
-                outfile.close()
-                return outpath
-    elif os.path.isfile(filename+".zip"):
-        if config.logger:
-            config.logger.debug("Uncompressing zip file to {}".format(outpath))
-        with zipfile.ZipFile(filename+".zip") as z:
-            with open(outpath, 'wb') as f:
-                f.write(z.read(os.path.basename(filename)))
-                return outpath
+    if config.logger:
+        config.logger.debug(f"Uncompressing {ext[1:]} file to {outpath}")
 
-    return None
+    try:
+        uncompress_file(compressed_path, outpath)
+    except (OSError, EOFError, zlib.error,
+            zipfile.BadZipFile, KeyError) as err:
+        config.logger.error(f"Could not uncompress {compressed_path}: {err}")
+        return None
+
+    return outpath
+
+def preprocess_files(filenames, data_type, config, allow_dir=False,
+                     file_index=None):
+    """! Call preprocess_file for each file in a list. Files are processed
+         at the same time using a pool of threads if
+         METPLUS_DECOMPRESS_WORKERS is greater than 1.
+
+         @param filenames list of paths to process
+         @param data_type type of input data, i.e. GEMPAK or PYTHON_NUMPY
+         @param config METplusConfig object
+         @param allow_dir (optional) if True, return directories
+         @param file_index (optional) DirectoryIndex object used to check
+          if input files exist
+         @returns list of results of preprocess_file in the same order as
+          filenames
+    """
+    num_workers = config.getint('config', 'METPLUS_DECOMPRESS_WORKERS', 1)
+    if num_workers is None or num_workers < 1:
+        config.logger.warning('METPLUS_DECOMPRESS_WORKERS must be a positive '
+                              'integer. Processing files serially')
+        num_workers = 1
+
+    def process_one(filename):
+        return preprocess_file(filename, data_type, config,
+                               allow_dir=allow_dir, file_index=file_index)
+
+    if num_workers == 1 or len(filenames) < 2:
+        return [process_one(filename) for filename in filenames]
+
+    with ThreadPoolExecutor(max_workers=min(num_workers,
+                                            len(filenames))) as executor:
+        return list(executor.map(process_one, filenames))
+
+def is_staged_file_current(staged_path, source_path):
+    """! Check if a staged file was created from the current version of its
+         source file. Staged files are given the modification time of the
+         source file when they are created, so they match unless the source
+         has changed. A difference of less than 1 second is allowed because
+         the filesystems may store times with different precision.
+
+         @param staged_path path to file in the staging directory
+         @param source_path path to file that the staged file was created from
+         @returns True if the staged file is current, False if not
+    """
+    try:
+        staged_mtime = os.stat(staged_path).st_mtime
+        source_mtime = os.stat(source_path).st_mtime
+    except OSError:
+        return False
+
+    return abs(staged_mtime - source_mtime) < 1
+
+def uncompress_file(compressed_path, outpath):
+    """! Uncompress a gz, bz2, or zip file into outpath. The data is read
+         and written in chunks so that large files are never held in memory.
+         The output is written to a temporary file that is renamed when it is
+         complete so other processes that use the same staging directory never
+         read a partially written file. The output file is given the
+         modification time of the compressed file so it can be reused until
+         the compressed file changes. Zip files must contain a file with the
+         same name as outpath. Raises OSError, EOFError, zlib.error,
+         zipfile.BadZipFile, or KeyError if the file cannot be uncompressed.
+
+         @param compressed_path path to compressed file ending with .gz,
+          .bz2, or .zip
+         @param outpath path to write uncompressed file
+    """
+    tmp_outpath = get_tmp_stage_path(outpath)
+    try:
+        with open(tmp_outpath, 'wb') as outfile:
+            if compressed_path.endswith('.gz'):
+                with gzip.open(compressed_path, 'rb') as infile:
+                    shutil.copyfileobj(infile, outfile, UNCOMPRESS_CHUNK_SIZE)
+            elif compressed_path.endswith('.bz2'):
+                with bz2.open(compressed_path, 'rb') as infile:
+                    shutil.copyfileobj(infile, outfile, UNCOMPRESS_CHUNK_SIZE)
+            else:
+                with zipfile.ZipFile(compressed_path) as zip_file:
+                    with zip_file.open(os.path.basename(outpath)) as infile:
+                        shutil.copyfileobj(infile, outfile,
+                                           UNCOMPRESS_CHUNK_SIZE)
+
+        source_stat = os.stat(compressed_path)
+        os.utime(tmp_outpath, ns=(source_stat.st_atime_ns,
+                                  source_stat.st_mtime_ns))
+        os.replace(tmp_outpath, outpath)
+    except BaseException:
+        # remove partially written file so it is not left in staging dir
+        if os.path.exists(tmp_outpath):
+            os.remove(tmp_outpath)
+        raise
+
+def get_tmp_stage_path(outpath):
+    """! Get path to write a staged file before it is complete. The process
+    and thread IDs are included so that multiple processes or threads can
+    stage the same file at the same time without overwriting each other's
+    partial output.
+
+    @param outpath final path of the staged file
+    @returns path to temporary file in the same directory as outpath
+    """
+    return f"{outpath}.{os.getpid()}.{threading.get_ident()}.tmp"
 
 def template_to_regex(template, time_info, logger):
     in_template = re.sub(r'\.', '\\.', template)
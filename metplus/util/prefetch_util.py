@@ -0,0 +1,321 @@
+"""
+Program Name: prefetch_util.py
+Contact(s): George McCabe
+Abstract: Stage input files for upcoming run times in the background
+History Log:  Initial version
+Usage: Call get_run_time_prefetcher to obtain a prefetcher if it is enabled
+Parameters: None
+Input Files: Compressed and Gempak input files
+Output Files: Staged input files in STAGING_DIR
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .met_util import preprocess_file, set_input_dict, get_lead_sequence
+from .met_util import getlist, VALID_EXTENSIONS
+from .string_template_substitution import do_string_sub
+from .time_util import ti_calculate
+
+'''!@namespace PrefetchUtil
+@brief Uncompresses or converts the input files of upcoming run times on
+ background threads while the current run time is processed, so that the
+ filesystem and the CPU are both kept busy. Nothing is prefetched unless
+ METPLUS_PREFETCH_RUN_TIMES is set.
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used in other METplus wrappers
+@endcode
+'''
+
+BYTES_PER_MB = 1024 * 1024
+
+# extensions of input files that are uncompressed or converted when staged
+STAGED_EXTENSIONS = tuple(VALID_EXTENSIONS) + ('.grd',)
+
+
+class RunTimePrefetcher:
+    """! Stages the input files of the next run times on a pool of threads.
+         The input files of a wrapper are predicted by filling in each of its
+         input templates that look for an exact time match with the time
+         information for each forecast lead of the run time. Only files that
+         need to be uncompressed or converted from Gempak are staged, so the
+         staging directory holds the same files it would without prefetching.
+    """
+    def __init__(self, config, processes, loop_times, use_init,
+                 num_run_times, num_workers=1, max_bytes=None):
+        """! @param config METplusConfig object
+             @param processes list of CommandBuilder subclass objects
+             @param loop_times list of datetime objects of all run times
+             @param use_init True if looping by init, False if by valid
+             @param num_run_times number of upcoming run times to prefetch
+             @param num_workers (optional) number of threads used to stage
+              files. Default is 1
+             @param max_bytes (optional) maximum number of bytes of input
+              files that can be staged for run times that have not started.
+              Default is None, which does not limit the size
+        """
+        self.config = config
+        self.logger = config.logger
+        self.processes = processes
+        self.loop_times = loop_times
+        self.use_init = use_init
+        self.num_run_times = num_run_times
+        self.max_bytes = max_bytes
+
+        self._executor = ThreadPoolExecutor(max_workers=num_workers,
+                                            thread_name_prefix='prefetch')
+        self._lock = threading.Lock()
+
+        # index of last run time that input files were scheduled for
+        self._last_scheduled = -1
+        # key is run time index, value is list of futures of staged files
+        self._futures = {}
+        # key is input file path, value is future that stages the file
+        self._jobs = {}
+        # key is run time index, value is number of bytes reserved
+        self._reserved = {}
+        self._reserved_total = 0
+        # start and end times of finished jobs, start times of running jobs
+        self._job_times = []
+        self._running = {}
+        self._run_start = None
+        self._run_wait = 0.0
+
+        self.num_files = 0
+        self.num_bytes = 0
+        self.num_deferred = 0
+        self.overlap_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def get_input_files(self, process, loop_time):
+        """! Predict the input files that a wrapper will read for a run time
+
+             @param process CommandBuilder subclass object
+             @param loop_time datetime object of run time
+             @returns generator of tuples of input file path, input data
+              type, and DirectoryIndex object of the wrapper (or None)
+        """
+        c_dict = process.c_dict
+        input_dict = set_input_dict(loop_time, self.config, self.use_init,
+                                    instance=process.instance)
+        custom_list = c_dict.get('CUSTOM_LOOP_LIST') or ['']
+        templates = [
+            (key[:-len('INPUT_TEMPLATE')], template)
+            for key, template in c_dict.items()
+            if key.endswith('INPUT_TEMPLATE') and
+            template and isinstance(template, str)
+        ]
+        for lead in get_lead_sequence(self.config, input_dict):
+            input_dict['lead'] = lead
+            for custom in custom_list:
+                input_dict['custom'] = custom
+                time_info = ti_calculate(input_dict)
+                for prefix, template in templates:
+                    # files found within a time window are not predicted
+                    if (c_dict.get(f'{prefix}FILE_WINDOW_BEGIN', 0) or
+                            c_dict.get(f'{prefix}FILE_WINDOW_END', 0)):
+                        continue
+
+                    data_dir = c_dict.get(f'{prefix}INPUT_DIR', '')
+                    data_type = c_dict.get(f'{prefix}INPUT_DATATYPE', '')
+                    for single_template in getlist(template):
+                        # level is set by the field that is processed
+                        if '{level' in single_template:
+                            continue
+                        try:
+                            filename = do_string_sub(single_template,
+                                                     **time_info)
+                        except (TypeError, ValueError, KeyError):
+                            continue
+
+                        full_path = os.path.join(data_dir, filename)
+                        if (os.path.sep not in full_path or
+                                '*' in full_path or '?' in full_path):
+                            continue
+                        yield full_path, data_type, process.file_index
+
+    @staticmethod
+    def get_source_size(filename, data_type, file_index=None):
+        """! Get size of the file that will be uncompressed or converted if
+             preprocess_file is called with filename
+
+             @param filename path to input file without compression extension
+             @param data_type type of input data, i.e. GEMPAK
+             @param file_index (optional) DirectoryIndex object used to check
+              if input files exist
+             @returns size in bytes or None if the file does not need to be
+              staged
+        """
+        if data_type and 'PYTHON' in data_type:
+            return None
+
+        isfile = file_index.isfile if file_index else os.path.isfile
+        if isfile(filename):
+            if (not filename.endswith(STAGED_EXTENSIONS) and
+                    data_type != 'GEMPAK'):
+                return None
+            source_path = filename
+        elif isfile(filename[:-2]+'grd'):
+            source_path = filename[:-2]+'grd'
+        else:
+            for ext in VALID_EXTENSIONS:
+                if isfile(filename+ext):
+                    source_path = filename + ext
+                    break
+            else:
+                return None
+
+        try:
+            return os.stat(source_path).st_size
+        except OSError:
+            return None
+
+    def start_run_time(self, index):
+        """! Wait for the input files of a run time to finish staging, then
+             start staging the input files of the next run times
+
+             @param index index of run time in loop_times that is starting
+        """
+        start = time.perf_counter()
+        for future in self._futures.pop(index, []):
+            future.result()
+        self._run_wait = time.perf_counter() - start
+        self.wait_seconds += self._run_wait
+
+        with self._lock:
+            self._reserved_total -= self._reserved.pop(index, 0)
+
+        # if the staging budget is full, the remaining files are scheduled
+        # when the next run time starts and its reserved bytes are released
+        last_index = min(index + self.num_run_times, len(self.loop_times) - 1)
+        for next_index in range(max(index + 1, self._last_scheduled + 1),
+                                last_index + 1):
+            if not self._schedule(next_index):
+                break
+            self._last_scheduled = next_index
+
+        self._run_start = time.perf_counter()
+
+    def finish_run_time(self, index):
+        """! Log the time spent staging files in the background while a run
+             time was processed
+
+             @param index index of run time in loop_times that finished
+        """
+        run_end = time.perf_counter()
+        with self._lock:
+            job_times = self._job_times + [(job_start, run_end) for job_start
+                                           in self._running.values()]
+            # times of finished jobs are no longer needed
+            self._job_times = []
+
+        overlap = sum(max(0.0, min(job_end, run_end) -
+                          max(job_start, self._run_start))
+                      for job_start, job_end in job_times)
+        self.overlap_seconds += overlap
+        self.logger.info(f"Prefetch: staged input files on background "
+                         f"threads for {overlap:.2f} seconds while run time "
+                         f"{index + 1}/{len(self.loop_times)} was processed "
+                         f"and waited {self._run_wait:.2f} seconds for "
+                         "files to finish staging")
+
+    def shutdown(self):
+        """! Stop staging files and log totals """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.logger.info(f"Prefetch: staged {self.num_files} files "
+                         f"({self.num_bytes / BYTES_PER_MB:.1f} MB) ahead "
+                         f"of time, deferred staging {self.num_deferred} "
+                         "times because the staging budget was full, "
+                         "overlapped "
+                         f"{self.overlap_seconds:.2f} seconds of staging "
+                         "with processing, and waited "
+                         f"{self.wait_seconds:.2f} seconds for files")
+
+    def _schedule(self, index):
+        """! Start staging the input files of a run time
+
+             @param index index of run time in loop_times
+             @returns False if some files did not fit in the staging budget
+        """
+        futures = self._futures.setdefault(index, [])
+        for process in self.processes:
+            for filename, data_type, file_index in (
+                    self.get_input_files(process, self.loop_times[index])
+            ):
+                # file that is already staged or staging for an earlier
+                # run time is waited for before this run time starts
+                future = self._jobs.get(filename)
+                if future is not None:
+                    futures.append(future)
+                    continue
+
+                size = self.get_source_size(filename, data_type, file_index)
+                if size is None:
+                    continue
+
+                with self._lock:
+                    if (self.max_bytes is not None and
+                            self._reserved_total + size > self.max_bytes):
+                        self.num_deferred += 1
+                        return False
+                    self._reserved_total += size
+                    self._reserved[index] = (self._reserved.get(index, 0) +
+                                             size)
+
+                future = self._executor.submit(self._stage, filename,
+                                               data_type, file_index, size)
+                self._jobs[filename] = future
+                futures.append(future)
+
+        return True
+
+    def _stage(self, filename, data_type, file_index, size):
+        job_id = object()
+        with self._lock:
+            self._running[job_id] = time.perf_counter()
+        staged_path = None
+        try:
+            staged_path = preprocess_file(filename, data_type, self.config,
+                                          file_index=file_index)
+        except Exception as err:
+            self.logger.warning(f"Could not prefetch {filename}: {err}")
+        finally:
+            with self._lock:
+                job_start = self._running.pop(job_id)
+                self._job_times.append((job_start, time.perf_counter()))
+                if staged_path:
+                    self.num_files += 1
+                    self.num_bytes += size
+
+
+def get_run_time_prefetcher(config, processes, loop_times, use_init):
+    """! Get a prefetcher if METPLUS_PREFETCH_RUN_TIMES is set to a value
+         greater than 0
+
+         @param config METplusConfig object
+         @param processes list of CommandBuilder subclass objects
+         @param loop_times list of datetime objects of all run times
+         @param use_init True if looping by init, False if by valid
+         @returns RunTimePrefetcher object or None if prefetching is not
+          enabled
+    """
+    num_run_times = config.getint('config', 'METPLUS_PREFETCH_RUN_TIMES', 0)
+    if not num_run_times or num_run_times < 1 or len(loop_times) < 2:
+        return None
+
+    num_workers = config.getint('config', 'METPLUS_PREFETCH_WORKERS', 1)
+    if num_workers is None or num_workers < 1:
+        config.logger.warning('METPLUS_PREFETCH_WORKERS must be a positive '
+                              'integer. Using 1 thread')
+        num_workers = 1
+
+    max_mb = config.getint('config', 'METPLUS_PREFETCH_MAX_MB', 1024)
+    max_bytes = max_mb * BYTES_PER_MB if max_mb and max_mb > 0 else None
+
+    config.logger.debug(f"Prefetching input files for {num_run_times} "
+                        f"upcoming run times using {num_workers} thread(s)")
+    return RunTimePrefetcher(config, processes, loop_times, use_init,
+                             num_run_times, num_workers, max_bytes)
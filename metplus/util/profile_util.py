@@ -0,0 +1,344 @@
+"""
+Program Name: profile_util.py
+Contact(s): George McCabe
+Abstract: Record time spent in each stage of a METplus run
+History Log:  Initial version
+Usage: Call get_run_profile to obtain the profile shared by the run
+Parameters: None
+Input Files: N/A
+Output Files: JSON and CSV profile reports
+"""
+
+import os
+import csv
+import json
+import time
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+# resource module is only available on Unix platforms
+try:
+    import resource
+except ImportError:
+    resource = None
+
+'''!@namespace ProfileUtil
+@brief Keeps track of the wall clock time spent in each stage of a METplus
+ run for each wrapper and run time, as well as the time and resources used
+ by each command that is run. Nothing is recorded unless the profile is
+ enabled with the METPLUS_PROFILE configuration variable.
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used in other METplus wrappers
+@endcode
+'''
+
+# column names of the CSV report
+CSV_COLUMNS = [
+    'wrapper',
+    'run_time',
+    'stage',
+    'command',
+    'count',
+    'wall_seconds',
+    'user_cpu_seconds',
+    'system_cpu_seconds',
+    'max_rss',
+    'return_code',
+]
+
+
+class RunProfile:
+    """! Time spent in each stage of a run, keyed by wrapper, run time, and
+         stage name. The time recorded for a stage does not include time
+         spent in other stages that were entered while it was running, so
+         the times of all stages can be added together. Entering a stage
+         that is already running, i.e. a method that calls the same method of
+         its parent class, is counted as part of the running stage.
+    """
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stages = {}
+        self._commands = []
+
+    def clear(self):
+        """! Remove all recorded times """
+        with self._lock:
+            self._stages = {}
+            self._commands = []
+
+    def get_context(self):
+        """! Get the wrapper and run time that are being processed by the
+             current thread
+
+             @returns tuple of wrapper name and run time string
+        """
+        return getattr(self._local, 'context', ('', ''))
+
+    @contextmanager
+    def context(self, wrapper=None, run_time=None):
+        """! Attribute stages that run inside the block to a wrapper and run
+             time. If either value is None, the current value is kept.
+
+             @param wrapper name of wrapper
+             @param run_time datetime object or string of run time
+        """
+        previous = self.get_context()
+        if wrapper is None:
+            wrapper = previous[0]
+        if run_time is None:
+            run_time = previous[1]
+        elif not isinstance(run_time, str):
+            run_time = run_time.strftime('%Y%m%d%H%M%S')
+
+        self._local.context = (wrapper, run_time)
+        try:
+            yield
+        finally:
+            self._local.context = previous
+
+    def _get_stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name):
+        """! Record the time spent in a block of code
+
+             @param name name of stage
+        """
+        if not self.enabled:
+            yield
+            return
+
+        stack = self._get_stack()
+        if any(entry[0] == name for entry in stack):
+            yield
+            return
+
+        # name of stage and time spent in stages that are entered inside it
+        entry = [name, 0.0]
+        stack.append(entry)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][1] += elapsed
+            self._add_stage(name, elapsed - entry[1])
+
+    def _add_stage(self, name, seconds, count=1, context=None):
+        key = (context or self.get_context()) + (name,)
+        with self._lock:
+            totals = self._stages.setdefault(key, [0, 0.0])
+            totals[0] += count
+            totals[1] += seconds
+
+    @contextmanager
+    def command(self, name):
+        """! Record the time spent running a command and the resources used
+             by child processes while it ran. Child process CPU time is read
+             from the resource usage of all child processes, so it includes
+             other commands that finished while this command was running
+             when commands are run at the same time. Max RSS is the largest
+             resident set size of any child process that has finished.
+
+             @param name name of executable that is run
+             @returns dictionary to set return_code of command
+        """
+        record = {}
+        if not self.enabled:
+            yield record
+            return
+
+        usage_before = _get_child_usage()
+        start = time.perf_counter()
+        with self.stage('command'):
+            try:
+                yield record
+            finally:
+                wall_seconds = time.perf_counter() - start
+                usage_after = _get_child_usage()
+                wrapper, run_time = self.get_context()
+                command = {
+                    'wrapper': wrapper,
+                    'run_time': run_time,
+                    'command': name,
+                    'wall_seconds': wall_seconds,
+                    'user_cpu_seconds': None,
+                    'system_cpu_seconds': None,
+                    'max_rss': None,
+                    'return_code': record.get('return_code'),
+                }
+                if usage_before and usage_after:
+                    command['user_cpu_seconds'] = (usage_after.ru_utime -
+                                                   usage_before.ru_utime)
+                    command['system_cpu_seconds'] = (usage_after.ru_stime -
+                                                     usage_before.ru_stime)
+                    command['max_rss'] = usage_after.ru_maxrss
+                with self._lock:
+                    self._commands.append(command)
+
+    def pop_records(self):
+        """! Get all recorded times and remove them from the profile. Used to
+             send times from a worker process to the main process.
+
+             @returns tuple of stage totals and list of command records
+        """
+        with self._lock:
+            records = (self._stages, self._commands)
+            self._stages = {}
+            self._commands = []
+        return records
+
+    def merge_records(self, records):
+        """! Add times that were returned by pop_records
+
+             @param records tuple of stage totals and list of command records
+        """
+        stages, commands = records
+        with self._lock:
+            for key, (count, seconds) in stages.items():
+                totals = self._stages.setdefault(key, [0, 0.0])
+                totals[0] += count
+                totals[1] += seconds
+            self._commands.extend(commands)
+
+    def get_stage_rows(self):
+        """! Get total time for each stage
+
+             @returns list of dictionaries with wrapper, run_time, stage,
+              count, and wall_seconds for each stage in the order that
+              the stages first ran
+        """
+        with self._lock:
+            return [{'wrapper': wrapper,
+                     'run_time': run_time,
+                     'stage': stage,
+                     'count': count,
+                     'wall_seconds': seconds}
+                    for (wrapper, run_time, stage), (count, seconds)
+                    in self._stages.items()]
+
+    def get_command_rows(self):
+        """! Get information about each command that was run
+
+             @returns list of dictionaries with wrapper, run_time, command,
+              wall_seconds, user_cpu_seconds, system_cpu_seconds, max_rss,
+              and return_code for each command in the order they finished
+        """
+        with self._lock:
+            return [dict(command) for command in self._commands]
+
+    def write_report(self, json_path, csv_path):
+        """! Write recorded times to a JSON file and a CSV file
+
+             @param json_path path to write JSON report
+             @param csv_path path to write CSV report
+        """
+        stage_rows = self.get_stage_rows()
+        command_rows = self.get_command_rows()
+
+        with open(json_path, 'w') as file_handle:
+            json.dump({'stages': stage_rows, 'commands': command_rows},
+                      file_handle, indent=2)
+
+        with open(csv_path, 'w', newline='') as file_handle:
+            writer = csv.DictWriter(file_handle, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(stage_rows)
+            for command in command_rows:
+                writer.writerow(dict(command, stage='command', count=1))
+
+
+def _get_child_usage():
+    """! Get resource usage of child processes that have finished
+
+         @returns resource.struct_rusage object or None if not available
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_CHILDREN)
+
+
+def profile_stage(name):
+    """! Decorator to record the time spent in a function as a stage
+
+         @param name name of stage
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _RUN_PROFILE.enabled:
+                return function(*args, **kwargs)
+            with _RUN_PROFILE.stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_process_name(process):
+    """! Get name used to identify a wrapper in the profile
+
+         @param process CommandBuilder subclass object
+         @returns name of wrapper without Wrapper suffix, followed by the
+          instance name in parenthesis if set
+    """
+    name = process.__class__.__name__.replace('Wrapper', '')
+    instance = getattr(process, 'instance', None)
+    if instance:
+        name = f'{name}({instance})'
+    return name
+
+
+# profile shared by all wrappers in the run
+_RUN_PROFILE = RunProfile()
+
+
+def get_run_profile():
+    """! Get the profile shared by all wrappers in the run
+
+         @returns RunProfile object
+    """
+    return _RUN_PROFILE
+
+
+def init_run_profile(config):
+    """! Clear the profile and enable it if requested by the
+         METPLUS_PROFILE configuration variable
+
+         @param config METplusConfig object
+         @returns RunProfile object
+    """
+    _RUN_PROFILE.clear()
+    _RUN_PROFILE.enabled = config.getbool('config', 'METPLUS_PROFILE', False)
+    return _RUN_PROFILE
+
+
+def write_profile_report(config):
+    """! Write the profile report to the log directory next to the
+         all_commands file if the profile is enabled
+
+         @param config METplusConfig object
+         @returns tuple of paths to JSON and CSV reports or None if the
+          profile is not enabled
+    """
+    if not _RUN_PROFILE.enabled:
+        return None
+
+    log_timestamp = config.getstr('config', 'LOG_TIMESTAMP')
+    basename = os.path.join(config.getdir('LOG_DIR'),
+                            f'.profile.{log_timestamp}')
+    json_path = f'{basename}.json'
+    csv_path = f'{basename}.csv'
+    config.logger.info(f"Writing profile report to {json_path} and "
+                       f"{csv_path}")
+    _RUN_PROFILE.write_report(json_path, csv_path)
+    return json_path, csv_path
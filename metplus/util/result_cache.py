@@ -0,0 +1,529 @@
+"""
+Program Name: result_cache.py
+Contact(s): George McCabe
+Abstract: Reuse output of MET commands that were already run with the same
+ command line, environment, and input files
+History Log:  Initial version
+Usage: Call get_result_cache to obtain the cache if it is enabled
+Parameters: None
+Input Files: Input files referenced on the command line
+Output Files: Cached output files in METPLUS_RESULT_CACHE_DIR
+"""
+
+import os
+import re
+import json
+import shlex
+import shutil
+import hashlib
+import threading
+
+'''!@namespace ResultCache
+@brief Stores the output file of MET commands in a shared directory keyed by
+ a hash of everything that determines the output, so that a command that is
+ run again with the same inputs is not run a second time. The output is
+ linked or copied into place from the cache instead. Nothing is cached unless
+ METPLUS_RESULT_CACHE_DIR is set.
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used in other METplus wrappers
+@endcode
+'''
+
+# increment to ignore entries written by an older version of this module
+CACHE_VERSION = 1
+
+BYTES_PER_MB = 1024 * 1024
+
+# size of blocks read to compute checksum of input files
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+
+# environment variables that do not change the output of a command
+IGNORED_ENV_VARS = ('MET_TMP_DIR',)
+
+
+class ResultCache:
+    """! Directory of cached output files. Each entry is a directory named by
+         its key that holds the output file and a manifest.json file that is
+         written last so that incomplete entries are never used. The
+         modification time of the manifest is updated each time an entry is
+         used so the least recently used entries are removed first when the
+         cache is larger than the size limit.
+    """
+    def __init__(self, cache_dir, max_bytes=None, use_links=False,
+                 use_checksum=False):
+        """! @param cache_dir directory to store cached output
+             @param max_bytes (optional) maximum total size of cached output
+              files. Default is None, which does not limit the size
+             @param use_links (optional) if True, hard link cached files into
+              place instead of copying them. Default is False
+             @param use_checksum (optional) if True, identify input files by
+              a checksum of their contents instead of their size and
+              modification time. Default is False
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.use_links = use_links
+        self.use_checksum = use_checksum
+
+        self._lock = threading.Lock()
+        # key is tuple of path, size, and mtime, value is checksum
+        self._checksums = {}
+        # total size of cached files, None until the cache has been scanned
+        self._total_bytes = None
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_restored = 0
+        self.num_evicted = 0
+
+    def get_key(self, cmd, env, output_path, config_file=None):
+        """! Compute the key of a command. The key is a hash of the command
+             line, the environment variables that the command reads, the
+             contents of the MET config file, and the identity of each file
+             that is referenced on the command line or in the value of an
+             environment variable.
+
+             @param cmd command that is run
+             @param env dictionary of environment variables set for the
+              command by the wrapper
+             @param output_path path of the output file of the command
+             @param config_file (optional) path to MET config file
+             @returns key string or None if the key could not be computed
+        """
+        # output path is left out so that commands run in different output
+        # directories share entries
+        args = ['{OUTPUT}' if arg == output_path else arg
+                for arg in cmd.split()]
+        key_hash = hashlib.sha256()
+        key_hash.update(repr((CACHE_VERSION, args)).encode('utf-8'))
+        key_hash.update(get_env_hash(env).encode('utf-8'))
+
+        try:
+            if config_file:
+                with open(config_file, 'rb') as file_handle:
+                    key_hash.update(file_handle.read())
+
+            input_paths = get_command_files(cmd, output_path)
+            input_paths.extend(path for path in get_env_files(env,
+                                                              output_path)
+                               if path not in input_paths)
+            for input_path in input_paths:
+                key_hash.update(
+                    repr(self.get_file_identity(input_path)).encode('utf-8')
+                )
+        except OSError:
+            return None
+
+        return key_hash.hexdigest()
+
+    def get_file_identity(self, path):
+        """! Get values that change if the contents of a file change
+
+             @param path input file
+             @returns tuple that identifies the file
+        """
+        get_checksum = self._get_checksum if self.use_checksum else None
+        return get_file_identity(path, get_checksum)
+
+    def _get_checksum(self, path, stat):
+        stat_key = (path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            checksum = self._checksums.get(stat_key)
+        if checksum is None:
+            file_hash = hashlib.sha256()
+            with open(path, 'rb') as file_handle:
+                for block in iter(lambda: file_handle.read(CHECKSUM_BLOCK_SIZE),
+                                  b''):
+                    file_hash.update(block)
+            checksum = file_hash.hexdigest()
+            with self._lock:
+                self._checksums[stat_key] = checksum
+        return checksum
+
+    def get_entry_dir(self, key):
+        """! Get directory of a cache entry
+
+             @param key key of command from get_key
+             @returns path to entry directory
+        """
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def fetch(self, key, output_path, logger=None):
+        """! Put the cached output of a command in place if it is found
+
+             @param key key of command from get_key
+             @param output_path path to write output file
+             @param logger (optional) logger to output debug information
+             @returns True if the cached output was used, False if the
+              command must be run
+        """
+        entry_dir = self.get_entry_dir(key)
+        manifest_file = os.path.join(entry_dir, 'manifest.json')
+        cached_file = os.path.join(entry_dir, 'output')
+        try:
+            with open(manifest_file, 'r') as file_handle:
+                manifest = json.load(file_handle)
+
+            # remove entry if file was changed through a hard link
+            if os.stat(cached_file).st_size != manifest['size']:
+                if logger:
+                    logger.warning(f"Removing changed result cache entry "
+                                   f"{entry_dir}")
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                raise OSError('cached file changed')
+
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            self._place_file(cached_file, output_path)
+            os.utime(manifest_file)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            # remove output that was linked from an entry before the command
+            # writes to it so the cached file is not overwritten
+            try:
+                if self.use_links and os.stat(output_path).st_nlink > 1:
+                    os.remove(output_path)
+            except OSError:
+                pass
+            return False
+
+        with self._lock:
+            self.hits += 1
+            self.bytes_restored += manifest['size']
+
+        if logger:
+            logger.info(f"Using output from result cache {entry_dir} for "
+                        f"{output_path}")
+        return True
+
+    def store(self, key, output_path, cmd='', logger=None):
+        """! Add the output file of a command to the cache and remove the
+             least recently used entries if the cache is too large
+
+             @param key key of command from get_key
+             @param output_path path of output file that was written
+             @param cmd (optional) command that was run, stored in manifest
+             @param logger (optional) logger to output debug information
+             @returns True if the output was stored, False if not
+        """
+        if not os.path.isfile(output_path):
+            return False
+
+        size = os.path.getsize(output_path)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+
+        entry_dir = self.get_entry_dir(key)
+        if os.path.exists(entry_dir):
+            return True
+
+        tmp_dir = get_tmp_path(entry_dir)
+        try:
+            os.makedirs(tmp_dir)
+            self._place_file(output_path, os.path.join(tmp_dir, 'output'))
+
+            # write manifest last so incomplete entries are not used
+            with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as handle:
+                json.dump({'version': CACHE_VERSION,
+                           'command': cmd,
+                           'output': output_path,
+                           'size': size}, handle)
+            try:
+                os.rename(tmp_dir, entry_dir)
+            except OSError:
+                # another process stored the same entry first
+                if not os.path.exists(entry_dir):
+                    raise
+        except OSError as err:
+            if logger:
+                logger.warning(f"Could not add {output_path} to result "
+                               f"cache: {err}")
+            return False
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        if logger:
+            logger.debug(f"Added {output_path} to result cache {entry_dir}")
+
+        # only scan the cache when it may be larger than the size limit
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += size
+            total_bytes = self._total_bytes
+        if total_bytes is None or (self.max_bytes is not None and
+                                   total_bytes > self.max_bytes):
+            self.evict(logger)
+        return True
+
+    def evict(self, logger=None):
+        """! Remove the least recently used entries until the total size of
+             the cache is not larger than max_bytes. The total size is kept
+             so that store only calls this function again when the entries
+             that it adds could make the cache too large. Entries added by
+             other processes are counted the next time the cache is scanned.
+
+             @param logger (optional) logger to output debug information
+             @returns number of entries that were removed
+        """
+        if self.max_bytes is None:
+            return 0
+
+        entries = []
+        total_bytes = 0
+        for entry_dir, size, last_used in self.get_entries():
+            entries.append((last_used, entry_dir, size))
+            total_bytes += size
+
+        num_evicted = 0
+        for _, entry_dir, size in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_bytes -= size
+            num_evicted += 1
+            if logger:
+                logger.debug(f"Removed least recently used result cache "
+                             f"entry {entry_dir}")
+
+        with self._lock:
+            self.num_evicted += num_evicted
+            self._total_bytes = total_bytes
+        return num_evicted
+
+    def get_entries(self):
+        """! Get all complete entries in the cache
+
+             @returns generator of tuples of entry directory, size of cached
+              file in bytes, and time the entry was last used
+        """
+        try:
+            prefix_dirs = list(os.scandir(self.cache_dir))
+        except OSError:
+            return
+
+        for prefix_dir in prefix_dirs:
+            if not prefix_dir.is_dir(follow_symlinks=False):
+                continue
+            try:
+                entry_dirs = list(os.scandir(prefix_dir.path))
+            except OSError:
+                continue
+            for entry_dir in entry_dirs:
+                if entry_dir.name.endswith('.tmp'):
+                    continue
+                manifest_file = os.path.join(entry_dir.path, 'manifest.json')
+                try:
+                    last_used = os.stat(manifest_file).st_mtime_ns
+                    size = os.stat(os.path.join(entry_dir.path,
+                                                'output')).st_size
+                except OSError:
+                    continue
+                yield entry_dir.path, size, last_used
+
+    def _place_file(self, source, destination):
+        """! Link or copy a file to a temporary path next to the destination,
+             then rename it so that a partial file is never seen
+        """
+        tmp_path = get_tmp_path(destination)
+        try:
+            linked = False
+            if self.use_links:
+                try:
+                    os.link(source, tmp_path)
+                    linked = True
+                except OSError:
+                    pass
+            if not linked:
+                shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, destination)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def pop_stats(self):
+        """! Get hit and miss counts and reset them. Used to send counts from
+             a worker process to the main process.
+
+             @returns tuple of hits, misses, bytes restored, and number of
+              entries evicted
+        """
+        with self._lock:
+            stats = (self.hits, self.misses, self.bytes_restored,
+                     self.num_evicted)
+            self.hits = self.misses = self.bytes_restored = 0
+            self.num_evicted = 0
+        return stats
+
+    def merge_stats(self, stats):
+        """! Add counts that were returned by pop_stats
+
+             @param stats tuple of counts from pop_stats
+        """
+        hits, misses, bytes_restored, num_evicted = stats
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.bytes_restored += bytes_restored
+            self.num_evicted += num_evicted
+
+
+def get_tmp_path(path):
+    """! Get path to write a file or directory before it is complete. The
+         process and thread IDs are included so that multiple processes or
+         threads can write the same path at the same time.
+
+         @param path final path
+         @returns path to temporary file in the same directory as path
+    """
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def get_file_identity(path, get_checksum=None):
+    """! Get values that change if the contents of a file change. File lists
+         written by the wrappers are identified by the files that they list,
+         since the list file is written again each run.
+
+         @param path input file
+         @param get_checksum (optional) function that takes the path and
+          os.stat_result of a file and returns a checksum of its contents.
+          If set, the checksum is used instead of the modification time so
+          a file that is written again with the same contents does not
+          change its identity
+         @returns tuple that identifies the file
+    """
+    with open(path, 'rb') as file_handle:
+        first_line = file_handle.readline()
+        if first_line == b'file_list\n':
+            return (path, 'file_list', tuple(
+                get_file_identity(line.decode('utf-8').strip(), get_checksum)
+                for line in file_handle if line.strip()
+            ))
+
+    stat = os.stat(path)
+    if get_checksum is None:
+        return path, stat.st_size, stat.st_mtime_ns
+    return path, stat.st_size, get_checksum(path, stat)
+
+
+def get_env_hash(env):
+    """! Get hash of the environment variables that can change the output of
+         a command
+
+         @param env dictionary of environment variables
+         @returns hex digest string
+    """
+    env_hash = hashlib.sha256()
+    for name in sorted(env):
+        if name in IGNORED_ENV_VARS:
+            continue
+        env_hash.update(repr((name, env[name])).encode('utf-8'))
+    return env_hash.hexdigest()
+
+
+def get_command_files(cmd, output_path=None):
+    """! Get files that are referenced on a command line. Arguments that
+         contain spaces, such as Python embedding commands, are split so
+         that the script and any files passed to it are found.
+
+         @param cmd command string
+         @param output_path (optional) path of output file to exclude
+         @returns list of paths to files that exist in the order they appear
+    """
+    try:
+        args = shlex.split(cmd)
+    except ValueError:
+        args = cmd.split()
+
+    files = []
+    for arg in args:
+        for path in arg.split():
+            path = path.strip('\'"')
+            if (path == output_path or path in files or
+                    not os.path.isfile(path)):
+                continue
+            files.append(path)
+    return files
+
+
+def get_env_files(env, output_path=None):
+    """! Get files that are referenced in the values of environment
+         variables, such as the input file names that are set in a MET
+         config file through an environment variable. Only values that
+         contain a path separator are checked.
+
+         @param env dictionary of environment variables
+         @param output_path (optional) path of output file to exclude
+         @returns list of paths to files that exist in the order they appear
+    """
+    files = []
+    for name in sorted(env):
+        if name in IGNORED_ENV_VARS or os.sep not in str(env[name]):
+            continue
+        for path in re.split(r'[\s"\',;=\[\]{}()]+', str(env[name])):
+            if (os.sep not in path or path == output_path or path in files or
+                    not os.path.isfile(path)):
+                continue
+            files.append(path)
+    return files
+
+
+# caches shared by all wrappers in the run, keyed by cache directory
+_RESULT_CACHES = {}
+_RESULT_CACHES_LOCK = threading.Lock()
+
+
+def get_result_cache(config):
+    """! Get the result cache if it is enabled by the
+         METPLUS_RESULT_CACHE_DIR configuration variable
+
+         @param config METplusConfig object
+         @returns ResultCache object or None if the cache is not enabled
+    """
+    if config is None:
+        return None
+    cache_dir = config.getdir('METPLUS_RESULT_CACHE_DIR', '')
+    if not cache_dir:
+        return None
+
+    max_mb = config.getint('config', 'METPLUS_RESULT_CACHE_MAX_MB', 0)
+    max_bytes = max_mb * BYTES_PER_MB if max_mb and max_mb > 0 else None
+    use_links = config.getbool('config', 'METPLUS_RESULT_CACHE_USE_LINKS',
+                               False)
+    use_checksum = config.getbool('config', 'METPLUS_RESULT_CACHE_CHECKSUM',
+                                  False)
+
+    with _RESULT_CACHES_LOCK:
+        result_cache = _RESULT_CACHES.get(cache_dir)
+        if result_cache is None:
+            result_cache = ResultCache(cache_dir, max_bytes, use_links,
+                                       use_checksum)
+            _RESULT_CACHES[cache_dir] = result_cache
+        else:
+            result_cache.max_bytes = max_bytes
+            result_cache.use_links = use_links
+            result_cache.use_checksum = use_checksum
+    return result_cache
+
+
+def log_result_cache_summary(config):
+    """! Log number of commands that used the result cache if it is enabled
+
+         @param config METplusConfig object
+         @returns tuple of hits and misses or None if the cache is not
+          enabled
+    """
+    result_cache = get_result_cache(config)
+    if result_cache is None:
+        return None
+
+    total = result_cache.hits + result_cache.misses
+    hit_rate = result_cache.hits / total if total else 0.0
+    config.logger.info(f"Result cache: {result_cache.hits} hits, "
+                       f"{result_cache.misses} misses ({hit_rate:.1%} hits), "
+                       f"restored "
+                       f"{result_cache.bytes_restored / BYTES_PER_MB:.1f} MB, "
+                       f"removed {result_cache.num_evicted} least recently "
+                       f"used entries")
+    return result_cache.hits, result_cache.misses
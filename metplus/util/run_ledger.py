@@ -0,0 +1,333 @@
+"""
+Program Name: run_ledger.py
+Contact(s): George McCabe
+Abstract: Record the commands that were run so that a run can be restarted
+ without running commands that already completed
+History Log:  Initial version
+Usage: Call get_run_ledger to obtain the ledger if it is enabled
+Parameters: None
+Input Files: Input files referenced on the command line or environment
+Output Files: SQLite database in LOG_DIR
+"""
+
+import os
+import glob
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+from .result_cache import (get_command_files, get_env_files,
+                           get_file_identity, get_env_hash)
+
+'''!@namespace RunLedger
+@brief Keeps a SQLite database of each command that was run with the
+ identity of its input files, a hash of its environment, its output files,
+ its return code, and how long it took. When the same configuration is run
+ again, commands that completed successfully with the same inputs are not
+ run again, and commands that failed, did not finish, or whose inputs or
+ outputs changed are run again. Nothing is recorded unless METPLUS_RUN_LEDGER
+ is set to True.
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used in other METplus wrappers
+@endcode
+'''
+
+# number of seconds to wait for another process to finish writing
+LOCK_TIMEOUT = 60
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS commands ('
+    ' command_id TEXT PRIMARY KEY,'
+    ' command TEXT NOT NULL,'
+    ' inputs TEXT,'
+    ' inputs_hash TEXT,'
+    ' env_hash TEXT,'
+    ' return_code INTEGER,'
+    ' duration REAL,'
+    ' started TEXT,'
+    ' finished TEXT'
+    ')',
+    'CREATE TABLE IF NOT EXISTS outputs ('
+    ' path TEXT PRIMARY KEY,'
+    ' command_id TEXT NOT NULL,'
+    ' size INTEGER,'
+    ' mtime_ns INTEGER'
+    ')',
+    'CREATE INDEX IF NOT EXISTS outputs_command_id'
+    ' ON outputs (command_id)',
+)
+
+
+class LedgerEntry:
+    """! Information about a command that is about to run that is needed to
+         check and record it in the ledger
+    """
+    def __init__(self, cmd, inputs, inputs_hash, env_hash, output_path=None,
+                 output_pattern=None):
+        """! @param cmd command that is run
+             @param inputs list of identities of input files
+             @param inputs_hash hash of inputs and MET config file contents
+             @param env_hash hash of environment variables
+             @param output_path (optional) path of output file
+             @param output_pattern (optional) wildcard pattern of the output
+              files that the command writes into an output directory if the
+              output file names are not known
+        """
+        self.cmd = cmd
+        self.command_id = hashlib.sha256(cmd.encode('utf-8')).hexdigest()
+        self.inputs = inputs
+        self.inputs_hash = inputs_hash
+        self.env_hash = env_hash
+        self.output_path = output_path
+        self.output_pattern = output_pattern
+        self.start_time = None
+        self.start_ns = None
+        self.end_ns = None
+
+    def set_end_time(self, *args):
+        """! Record the time that the command finished. Arguments are
+             ignored so this can be passed to Future.add_done_callback.
+        """
+        self.end_ns = time.time_ns()
+
+
+class RunLedger:
+    """! SQLite database of commands that were run. Each process opens its
+         own connection, which is shared by its threads.
+    """
+    def __init__(self, db_path):
+        """! @param db_path path to SQLite database file """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def _connect(self):
+        # connections cannot be used by a forked process, so open a new one
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)),
+                        exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path,
+                                               timeout=LOCK_TIMEOUT,
+                                               check_same_thread=False)
+            self._pid = os.getpid()
+            with self._connection:
+                for statement in SCHEMA:
+                    self._connection.execute(statement)
+        return self._connection
+
+    def close(self):
+        """! Close the connection of the current process """
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def get_entry(self, cmd, env, output_path=None, output_pattern=None,
+                  config_file=None):
+        """! Read the identity of the inputs of a command, which are the files
+             referenced on the command line or in the value of an
+             environment variable
+
+             @param cmd command that is run
+             @param env dictionary of environment variables set for the
+              command by the wrapper
+             @param output_path (optional) path of output file
+             @param output_pattern (optional) wildcard pattern of the output
+              files that the command writes into an output directory if the
+              output file names are not known
+             @param config_file (optional) path to MET config file
+             @returns LedgerEntry object or None if an input could not be read
+        """
+        inputs_hash = hashlib.sha256()
+        inputs = []
+        try:
+            if config_file:
+                with open(config_file, 'rb') as file_handle:
+                    inputs_hash.update(file_handle.read())
+
+            input_paths = get_command_files(cmd, output_path)
+            input_paths.extend(path for path in get_env_files(env,
+                                                              output_path)
+                               if path not in input_paths)
+            for input_path in input_paths:
+                identity = get_file_identity(input_path)
+                inputs.append(identity)
+                inputs_hash.update(repr(identity).encode('utf-8'))
+        except OSError:
+            return None
+
+        return LedgerEntry(cmd, inputs, inputs_hash.hexdigest(),
+                           get_env_hash(env), output_path, output_pattern)
+
+    def is_complete(self, entry):
+        """! Check if a command completed successfully with the same inputs
+             and environment and its output files have not changed since
+
+             @param entry LedgerEntry object from get_entry
+             @returns True if the command does not need to run again
+        """
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                'SELECT inputs_hash, env_hash, return_code FROM commands'
+                ' WHERE command_id = ?', (entry.command_id,)
+            ).fetchone()
+            outputs = connection.execute(
+                'SELECT path, size, mtime_ns FROM outputs'
+                ' WHERE command_id = ?', (entry.command_id,)
+            ).fetchall()
+
+        if row is None or row != (entry.inputs_hash, entry.env_hash, 0):
+            return False
+
+        # cannot tell if output is complete if no output was recorded
+        if not outputs:
+            return False
+
+        return all(get_output_identity(path) == (size, mtime_ns)
+                   for path, size, mtime_ns in outputs)
+
+    def has_output(self, path):
+        """! Check if an output file was recorded in the ledger
+
+             @param path output file path
+             @returns True if a command that writes the file was recorded
+        """
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT 1 FROM outputs WHERE path = ?', (path,)
+            ).fetchone()
+        return row is not None
+
+    def start(self, entry):
+        """! Record that a command is starting. A command that does not
+             finish keeps a return code of NULL so it is run again.
+
+             @param entry LedgerEntry object from get_entry
+        """
+        entry.start_time = datetime.now().isoformat(timespec='seconds')
+        entry.start_ns = time.time_ns()
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO commands (command_id, command,'
+                    ' inputs, inputs_hash, env_hash, return_code, duration,'
+                    ' started, finished)'
+                    ' VALUES (?, ?, ?, ?, ?, NULL, NULL, ?, NULL)',
+                    (entry.command_id, entry.cmd, json.dumps(entry.inputs),
+                     entry.inputs_hash, entry.env_hash, entry.start_time)
+                )
+                # record output that is expected so a partial file is not
+                # mistaken for finished output if the command does not finish
+                if entry.output_path:
+                    connection.execute(
+                        'INSERT OR REPLACE INTO outputs (path, command_id,'
+                        ' size, mtime_ns) VALUES (?, ?, NULL, NULL)',
+                        (entry.output_path, entry.command_id)
+                    )
+
+    def finish(self, entry, return_code):
+        """! Record the return code, duration, and output files of a command.
+             The duration is computed from the time set by
+             LedgerEntry.set_end_time, or the current time if it was not set.
+
+             @param entry LedgerEntry object that was passed to start
+             @param return_code return code of the command
+        """
+        end_ns = entry.end_ns or time.time_ns()
+        duration = (end_ns - entry.start_ns) / 1e9
+        # outputs of a failed command are kept without a size so that they
+        # are run again instead of being skipped because they exist
+        outputs = []
+        for path in self.get_output_files(entry):
+            identity = get_output_identity(path)
+            if return_code:
+                identity = (None, None)
+            elif identity is None:
+                continue
+            outputs.append((path, entry.command_id) + identity)
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    'UPDATE commands SET return_code = ?, duration = ?,'
+                    ' finished = ? WHERE command_id = ?',
+                    (return_code, duration,
+                     datetime.now().isoformat(timespec='seconds'),
+                     entry.command_id)
+                )
+                connection.execute('DELETE FROM outputs WHERE command_id = ?',
+                                   (entry.command_id,))
+                connection.executemany(
+                    'INSERT OR REPLACE INTO outputs (path, command_id, size,'
+                    ' mtime_ns) VALUES (?, ?, ?, ?)', outputs
+                )
+
+    @staticmethod
+    def get_output_files(entry):
+        """! Get the output files written by a command. If the output file
+             name is not known, the files that match the output pattern are
+             used, so commands that write into the same output directory
+             only record the files that are named for them.
+
+             @param entry LedgerEntry object that was passed to start
+             @returns list of output file paths
+        """
+        if entry.output_path:
+            return [entry.output_path]
+
+        if not entry.output_pattern:
+            return []
+
+        return sorted(path for path in glob.glob(entry.output_pattern)
+                      if os.path.isfile(path))
+
+
+def get_output_identity(path):
+    """! Get size and modification time of an output file
+
+         @param path output file path
+         @returns tuple of size and modification time in nanoseconds or None
+          if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+# ledgers shared by all wrappers in the run, keyed by database path
+_RUN_LEDGERS = {}
+_RUN_LEDGERS_LOCK = threading.Lock()
+
+
+def get_run_ledger(config):
+    """! Get the run ledger if it is enabled by the METPLUS_RUN_LEDGER
+         configuration variable
+
+         @param config METplusConfig object
+         @returns RunLedger object or None if the ledger is not enabled
+    """
+    if config is None:
+        return None
+    if not config.getbool('config', 'METPLUS_RUN_LEDGER', False):
+        return None
+
+    db_path = config.getstr('config', 'METPLUS_RUN_LEDGER_FILE',
+                            os.path.join(config.getdir('LOG_DIR'),
+                                         'run_ledger.db'))
+    with _RUN_LEDGERS_LOCK:
+        run_ledger = _RUN_LEDGERS.get(db_path)
+        if run_ledger is None:
+            run_ledger = RunLedger(db_path)
+            _RUN_LEDGERS[db_path] = run_ledger
+    return run_ledger
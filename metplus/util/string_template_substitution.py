@@ -14,9 +14,11 @@ Condition codes: Varies
 
 import re
 import datetime
+from functools import lru_cache
 from dateutil.relativedelta import relativedelta
 
 from . import time_util
+from .profile_util import profile_stage
 
 TEMPLATE_IDENTIFIER_BEGIN = "{"
 TEMPLATE_IDENTIFIER_END = "}"
@@ -47,15 +49,11 @@ LENGTH_DICT = {'Y': 4,
 
 MAX_ATTEMPTS = 5
 
-def multiple_replace(replace_dict, text):
-    """Helper function for do_string_sub. Replace in 'text' all occurrences of any key in the
-    given dictionary by its corresponding value.  Returns the new string. """
+# maximum number of parsed templates to keep in memory
+TEMPLATE_CACHE_SIZE = 1024
 
-    # Create a regular expression  from the dictionary keys
-    regex = re.compile("(%s)" % "|".join(map(re.escape, replace_dict.keys())))
-
-    # For each match, look-up corresponding value in dictionary
-    return regex.sub(lambda mo: replace_dict[mo.string[mo.start():mo.end()]], text)
+# regular expression to find inner most tags between nested curly braces
+TAG_REGEX = re.compile(r'(\{[^}{]*\})')
 
 def get_tags(template):
     """!Parse template and pull out all wildcard characters (* or ?) and all
@@ -91,14 +89,15 @@ def format_one_time_item(item, time_str, unit):
     count = item.count(unit)
     if count > 0:
         rest = ''
+        precision_regex, unit_regex = _get_time_item_regexes(unit)
         # get precision from number (%3H)
-        res = re.match(r"^\.*(\d+)"+unit+"(.*)", item)
+        res = precision_regex.match(item)
         if res:
             padding = int(res.group(1))
             rest = res.group(2)
         else:
             padding = count
-            res = re.match("^"+unit+"+(.*)", item)
+            res = unit_regex.match(item)
             if res:
                 rest = res.group(1)
                 if unit != 's':
@@ -110,6 +109,18 @@ def format_one_time_item(item, time_str, unit):
     # return empty string if no match
     return ''
 
+@lru_cache(maxsize=None)
+def _get_time_item_regexes(unit):
+    """!Helper function for format_one_time_item. Compile the regular
+        expressions used to read the precision of a time unit once per unit
+        Args:
+            @param unit time unit, i.e. M or H or S
+        Returns: tuple of compiled regex to match precision (%3H) and
+         compiled regex to match repeated unit letters (%HH)
+    """
+    return (re.compile(r"^\.*(\d+)"+unit+"(.*)"),
+            re.compile("^"+unit+"+(.*)"))
+
 def format_hms(fmt, obj):
     """!Helper function for do_string_sub. For time offset values, get hour, minute, and
         second values to format as necessary
@@ -296,6 +307,7 @@ def handle_format_delimiter(split_string, idx, shift_seconds, truncate_seconds,
 
     return None
 
+@profile_stage('string_sub')
 def do_string_sub(tmpl,
                   skip_missing_tags=False,
                   recurse=False,
@@ -343,18 +355,12 @@ def do_string_sub(tmpl,
         # if recursion is off, only attempt once
         attempt_local = 0
 
-    # find inner most tags between nested curly braces
-    # match_list is a list with the contents being the data between the
-    # curly braces
-    match_list = re.findall(r'\{([^}{]*)\}', tmpl)
+    compiled_template = get_compiled_template(tmpl)
 
-    if len(match_list) == 0:
+    if not compiled_template.has_tags:
         return tmpl
 
-    match_result = find_and_replace_tags_in_template(match_list,
-                                                     tmpl,
-                                                     kwargs,
-                                                     skip_missing_tags)
+    match_result = compiled_template.render(kwargs, skip_missing_tags)
 
     # if no more recursive attempts should be made, return the result
     if attempt_local <= 0:
@@ -365,71 +371,136 @@ def do_string_sub(tmpl,
                          attempt=attempt_local-1,
                          **kwargs)
 
-def find_and_replace_tags_in_template(match_list, tmpl, kwargs, skip_missing_tags=False):
-    """! Loop through tags from template and replace them with the correct time values
-         @param match_list list of tags to process
-         @param template filename template to substitute values into
-         @param kwargs all
-
+class CompiledTemplate:
+    """! Filename template that has been parsed into a list of literal text
+         and tags so that it can be filled in many times without parsing it
+         again. Use get_compiled_template to obtain an instance so that each
+         template is only parsed once.
     """
-    # A dictionary that will contain the string to replace (key)
-    # and the string to replace it with (value)
-    replacement_dict = {}
-    # Search for the FORMATTING_DELIMITER within the first string
-    for match in match_list:
+    def __init__(self, template):
+        self.template = template
+        # list of literal strings and TemplateTag objects in template order
+        self.segments = []
+        for index, segment in enumerate(TAG_REGEX.split(template)):
+            if not segment:
+                continue
+            # odd indices of the split list are the tags
+            if index % 2:
+                self.segments.append(TemplateTag(segment[1:-1]))
+            else:
+                self.segments.append(segment)
+
+        self.has_tags = any(isinstance(segment, TemplateTag)
+                            for segment in self.segments)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.template!r})'
+
+    def render(self, kwargs, skip_missing_tags=False):
+        """! Replace tags with the correct time values
+
+             @param kwargs dictionary of values to substitute into template
+             @param skip_missing_tags if True, leave tags that are not found
+              in kwargs in the output. If False, raise TypeError
+             @returns template with tags substituted with values
+        """
+        output = []
+        for segment in self.segments:
+            if not isinstance(segment, TemplateTag):
+                output.append(segment)
+                continue
 
-        string_to_replace = TEMPLATE_IDENTIFIER_BEGIN + match + \
-                            TEMPLATE_IDENTIFIER_END
-        split_string = match.split(FORMATTING_DELIMITER)
+            if segment.key not in kwargs:
+                # if skip_missing_tags is True, leave template tag if key was not found
+                if skip_missing_tags:
+                    output.append(segment.text)
+                    continue
 
-        # valid, init, lead, etc.
-        # print split_string[0]
-        # value e.g. 2016012606, 3
+                # otherwise log and exit
+                raise TypeError("The key " + segment.key +
+                                " was not passed to do_string_sub " +
+                                " for template: " + self.template + ": " +
+                                str(kwargs))
 
-        # split_string[0] holds the key (e.g. "init", "valid", etc)
-        if split_string[0] not in kwargs.keys():
-            # if skip_missing_tags is True, leave template tag if key was not found
-            if skip_missing_tags:
-                continue
+            output.append(segment.render(kwargs))
 
-            # otherwise log and exit
-            raise TypeError("The key " + split_string[0] +
-                            " was not passed to do_string_sub " +
-                            " for template: " + tmpl + ": " + str(kwargs))
+        return ''.join(output)
 
-        # if shift is set, get that value before handling formatting
-        shift_seconds = get_seconds_from_template(split_string, SHIFT_STRING, kwargs)
+class TemplateTag:
+    """! Single tag from a filename template, i.e. {init?fmt=%Y%m%d?shift=1H}.
+         The tag is split into its key and formatting items when it is created.
+    """
+    def __init__(self, tag_content):
+        self.text = (TEMPLATE_IDENTIFIER_BEGIN + tag_content +
+                     TEMPLATE_IDENTIFIER_END)
+        self.split_string = tag_content.split(FORMATTING_DELIMITER)
 
-        # if truncate is set, get that value before handling formatting
-        truncate_seconds = get_seconds_from_template(split_string, TRUNCATE_STRING, kwargs)
+        # valid, init, lead, etc.
+        self.key = self.split_string[0]
 
-        # format times appropriately and add to replacement_dict
-        formatted = False
-        for idx, split_item in enumerate(split_string):
+        # index of the last format item, which determines the output
+        self.format_index = None
+        for idx, split_item in enumerate(self.split_string):
             if split_item.startswith(FORMAT_STRING):
-                replacement_dict[string_to_replace] = \
-                    handle_format_delimiter(split_string,
-                                            idx,
-                                            shift_seconds,
-                                            truncate_seconds,
-                                            kwargs)
-                formatted = True
+                self.format_index = idx
+
+        # compute shift and truncate values now if they do not depend on
+        # the valid time, i.e. if they do not contain months or years
+        self.shift_seconds = self._get_fixed_seconds(SHIFT_STRING)
+        self.truncate_seconds = self._get_fixed_seconds(TRUNCATE_STRING)
+
+    def _get_fixed_seconds(self, element_name):
+        try:
+            return get_seconds_from_template(self.split_string,
+                                             element_name,
+                                             {})
+        except (TypeError, ValueError, AttributeError):
+            # value requires valid time to compute or is invalid, so
+            # compute it (and report any errors) when the tag is filled in
+            return None
+
+    def _get_seconds(self, seconds, element_name, kwargs):
+        if seconds is not None:
+            return seconds
+        return get_seconds_from_template(self.split_string,
+                                         element_name,
+                                         kwargs)
 
+    def render(self, kwargs):
+        """! Get formatted value of tag
+
+             @param kwargs dictionary of values to substitute into template
+             @returns formatted value
+        """
         # No formatting or length is requested
-        if not formatted:
-            # Add back the template identifiers to the matched
-            # string to replace and add the key, value pair to the
-            # dictionary
-            value = kwargs.get(split_string[0], None)
+        if self.format_index is None:
+            value = kwargs.get(self.key, None)
             if isinstance(value, int):
                 value = f"{value}S"
-            replacement_dict[string_to_replace] = value
-
-    # Replace regex with properly formatted information
-    if not replacement_dict:
-        return tmpl
-
-    return multiple_replace(replacement_dict, tmpl)
+            return value
+
+        # if shift or truncate is set, get the value before formatting
+        shift_seconds = self._get_seconds(self.shift_seconds,
+                                          SHIFT_STRING,
+                                          kwargs)
+        truncate_seconds = self._get_seconds(self.truncate_seconds,
+                                             TRUNCATE_STRING,
+                                             kwargs)
+        return handle_format_delimiter(self.split_string,
+                                       self.format_index,
+                                       shift_seconds,
+                                       truncate_seconds,
+                                       kwargs)
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def get_compiled_template(template):
+    """! Get parsed template object. The most recently used templates are
+         cached so a template that is filled in many times is only parsed once.
+
+         @param template filename template to parse
+         @returns CompiledTemplate object
+    """
+    return CompiledTemplate(template)
 
 def parse_template(template, filepath, logger=None):
     """!Extract time information from path using the filename template
@@ -438,7 +509,12 @@ def parse_template(template, filepath, logger=None):
              @param filepath path to examine
              @returns time_info dictionary with time information if successful, None if not"""
 
-    match_dict, valid_shift = populate_match_dict(template, filepath, logger)
+    template_regex = get_template_regex(template)
+    if template_regex is None:
+        match_dict, valid_shift = populate_match_dict(template, filepath, logger)
+    else:
+        match_dict, valid_shift = template_regex.match(filepath)
+
     if match_dict is None:
         return None
 
@@ -458,6 +534,161 @@ def parse_template(template, filepath, logger=None):
 
     return time_info
 
+class TemplateRegex:
+    """! Filename template converted into regular expressions that extract
+         the same information as populate_match_dict with a single match.
+         The text before and after all tags is matched first, then the text
+         in between is matched against a regular expression built from the
+         tags. Each time value is captured in a named group. Repeated time
+         values must be equal, i.e. {valid?fmt=%Y}/{valid?fmt=%Y%m%d}.
+         Raises TypeError or ValueError if the template cannot be converted.
+    """
+    def __init__(self, template):
+        self.template = template
+
+        # get the text before any tags, between tags, and after any tags
+        match = re.match(r'([^{]*)({.*})([^}]*)', template)
+        if not match:
+            raise ValueError(f'No tags found in template: {template}')
+
+        pre_text, all_tags, post_text = match.groups()
+        self.outer_regex = re.compile(re.escape(pre_text) + '(.*)' +
+                                      re.escape(post_text) + r'\Z',
+                                      re.DOTALL)
+
+        # list of tuples containing group name and match dictionary key,
+        # i.e. ('g0', 'init+Y')
+        self.groups = []
+        self.num_storm_ids = 0
+        self.valid_shift = 0
+        pieces = []
+        for tag_content, extra_text in re.findall(r'{(.*?)}([^{]*)', all_tags):
+            pieces.append(self._get_tag_regex(tag_content, extra_text))
+            pieces.append(re.escape(extra_text))
+
+        self.inner_regex = re.compile(''.join(pieces), re.DOTALL)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.template!r})'
+
+    def _add_group(self, key):
+        name = f'g{len(self.groups)}'
+        self.groups.append((name, key))
+        return name
+
+    def _get_tag_regex(self, tag_content, extra_text):
+        identifier, *sections = tag_content.split('?')
+
+        # storm ID is all text up to the first occurrence of the text that
+        # follows the tag. A lookahead is used so the match is not extended
+        # past the first occurrence
+        if identifier == 'storm_id':
+            if not extra_text:
+                return ''
+            self.num_storm_ids += 1
+            name = f's{self.num_storm_ids}'
+            return f'(?=(?P<{name}>.*?){re.escape(extra_text)})(?P={name})'
+
+        tag_regex = ''
+        num_formats = 0
+        for section in sections:
+            element_name, element_value = section.split('=')
+            if element_name == FORMAT_STRING:
+                num_formats += 1
+                tag_regex = self._get_fmt_regex(element_value, identifier)
+            elif element_name == SHIFT_STRING:
+                # don't allow shift on any identifier except valid
+                if identifier != VALID_STRING:
+                    raise TypeError(f'Cannot apply a shift to {identifier}')
+
+                shift = int(time_util.get_seconds_from_string(element_value,
+                                                              default_unit='S'))
+                if self.valid_shift not in (0, shift):
+                    raise TypeError('Found multiple shifts for valid time')
+
+                self.valid_shift = shift
+
+        # each format item is read from the same text, which cannot be
+        # expressed as a single sequence of groups
+        if num_formats > 1:
+            raise ValueError(f'Multiple formats found in {tag_content}')
+
+        return tag_regex
+
+    def _get_fmt_regex(self, fmt, identifier):
+        """! Build regular expression for format items. See get_fmt_info """
+        fmt_regex = ''
+        for time_number, letters in re.findall(r'%\.?(\d*)([^%]+)', fmt):
+            time_letter = letters[0]
+            if time_letter not in LENGTH_DICT:
+                raise ValueError(f'Unsupported format item: {letters}')
+
+            new_len = LENGTH_DICT[time_letter]
+            match_len = re.match(r'([' + time_letter + ']+)(.*)', letters)
+            time_letter_count = len(match_len.group(1))
+            extra_len = len(match_len.group(2))
+            if time_letter_count > 1:
+                if time_number:
+                    raise ValueError(f'Invalid format item: {letters}')
+                new_len = time_letter_count
+            elif time_number and int(time_number) != new_len:
+                new_len = int(time_number)
+
+            name = self._add_group(identifier + '+' + time_letter)
+
+            # lead or level hours read all consecutive digits. A lookahead
+            # is used so the match does not give back digits to later items
+            if letters == 'H' and identifier in ('lead', 'level'):
+                fmt_regex += rf'(?=(?P<{name}>\d+))(?P={name})'
+            elif new_len < 1:
+                raise ValueError(f'Invalid format item: {letters}')
+            else:
+                fmt_regex += rf'(?P<{name}>\d{{{new_len}}})'
+
+            # any characters that follow the time letters are skipped
+            if extra_len:
+                fmt_regex += f'.{{{extra_len}}}'
+
+        return fmt_regex
+
+    def match(self, filepath):
+        """! Extract time information from file path
+
+             @param filepath path to examine
+             @returns tuple of match dictionary and valid shift value (see
+              populate_match_dict) or (None, None) if the path does not match
+        """
+        outer_match = self.outer_regex.match(filepath)
+        if not outer_match:
+            return None, None
+
+        inner_match = self.inner_regex.match(outer_match.group(1))
+        if not inner_match:
+            return None, None
+
+        match_dict = {}
+        for name, key in self.groups:
+            value = inner_match.group(name)
+            if not add_to_dict(key, match_dict, value, len(value)):
+                return None, None
+
+        return match_dict, self.valid_shift
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def get_template_regex(template):
+    """! Get template converted to regular expressions used to extract time
+         information from file paths. The result is cached so each template
+         is only converted once.
+
+         @param template filename template
+         @returns TemplateRegex object or None if template cannot be
+          converted and populate_match_dict should be used instead
+    """
+    try:
+        return TemplateRegex(template)
+    except (TypeError, ValueError):
+        return None
+
 def populate_match_dict(template, filepath, logger=None):
     """! Use template to extract time information from filepath, add each value to a dictionary.
          Populates a dictionary with keys that contain tag name + time type, i.e. init+Y,
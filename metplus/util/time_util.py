@@ -10,6 +10,8 @@ Output Files: N/A
 """
 
 import datetime
+import functools
+from collections.abc import MutableMapping
 from dateutil.relativedelta import relativedelta
 import re
 
@@ -413,3 +415,313 @@ def ti_calculate(input_dict_preserve):
     out_dict['lead_seconds'] = total_seconds
 
     return out_dict
+
+def _get_fixed_lead_seconds(lead):
+    """! Get number of seconds in forecast lead if it is a fixed amount of
+         time that can be added to many times at once
+
+         @param lead forecast lead as integer seconds or relativedelta
+         @returns integer seconds or None if lead is a wildcard or contains
+          months, years, or absolute values
+    """
+    if isinstance(lead, int) and not isinstance(lead, bool):
+        return lead
+
+    if not isinstance(lead, relativedelta):
+        return None
+
+    if (lead.months or lead.years or lead.microseconds or lead.weekday or
+            any(value is not None for value in (lead.year, lead.month,
+                                                lead.day, lead.hour,
+                                                lead.minute, lead.second,
+                                                lead.microsecond))):
+        return None
+
+    return ti_get_seconds_from_relativedelta(lead)
+
+@functools.lru_cache(maxsize=None)
+def _get_numpy():
+    """! Import numpy, which is used to compute many time dictionaries at
+         once if it is available. It is imported the first time it is needed
+         because it is slow to import and many runs never need it.
+
+         @returns numpy module or None if it is not available
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def _format_datetime64(times):
+    """! Format array of datetime64 values as YYYYMMDDHHMMSS strings
+
+         @param times numpy array of datetime64[s] values
+         @returns numpy array of strings
+    """
+    numpy = _get_numpy()
+    # format is YYYY-MM-DDTHH:MM:SS, so remove the separators from each
+    iso_strings = numpy.datetime_as_string(times, unit='s').astype('U19')
+    characters = iso_strings.view('U1').reshape(-1, 19)
+    digits = numpy.ascontiguousarray(
+        characters[:, [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]]
+    )
+    return digits.view('U14').ravel()
+
+class TimeTable:
+    """! Time information for many run times computed at once. Each row
+         corresponds to a run time and forecast lead. Columns are stored
+         as numpy arrays and each row is available as a TimeInfo object,
+         which behaves like the dictionary returned by ti_calculate.
+         Rows that cannot be computed with fixed offsets, i.e. wildcard leads
+         or leads with months or years, are computed with ti_calculate.
+         If numpy is not available, every row is computed with ti_calculate.
+    """
+    def __init__(self, times, leads, loop_by='init', input_dict=None):
+        """! @param times list of datetime objects of init or valid times
+             @param leads list of forecast leads (integer seconds,
+              relativedelta, or '*') with the same length as times
+             @param loop_by 'init' if times are init times or 'valid' if
+              they are valid times
+             @param input_dict (optional) dictionary of other items to pass
+              to ti_calculate for each row, i.e. now, instance, or offset
+        """
+        if len(times) != len(leads):
+            raise ValueError('Number of times and leads must be the same')
+        if loop_by not in ('init', 'valid'):
+            raise ValueError(f'Invalid loop_by value: {loop_by}')
+
+        self.times = list(times)
+        self.leads = list(leads)
+        self.loop_by = loop_by
+        self.input_dict = dict(input_dict) if input_dict else {}
+        self.input_dict.pop('init', None)
+        self.input_dict.pop('valid', None)
+        self.input_dict.pop('da_init', None)
+        self.input_dict.pop('lead', None)
+
+        # rows that must be computed with ti_calculate
+        self.fallback_rows = set()
+
+        # items that are the same for every row
+        self._common_items = {}
+        if 'now' in self.input_dict:
+            self._common_items['now'] = self.input_dict['now']
+            self._common_items['today'] = (
+                self.input_dict['now'].strftime('%Y%m%d')
+            )
+        for key in ('custom', 'instance'):
+            if key in self.input_dict:
+                self._common_items[key] = self.input_dict[key]
+
+        if 'offset_hours' in self.input_dict:
+            self._offset_seconds = int(self.input_dict['offset_hours'] * 3600)
+        else:
+            self._offset_seconds = int(self.input_dict.get('offset', 0))
+        self._columns = None
+
+        self.init = None
+        self.valid = None
+        self.da_init = None
+        self.lead_seconds = None
+        self.init_fmt = None
+        self.valid_fmt = None
+        self.da_init_fmt = None
+        self.lead_string = None
+
+        if _get_numpy() is None:
+            self.fallback_rows = set(range(len(self.times)))
+            return
+
+        self._compute_columns()
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('TimeTable index out of range')
+        return TimeInfo(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield TimeInfo(self, index)
+
+    def _compute_columns(self):
+        numpy = _get_numpy()
+        # placeholder values for rows that are computed with ti_calculate
+        fill_time = datetime.datetime(1970, 1, 1)
+        lead_list = []
+        time_list = []
+        for index, (loop_time, lead) in enumerate(zip(self.times,
+                                                      self.leads)):
+            seconds = _get_fixed_lead_seconds(lead)
+            if (seconds is None or
+                    not isinstance(loop_time, datetime.datetime) or
+                    loop_time.tzinfo is not None or
+                    loop_time.microsecond):
+                self.fallback_rows.add(index)
+                seconds = 0
+                loop_time = fill_time
+            lead_list.append(seconds)
+            time_list.append(loop_time)
+
+        # convert each unique time once since times repeat for each lead
+        unique_times = {}
+        time_indices = [unique_times.setdefault(loop_time, len(unique_times))
+                        for loop_time in time_list]
+        times = numpy.array(list(unique_times),
+                            dtype='datetime64[s]')[time_indices]
+        lead_seconds = numpy.array(lead_list, dtype='int64')
+        leads = lead_seconds.astype('timedelta64[s]')
+        if self.loop_by == 'init':
+            self.init = times
+            self.valid = times + leads
+        else:
+            self.valid = times
+            self.init = times - leads
+
+        offset = numpy.timedelta64(self._offset_seconds, 's')
+        self.da_init = self.valid + offset
+        self.lead_seconds = lead_seconds
+
+        self.init_fmt = _format_datetime64(self.init)
+        self.valid_fmt = _format_datetime64(self.valid)
+        self.da_init_fmt = _format_datetime64(self.da_init)
+
+        # compute lead string once for each unique lead
+        unique_leads, lead_indices = numpy.unique(lead_seconds,
+                                                  return_inverse=True)
+        unique_strings = [ti_get_lead_string(relativedelta(seconds=int(lead)))
+                          for lead in unique_leads]
+        self.lead_string = [unique_strings[index]
+                            for index in lead_indices.ravel()]
+
+        # python objects used to build the dictionary for each row, which
+        # is much faster than reading each item from the numpy arrays
+        self._columns = (self.init.tolist(),
+                         self.valid.tolist(),
+                         self.da_init.tolist(),
+                         self.lead_seconds.tolist(),
+                         self.init_fmt.tolist(),
+                         self.valid_fmt.tolist(),
+                         self.da_init_fmt.tolist())
+
+    def get_input_dict(self, index):
+        """! Get input dictionary that ti_calculate would use for a row
+
+             @param index row number
+             @returns dictionary
+        """
+        input_dict = self.input_dict.copy()
+        input_dict[self.loop_by] = self.times[index]
+        input_dict['lead'] = self.leads[index]
+        return input_dict
+
+    def get_dict(self, index):
+        """! Get time information for a row
+
+             @param index row number
+             @returns dictionary that matches the output of ti_calculate
+        """
+        if index in self.fallback_rows:
+            return ti_calculate(self.get_input_dict(index))
+
+        (init, valid, da_init, lead_seconds,
+         init_fmt, valid_fmt, da_init_fmt) = (column[index]
+                                              for column in self._columns)
+
+        out_dict = self._common_items.copy()
+        out_dict['lead'] = lead_seconds
+        out_dict['offset'] = self._offset_seconds
+
+        if self.loop_by == 'init':
+            out_dict['init'] = init
+            out_dict['valid'] = valid
+        else:
+            out_dict['valid'] = valid
+            out_dict['init'] = init
+        out_dict['loop_by'] = self.loop_by
+
+        out_dict['da_init'] = da_init
+        out_dict['da_init_fmt'] = da_init_fmt
+        out_dict['valid_fmt'] = valid_fmt
+        out_dict['init_fmt'] = init_fmt
+        out_dict['lead_string'] = self.lead_string[index]
+        out_dict['offset_hours'] = self._offset_seconds // 3600
+        out_dict['date'] = out_dict['da_init']
+        out_dict['cycle'] = out_dict['da_init']
+        out_dict['lead_hours'] = int(lead_seconds // 3600)
+        out_dict['lead_minutes'] = int(lead_seconds // 60)
+        out_dict['lead_seconds'] = lead_seconds
+        return out_dict
+
+class TimeInfo(MutableMapping):
+    """! Time information for one row of a TimeTable. The dictionary is only
+         created when an item is first accessed. Behaves like the dictionary
+         returned by ti_calculate, i.e. values can be read, set, or copied.
+    """
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+        self._data = None
+
+    def _get_data(self):
+        if self._data is None:
+            self._data = self._table.get_dict(self._index)
+        return self._data
+
+    def __getitem__(self, key):
+        return self._get_data()[key]
+
+    def __setitem__(self, key, value):
+        self._get_data()[key] = value
+
+    def __delitem__(self, key):
+        del self._get_data()[key]
+
+    def __iter__(self):
+        return iter(self._get_data())
+
+    def __len__(self):
+        return len(self._get_data())
+
+    def __repr__(self):
+        return repr(self._get_data())
+
+    def copy(self):
+        """! @returns copy of time information as a dictionary """
+        return self._get_data().copy()
+
+def ti_calculate_table(times, leads, loop_by='init', input_dict=None):
+    """! Compute time information for many run times at once. See TimeTable.
+
+         @param times list of datetime objects of init or valid times
+         @param leads list of forecast leads with the same length as times
+         @param loop_by 'init' if times are init times or 'valid' if
+          they are valid times
+         @param input_dict (optional) dictionary of other items to pass to
+          ti_calculate for each row, i.e. now, instance, or offset
+         @returns TimeTable object
+    """
+    return TimeTable(times, leads, loop_by=loop_by, input_dict=input_dict)
+
+def ti_calculate_grid(times, leads, loop_by='init', input_dict=None):
+    """! Compute time information for every combination of run time and
+         forecast lead. Rows are ordered by time, then by lead.
+
+         @param times list of datetime objects of init or valid times
+         @param leads list of forecast leads to apply to each time
+         @param loop_by 'init' if times are init times or 'valid' if
+          they are valid times
+         @param input_dict (optional) dictionary of other items to pass to
+          ti_calculate for each row, i.e. now, instance, or offset
+         @returns TimeTable object
+    """
+    leads = list(leads)
+    all_times = [loop_time for loop_time in times for _ in leads]
+    all_leads = leads * (len(all_times) // len(leads)) if leads else []
+    return ti_calculate_table(all_times, all_leads, loop_by=loop_by,
+                              input_dict=input_dict)
@@ -1,9 +1,7 @@
 from os import environ
-from inspect import isclass
-from pkgutil import iter_modules
-from pathlib import Path
 from importlib import import_module
 from ..util.metplus_check import plot_wrappers_are_enabled
+from ..util.met_util import camel_to_underscore
 
 # these wrappers should not be imported if plotting is disabled
 plotting_wrappers = [
@@ -12,33 +10,51 @@ plotting_wrappers = [
     'make_plots_wrapper',
 ]
 
-# import classes that other wrappers import
-parent_classes = {
-    'command_builder': 'CommandBuilder',
-    'reformat_gridded_wrapper': 'ReformatGriddedWrapper',
-    'compare_gridded_wrapper': 'CompareGriddedWrapper',
-    'regrid_data_plane_wrapper': 'RegridDataPlaneWrapper',
-    'runtime_freq_wrapper': 'RuntimeFreqWrapper',
-}
-
-for module_name, attribute_name in parent_classes.items():
-    module = import_module(f"{__name__}.{module_name}")
-    attribute = getattr(module, attribute_name)
-    globals()[attribute_name] = attribute
+def get_wrapper_module_name(attribute_name):
+    """! Get the name of the module in this package that defines a class.
+         Each wrapper class is defined in a module named after the class,
+         i.e. GridStatWrapper is in grid_stat_wrapper.
+
+         @param attribute_name name of the class
+         @returns name of module or None if the name is not a wrapper class
+    """
+    if (attribute_name != 'CommandBuilder' and
+            not attribute_name.endswith('Wrapper')):
+        return None
+
+    return camel_to_underscore(attribute_name)
 
-# iterate through the modules in the current package
-package_dir = str(Path(__file__).resolve().parent)
-for (_, module_name, _) in iter_modules([package_dir]):
+def __getattr__(attribute_name):
+    """! Import the module that defines a wrapper class the first time the
+         class is accessed so that only the wrappers that are used are
+         imported (PEP 562). run_metplus imports each wrapper in the
+         PROCESS_LIST directly, so the other wrappers and the packages they
+         depend on are never imported.
 
-    # skip import of plot wrappers if they are not enabled
-    if not plot_wrappers_are_enabled(environ) and module_name in plotting_wrappers:
-        continue
+         @param attribute_name name of the class, i.e. GridStatWrapper
+         @returns class
+         @throws AttributeError if the class is not found
+    """
+    module_name = get_wrapper_module_name(attribute_name)
+    if module_name is None or (module_name in plotting_wrappers and
+                               not plot_wrappers_are_enabled(environ)):
+        raise AttributeError(f"module {__name__!r} has no attribute "
+                             f"{attribute_name!r}")
 
-    # import the module and iterate through its attributes
-    module = import_module(f"{__name__}.{module_name}")
-    for attribute_name in dir(module):
+    try:
+        module = import_module(f"{__name__}.{module_name}")
+    except ModuleNotFoundError as err:
+        if err.name != f"{__name__}.{module_name}":
+            raise
+        raise AttributeError(f"module {__name__!r} has no attribute "
+                             f"{attribute_name!r}") from None
+
+    try:
         attribute = getattr(module, attribute_name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute "
+                             f"{attribute_name!r}") from None
 
-        if isclass(attribute) and attribute_name not in globals() and attribute_name.endswith("Wrapper"):
-            # Add the class to this package's variables
-            globals()[attribute_name] = attribute
+    # Add the class to this package's variables so it is only looked up once
+    globals()[attribute_name] = attribute
+    return attribute
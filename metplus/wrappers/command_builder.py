@@ -16,11 +16,17 @@ from datetime import datetime
 from abc import ABCMeta
 from inspect import getframeinfo, stack
 import re
+from concurrent.futures import Future
 
 from .command_runner import CommandRunner
 from ..util import met_util as util
 from ..util import do_string_sub, ti_calculate, get_seconds_from_string
 from ..util import config_metplus
+from ..util.file_index import get_file_index, get_file_valid_times
+from ..util.profile_util import get_run_profile, get_process_name
+from ..util.profile_util import profile_stage
+from ..util.result_cache import get_result_cache
+from ..util.run_ledger import get_run_ledger
 from ..util import METConfigInfo as met_config
 
 # pylint:disable=pointless-string-statement
@@ -55,10 +61,24 @@ class CommandBuilder:
         self.input_dir = ""
         self.infiles = []
         self.outdir = ""
+        # wildcard pattern of files written to outdir, i.e. grid_stat_*
+        self.outdir_pattern = ""
         self.outfile = ""
         self.param = ""
         self.all_commands = []
 
+        # commands that were started in the background with run_command
+        # that have not been checked with wait_for_commands
+        self.queued_commands = []
+
+        # key is future of a queued command, value is tuple of result cache
+        # key and output path to store when the command succeeds
+        self.queued_cache_entries = {}
+
+        # key is future of a queued command, value is run ledger entry to
+        # record when the command finishes
+        self.queued_ledger_entries = {}
+
         # store values to set in environment variables for each command
         self.env_var_dict = {}
 
@@ -86,12 +106,26 @@ class CommandBuilder:
         # override config if any were supplied
         self.override_config(config_overrides)
 
+        # in-memory index of input directory listings, None if disabled
+        self.file_index = get_file_index(self.config)
+
+        # cache of output from commands that were already run, None if
+        # disabled
+        self.result_cache = get_result_cache(self.config)
+
+        # record of commands that completed in previous runs, None if
+        # disabled
+        self.run_ledger = get_run_ledger(self.config)
+
         self.env = os.environ.copy()
         if hasattr(config, 'env'):
             self.env = config.env
 
         # populate c_dict dictionary
-        self.c_dict = self.create_c_dict()
+        profile = get_run_profile()
+        with profile.context(wrapper=get_process_name(self)):
+            with profile.stage('config'):
+                self.c_dict = self.create_c_dict()
 
         # if wrapper has a config file, read MET config overrides variable
         if 'CONFIG_FILE' in self.c_dict:
@@ -205,10 +239,12 @@ class CommandBuilder:
         self.input_dir = ""
         self.infiles = []
         self.outdir = ""
+        self.outdir_pattern = ""
         self.outfile = ""
         self.param = ""
         self.env_list.clear()
 
+    @profile_stage('set_environment')
     def set_environment_variables(self, time_info=None):
         """!Set environment variables that will be read set when running this tool.
             This tool does not have a config file, but environment variables may still
@@ -561,6 +597,7 @@ class CommandBuilder:
 
         return None, time_info
 
+    @profile_stage('find_files')
     def find_data(self, time_info, var_info=None, data_type='', mandatory=True,
                   return_list=False, allow_dir=False):
         """! Finds the data file to compare
@@ -618,6 +655,7 @@ class CommandBuilder:
         # if looking for a file within a time window:
         return self.find_file_in_window(**arg_dict)
 
+    @profile_stage('find_files')
     def find_exact_file(self, level, data_type, time_info, mandatory=True,
                         return_list=False, allow_dir=False):
         input_template = self.c_dict.get(f'{data_type}INPUT_TEMPLATE', '')
@@ -668,7 +706,10 @@ class CommandBuilder:
             # if wildcard expression, get all files that match
             if '?' in full_path or '*' in full_path:
 
-                wildcard_files = sorted(glob.glob(full_path))
+                if self.file_index:
+                    wildcard_files = sorted(self.file_index.glob(full_path))
+                else:
+                    wildcard_files = sorted(glob.glob(full_path))
                 self.logger.debug(f'Wildcard file pattern: {full_path}')
                 self.logger.debug(f'{str(len(wildcard_files))} files '
                                   'match pattern')
@@ -705,19 +746,21 @@ class CommandBuilder:
 
             return None
 
-        for file_path in check_file_list:
-            # if file doesn't need to exist, skip check
-            if not self.c_dict.get('INPUT_MUST_EXIST', True):
-                found_file_list.append(file_path)
-                continue
-
-            # check if file exists
-            input_data_type = self.c_dict.get(data_type + 'INPUT_DATATYPE', '')
-            processed_path = util.preprocess_file(file_path,
-                                                  input_data_type,
-                                                  self.config,
-                                                  allow_dir=allow_dir)
-
+        # if file doesn't need to exist, skip check
+        if not self.c_dict.get('INPUT_MUST_EXIST', True):
+            found_file_list.extend(check_file_list)
+            check_file_list = []
+
+        # check if files exist, uncompressing or converting them if needed
+        input_data_type = self.c_dict.get(data_type + 'INPUT_DATATYPE', '')
+        processed_paths = util.preprocess_files(check_file_list,
+                                                input_data_type,
+                                                self.config,
+                                                allow_dir=allow_dir,
+                                                file_index=self.file_index)
+
+        for file_path, processed_path in zip(check_file_list,
+                                             processed_paths):
             # report error if file path could not be found
             if not processed_path:
                 msg = (f"Could not find {data_type}INPUT file {file_path} "
@@ -741,6 +784,7 @@ class CommandBuilder:
 
         return found_file_list
 
+    @profile_stage('find_files')
     def find_file_in_window(self, level, data_type, time_info, mandatory=True,
                             return_list=False):
         template = self.c_dict[f'{data_type}INPUT_TEMPLATE']
@@ -769,40 +813,34 @@ class CommandBuilder:
             self.log_error('Must set INPUT_DIR if looking for files within a time window')
             return None
 
-        # step through all files under input directory in sorted order
-        for dirpath, _, all_files in os.walk(data_dir):
-            for filename in sorted(all_files):
-                fullpath = os.path.join(dirpath, filename)
-
-                # remove input data directory to get relative path
-                rel_path = fullpath.replace(f'{data_dir}/', "")
-                # extract time information from relative path using template
-                file_time_info = util.get_time_from_file(rel_path, template, self.logger)
-                if file_time_info is None:
-                    continue
-
-                # get valid time and check if it is within the time range
-                file_valid_time = file_time_info['valid'].strftime("%Y%m%d%H%M%S")
-                # skip if could not extract valid time
-                if not file_valid_time:
-                    continue
-                file_valid_dt = datetime.strptime(file_valid_time, "%Y%m%d%H%M%S")
-                file_valid_seconds = int(file_valid_dt.strftime("%s"))
-                # skip if outside time range
-                if file_valid_seconds < lower_limit or file_valid_seconds > upper_limit:
-                    continue
-
-                # if only 1 file is allowed, check if file is
-                # closer to desired valid time than previous match
-                if not self.c_dict.get('ALLOW_MULTIPLE_FILES', False):
-                    diff = abs(valid_seconds - file_valid_seconds)
-                    if diff < closest_time:
-                        closest_time = diff
-                        del closest_files[:]
-                        closest_files.append(fullpath)
-                # if multiple files are allowed, get all files within range
-                else:
+        # get files under input directory with valid times within range
+        if self.file_index:
+            valid_time_index = (
+                self.file_index.get_valid_time_index(data_dir, template,
+                                                     self.logger)
+            )
+            file_valid_times = valid_time_index.find(lower_limit, upper_limit)
+        else:
+            file_valid_times = [
+                (file_valid_seconds, fullpath)
+                for file_valid_seconds, fullpath
+                in get_file_valid_times(os.walk(data_dir), data_dir, template,
+                                        self.logger)
+                if lower_limit <= file_valid_seconds <= upper_limit
+            ]
+
+        for file_valid_seconds, fullpath in file_valid_times:
+            # if only 1 file is allowed, check if file is
+            # closer to desired valid time than previous match
+            if not self.c_dict.get('ALLOW_MULTIPLE_FILES', False):
+                diff = abs(valid_seconds - file_valid_seconds)
+                if diff < closest_time:
+                    closest_time = diff
+                    del closest_files[:]
                     closest_files.append(fullpath)
+            # if multiple files are allowed, get all files within range
+            else:
+                closest_files.append(fullpath)
 
         if not closest_files:
             msg = f"Could not find {data_type}INPUT files under {data_dir} within range " +\
@@ -819,17 +857,14 @@ class CommandBuilder:
         if len(closest_files) == 1 and not return_list:
             return util.preprocess_file(closest_files[0],
                                         self.c_dict.get(data_type + 'INPUT_DATATYPE', ''),
-                                        self.config)
+                                        self.config,
+                                        file_index=self.file_index)
 
         # return list if multiple files are found
-        out = []
-        for close_file in closest_files:
-            outfile = util.preprocess_file(close_file,
-                                           self.c_dict.get(data_type + 'INPUT_DATATYPE', ''),
-                                           self.config)
-            out.append(outfile)
-
-        return out
+        return util.preprocess_files(closest_files,
+                                     self.c_dict.get(data_type + 'INPUT_DATATYPE', ''),
+                                     self.config,
+                                     file_index=self.file_index)
 
     def write_list_file(self, filename, file_list, output_dir=None):
         """! Writes a file containing a list of filenames to the staging dir
@@ -837,19 +872,27 @@ class CommandBuilder:
             @param filename name of ascii file to write
             @param file_list list of files to write to ascii file
             @param output_dir (Optional) directory to write files. If None,
-             ascii files are written to {STAGING_DIR}/file_lists
+             ascii files are written to {STAGING_DIR}/file_lists, or
+             {STAGING_DIR}/file_lists/<process ID> if
+             METPLUS_PARALLEL_WORKERS is greater than 1
             @returns path to output file
         """
         if output_dir is None:
             list_dir = os.path.join(self.config.getdir('STAGING_DIR'),
                                     'file_lists')
+            # some list file names do not depend on the run time, so use a
+            # directory for each process if run times are processed in
+            # parallel to prevent workers from overwriting each other's lists
+            if self.config.getint('config', 'METPLUS_PARALLEL_WORKERS',
+                                  1) > 1:
+                list_dir = os.path.join(list_dir, str(os.getpid()))
         else:
             list_dir = output_dir
 
         list_path = os.path.join(list_dir, filename)
 
         if not os.path.exists(list_dir):
-            os.makedirs(list_dir, mode=0o0775)
+            os.makedirs(list_dir, mode=0o0775, exist_ok=True)
 
         self.logger.debug(f"Writing list of filenames to {list_path}")
         with open(list_path, 'w') as file_handle:
@@ -908,6 +951,7 @@ class CommandBuilder:
                 self.logger.debug("Looking for existing data that matches: "
                                   f"{search_path}")
             self.outdir = output_path
+            self.outdir_pattern = search_string
             output_path = search_path
         else:
             parent_dir = os.path.dirname(output_path)
@@ -924,11 +968,20 @@ class CommandBuilder:
         # create full output dir if it doesn't already exist
         if not os.path.exists(parent_dir):
             self.logger.debug(f"Creating output directory: {parent_dir}")
-            os.makedirs(parent_dir)
+            os.makedirs(parent_dir, exist_ok=True)
 
         if (not output_exists or not skip_if_output_exists):
             return True
 
+        # let the run ledger decide if output that it recorded is complete
+        if self.run_ledger and any(
+                self.run_ledger.has_output(path)
+                for path in glob.glob(search_path)
+        ):
+            self.logger.debug(f"Checking run ledger to determine if "
+                              f"{output_path} is complete")
+            return True
+
         # if the output file exists and we are supposed to skip, don't run tool
         self.logger.debug(f'Skip writing output {output_path} because it already '
                           'exists. Remove file or change '
@@ -1247,7 +1300,7 @@ class CommandBuilder:
             return None
 
         if not os.path.exists(parent_dir):
-            os.makedirs(parent_dir)
+            os.makedirs(parent_dir, exist_ok=True)
 
         cmd += " " + out_path
 
@@ -1263,21 +1316,30 @@ class CommandBuilder:
     # to call cmdrunner.run_cmd().
     # Make sure they have SET THE self.app_name in the subclasses constructor.
     # see regrid_data_plane_wrapper.py as an example of how to set.
-    def build(self):
-        """!Build and run command"""
+    def build(self, queue=False):
+        """!Build and run command
+
+        @param queue if True, start the command in the background and
+         return without waiting for it to finish. See run_command
+        """
         cmd = self.get_command()
         if cmd is None:
             self.log_error("Could not generate command")
             return False
 
-        return self.run_command(cmd)
+        return self.run_command(cmd, queue=queue)
 
-    def run_command(self, cmd):
+    def run_command(self, cmd, queue=False):
         """! Run a command with the appropriate environment. Add command to
         list of all commands run.
 
         @param cmd command to run
-        @returns True on success, False otherwise
+        @param queue if True, start the command in the background and return
+         without waiting for it to finish. Up to METPLUS_COMMAND_WORKERS
+         commands run at the same time. Call wait_for_commands to wait for
+         all queued commands to finish and check their return codes.
+        @returns True on success, False otherwise. If queue is True, returns
+         True if the command was submitted
         """
         # add command to list of all commands run
         self.all_commands.append((cmd,
@@ -1288,32 +1350,182 @@ class CommandBuilder:
         else:
             log_name = self.log_name
 
-        ismetcmd = self.c_dict.get('IS_MET_CMD', True)
-        run_inshell = self.c_dict.get('RUN_IN_SHELL', False)
-        log_theoutput = self.c_dict.get('LOG_THE_OUTPUT', False)
-
-        ret, out_cmd = self.cmdrunner.run_cmd(cmd,
-                                              env=self.env,
-                                              ismetcmd=ismetcmd,
-                                              log_name=log_name,
-                                              run_inshell=run_inshell,
-                                              log_theoutput=log_theoutput,
-                                              copyable_env=self.get_env_copy())
+        # skip command if it completed in a previous run with the same inputs
+        ledger_entry = self.get_run_ledger_entry(cmd)
+        if ledger_entry and self.run_ledger.is_complete(ledger_entry):
+            self.logger.info("Skipping command that already completed with "
+                             f"the same inputs: {cmd}")
+            if queue:
+                self._queue_finished_command(cmd, log_name)
+            return True
+
+        # use output from result cache if command was already run
+        cache_entry = self.get_result_cache_entry(cmd)
+        if ledger_entry:
+            self.run_ledger.start(ledger_entry)
+        if cache_entry and self.result_cache.fetch(*cache_entry,
+                                                   logger=self.logger):
+            if ledger_entry:
+                self.run_ledger.finish(ledger_entry, 0)
+            if queue:
+                self._queue_finished_command(cmd, log_name)
+            return True
+
+        run_args = {
+            'env': self.env,
+            'ismetcmd': self.c_dict.get('IS_MET_CMD', True),
+            'log_name': log_name,
+            'run_inshell': self.c_dict.get('RUN_IN_SHELL', False),
+            'log_theoutput': self.c_dict.get('LOG_THE_OUTPUT', False),
+            'copyable_env': self.get_env_copy(),
+        }
+
+        if queue:
+            future = self.cmdrunner.submit_cmd(cmd, **run_args)
+            self.queued_commands.append((cmd, log_name, future))
+            if cache_entry:
+                self.queued_cache_entries[future] = cache_entry
+            if ledger_entry:
+                future.add_done_callback(ledger_entry.set_end_time)
+                self.queued_ledger_entries[future] = ledger_entry
+            return True
+
+        ret, out_cmd = self.cmdrunner.run_cmd(cmd, **run_args)
+        if ledger_entry:
+            self.run_ledger.finish(ledger_entry, ret)
         if ret:
-            logfile_path = self.config.getstr('config', 'LOG_METPLUS')
-            # if MET output is written to its own logfile, get that filename
-            if not self.config.getbool('config', 'LOG_MET_OUTPUT_TO_METPLUS'):
-                logfile_path = logfile_path.replace('run_metplus',
-                                                    log_name)
-
-            self.log_error("MET command returned a non-zero return code:"
-                           f"{cmd}")
-            self.logger.info("Check the logfile for more information on why "
-                             f"it failed: {logfile_path}")
+            self.log_command_failure(cmd, log_name)
             return False
 
+        if cache_entry:
+            self.result_cache.store(*cache_entry, cmd=cmd,
+                                    logger=self.logger)
+
         return True
 
+    def get_result_cache_entry(self, cmd):
+        """! Get the result cache key and output path of a command. Only
+        MET commands that write a single output file that is set with
+        set_output_path can be cached.
+
+        @param cmd command to run
+        @returns tuple of key and output path or None if the result cache
+         is not enabled or the command cannot be cached
+        """
+        if not self.result_cache or not self.outfile:
+            return None
+
+        if (not self.c_dict.get('IS_MET_CMD', True) or
+                self.c_dict.get('RUN_IN_SHELL', False) or
+                self.config.getbool('config', 'DO_NOT_RUN_EXE', False)):
+            return None
+
+        output_path = self.get_output_path()
+        if output_path not in cmd.split() or os.path.isdir(output_path):
+            return None
+
+        env = {name: self.env[name] for name in self.env_list
+               if name in self.env}
+        key = self.result_cache.get_key(cmd, env, output_path,
+                                        self.c_dict.get('CONFIG_FILE'))
+        if key is None:
+            return None
+
+        return key, output_path
+
+    def get_run_ledger_entry(self, cmd):
+        """! Get the run ledger entry of a command. Only commands that write
+        an output file that is set with set_output_path or write files that
+        match self.outdir_pattern into an output directory that is set in
+        self.outdir can be recorded.
+
+        @param cmd command to run
+        @returns LedgerEntry object or None if the run ledger is not enabled
+         or the command cannot be recorded
+        """
+        if not self.run_ledger or not self.outdir:
+            return None
+
+        if self.config.getbool('config', 'DO_NOT_RUN_EXE', False):
+            return None
+
+        output_path = output_pattern = None
+        if self.outfile:
+            output_path = self.get_output_path()
+            if output_path not in cmd.split() or os.path.isdir(output_path):
+                return None
+        else:
+            if not self.outdir_pattern or self.outdir not in cmd.split():
+                return None
+            output_pattern = os.path.join(self.outdir, self.outdir_pattern)
+
+        env = {name: self.env[name] for name in self.env_list
+               if name in self.env}
+        return self.run_ledger.get_entry(cmd, env, output_path,
+                                         output_pattern,
+                                         self.c_dict.get('CONFIG_FILE'))
+
+    def _queue_finished_command(self, cmd, log_name):
+        """! Add a command that does not need to run to the queued commands
+        so that wrappers that check the queued commands see it as succeeded
+
+        @param cmd command that was skipped
+        @param log_name name used for the MET log file
+        """
+        future = Future()
+        future.set_result((0, cmd))
+        self.queued_commands.append((cmd, log_name, future))
+
+    def wait_for_commands(self):
+        """! Wait for all commands that were queued with run_command to
+        finish and report an error for each command that failed.
+
+        @returns True if all queued commands succeeded, False otherwise
+        """
+        success = True
+        try:
+            for cmd, log_name, future in self.queued_commands:
+                try:
+                    ret, _ = future.result()
+                except Exception as err:
+                    self.logger.error(f"Could not run command {cmd}: {err}")
+                    ret = -1
+
+                cache_entry = self.queued_cache_entries.pop(future, None)
+                ledger_entry = self.queued_ledger_entries.pop(future, None)
+                if ledger_entry:
+                    self.run_ledger.finish(ledger_entry, ret)
+                if ret:
+                    self.log_command_failure(cmd, log_name)
+                    success = False
+                elif cache_entry:
+                    self.result_cache.store(*cache_entry, cmd=cmd,
+                                            logger=self.logger)
+        finally:
+            self.queued_commands.clear()
+            self.queued_cache_entries.clear()
+            self.queued_ledger_entries.clear()
+
+        return success
+
+    def log_command_failure(self, cmd, log_name):
+        """! Report an error for a command that returned a non-zero return
+        code and log where to find more information.
+
+        @param cmd command that failed
+        @param log_name name used for the MET log file
+        """
+        logfile_path = self.config.getstr('config', 'LOG_METPLUS')
+        # if MET output is written to its own logfile, get that filename
+        if not self.config.getbool('config', 'LOG_MET_OUTPUT_TO_METPLUS'):
+            logfile_path = logfile_path.replace('run_metplus',
+                                                log_name)
+
+        self.log_error("MET command returned a non-zero return code:"
+                       f"{cmd}")
+        self.logger.info("Check the logfile for more information on why "
+                         f"it failed: {logfile_path}")
+
     # argument needed to match call
     # pylint:disable=unused-argument
     def run_at_time(self, input_dict):
@@ -34,10 +34,17 @@ Output Files: N/A
 #
 
 import os
-from produtil.run import exe, run
 import shlex
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 
+from produtil.run import exe, run
+
+from ..util.profile_util import get_run_profile
+
 class CommandRunner(object):
     """! Class for Creating and Running External Programs
     """
@@ -50,6 +57,19 @@ class CommandRunner(object):
         self.verbose = verbose
         self.log_command_to_met_log = False
 
+        # maximum number of commands that can be run at the same time
+        # when they are started with submit_cmd
+        self.max_workers = config.getint('config',
+                                         'METPLUS_COMMAND_WORKERS', 1)
+        if self.max_workers is None or self.max_workers < 1:
+            self.logger.warning('METPLUS_COMMAND_WORKERS must be a positive '
+                                'integer. Running one command at a time')
+            self.max_workers = 1
+
+        self._executor = None
+        self._executor_pid = None
+        self._log_lock = threading.Lock()
+
     def run_cmd(self, cmd, env=None, ismetcmd = True, log_name=None,
                 run_inshell=False,
                 log_theoutput=False, copyable_env=None, **kwargs):
@@ -83,12 +103,76 @@ class CommandRunner(object):
         if cmd is None:
             return cmd
 
+        cmd_exe, the_exe, _, _ = self.get_runner(cmd, env, ismetcmd,
+                                                 log_name, run_inshell,
+                                                 log_theoutput, copyable_env)
+
+        ret = 0
+        # run app unless DO_NOT_RUN_EXE is set to True
+        if not self.config.getbool('config', 'DO_NOT_RUN_EXE', False):
+            ret = self.run_runner(cmd_exe, the_exe, **kwargs)
+
+        return (ret, cmd)
+
+    def submit_cmd(self, cmd, env=None, ismetcmd=True, log_name=None,
+                   run_inshell=False, log_theoutput=False, copyable_env=None,
+                   **kwargs):
+        """!Start running a command in the background and return without
+        waiting for it to finish. Up to max_workers commands are run at the
+        same time. Any additional commands wait in a queue until a running
+        command finishes. The arguments are the same as run_cmd.
+
+        The output of each command is written to its own file and appended
+        to the log destination after the command finishes, so the output
+        of commands that run at the same time is not interleaved.
+
+        @returns concurrent.futures.Future object. Calling result() waits
+         for the command to finish and returns the same value as run_cmd
+        """
+        future = Future()
+        if cmd is None:
+            future.set_result((None, cmd))
+            return future
+
+        cmd_exe, the_exe, log_dest, capture_path = (
+            self.get_runner(cmd, env, ismetcmd, log_name, run_inshell,
+                            log_theoutput, copyable_env, capture=True)
+        )
+
+        # do not run app if DO_NOT_RUN_EXE is set to True
+        if self.config.getbool('config', 'DO_NOT_RUN_EXE', False):
+            if capture_path:
+                os.remove(capture_path)
+            future.set_result((0, cmd))
+            return future
+
+        # pass wrapper and run time to thread so the command is profiled
+        profile_context = get_run_profile().get_context()
+        return self._get_executor().submit(self._run_captured, cmd_exe,
+                                           the_exe, cmd, log_dest,
+                                           capture_path, profile_context,
+                                           **kwargs)
+
+    def get_runner(self, cmd, env=None, ismetcmd=True, log_name=None,
+                   run_inshell=False, log_theoutput=False, copyable_env=None,
+                   capture=False):
+        """!Create the produtil Runner object used to run a command.
+        The arguments are the same as run_cmd.
+
+        @param capture if True and the output would be sent to a log file,
+         send the output to a new file in the same directory instead so it
+         can be appended to the log file after the command has finished
+        @returns tuple containing the Runner object, the name of the
+         executable, the log destination, and the path to the file that
+         captures the output or None if output is not captured
+        """
         # if env not set, use os.environ
         if env is None:
             env = os.environ
 
         self.logger.info("COMMAND: %s" % cmd)
 
+        log_dest = None
         if ismetcmd:
 
             # self.log_name MUST be defined in the subclass' constructor,
@@ -123,12 +207,6 @@ class CommandRunner(object):
             if log_dest:
                 self.logger.debug("log_name is: %s, output sent to: %s" % (log_name, log_dest))
 
-                self.log_header_info(log_dest, copyable_env, cmd)
-
-                cmd_exe = exe(the_exe)[the_args].env(**env).err2out() >> log_dest
-            else:
-                cmd_exe = exe(the_exe)[the_args].env(**env).err2out()
-
         else:
             # This block is for all the Non-MET commands
             # Some commands still need to be run in  a shell in order to work.
@@ -147,34 +225,53 @@ class CommandRunner(object):
                     self.logger.debug(
                         "log_name is: %s, output sent to: %s" % (
                             log_name, log_dest))
-                    self.log_header_info(log_dest, copyable_env, cmd)
 
-            if run_inshell:
-                # set the_exe to log command has finished running
-                the_exe = shlex.split(cmd)[0]
+            # set the_exe to log command has finished running
+            the_exe = shlex.split(cmd)[0]
+            if not run_inshell:
+                the_args = shlex.split(cmd)[1:]
 
-                if log_theoutput:
-                    log_dest = self.cmdlog_destination(cmdlog=log_name+'.log')
-                    cmd_exe = exe('sh')['-c', cmd].env(**env).err2out() >> log_dest
-                else:
-                    cmd_exe = exe('sh')['-c', cmd].env(**env)
+        # write output to a separate file if requested
+        capture_path = None
+        output_dest = log_dest
+        if log_dest and capture:
+            file_handle, capture_path = (
+                tempfile.mkstemp(dir=os.path.dirname(log_dest),
+                                 prefix=f'.{os.path.basename(log_dest)}.')
+            )
+            os.close(file_handle)
+            output_dest = capture_path
+
+        if output_dest:
+            self.log_header_info(output_dest, copyable_env, cmd)
+
+        if run_inshell and not ismetcmd:
+            cmd_exe = exe('sh')['-c', cmd].env(**env)
+        else:
+            cmd_exe = exe(the_exe)[the_args].env(**env)
 
-            else:
-                the_exe = shlex.split(cmd)[0]
-                the_args = shlex.split(cmd)[1:]
-                if log_theoutput:
-                    log_dest = self.cmdlog_destination(cmdlog=log_name+'.log')
-                    cmd_exe = exe(the_exe)[the_args].env(**env).err2out() >> log_dest
-                else:
-                    cmd_exe = exe(the_exe)[the_args].env(**env)
+        # write stdout and stderr to the log destination if set
+        if ismetcmd or log_theoutput:
+            cmd_exe = cmd_exe.err2out()
+            if output_dest:
+                cmd_exe = cmd_exe >> output_dest
 
-        ret = 0
-        # run app unless DO_NOT_RUN_EXE is set to True
-        if not self.config.getbool('config', 'DO_NOT_RUN_EXE', False):
-            # get current time to calculate total time to run command
-            start_cmd_time = datetime.now()
+        return cmd_exe, the_exe, log_dest, capture_path
 
-            # run command
+    def run_runner(self, cmd_exe, the_exe, **kwargs):
+        """!Run a produtil Runner object created by get_runner and log
+        how long it took to run.
+
+        @param cmd_exe produtil Runner object to run
+        @param the_exe name of the executable that is run
+        @param kwargs Other options sent to the produtil Run constructor
+        @returns return code of the command or -1 if it could not be run
+        """
+        # get current time to calculate total time to run command
+        start_cmd_time = datetime.now()
+
+        # run command
+        with get_run_profile().command(the_exe) as profile_record:
             try:
                 ret = run(cmd_exe, **kwargs)
             except:
@@ -183,10 +280,51 @@ class CommandRunner(object):
                 # calculate time to run
                 end_cmd_time = datetime.now()
                 total_cmd_time = end_cmd_time - start_cmd_time
-                self.logger.debug(f'Finished running {the_exe} in {total_cmd_time}')
+                self.logger.debug(f'Finished running {the_exe} in '
+                                  f'{total_cmd_time}')
+
+            profile_record['return_code'] = ret
+
+        return ret
+
+    def _run_captured(self, cmd_exe, the_exe, cmd, log_dest, capture_path,
+                      profile_context, **kwargs):
+        """!Run a command submitted by submit_cmd. If the output was
+        captured, append it to the log destination then remove the file.
+
+        @param profile_context tuple of wrapper name and run time that
+         submitted the command, used to profile the command
+        @returns tuple of the return code and command
+        """
+        wrapper, run_time = profile_context
+        try:
+            with get_run_profile().context(wrapper, run_time):
+                ret = self.run_runner(cmd_exe, the_exe, **kwargs)
+            if capture_path:
+                with self._log_lock:
+                    with open(capture_path, 'r') as capture_handle, \
+                            open(log_dest, 'a') as log_handle:
+                        shutil.copyfileobj(capture_handle, log_handle)
+        finally:
+            if capture_path and os.path.exists(capture_path):
+                os.remove(capture_path)
 
         return (ret, cmd)
 
+    def _get_executor(self):
+        """!Get pool of threads used to run commands in the background.
+        A new pool is created if this object was copied into a different
+        process, i.e. when run times are processed in parallel, because
+        the threads of the original pool do not exist in the new process.
+
+        @returns ThreadPoolExecutor object
+        """
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            self._executor_pid = os.getpid()
+
+        return self._executor
+
     # TODO: Refactor seriesbylead.
     # For now we are back to running through a shell.
     # Can not run its cmd string, unless we run through a shell.
@@ -5,16 +5,19 @@ A Python class that generates plots of extra tropical cyclone forecast data,
 """
 
 import os
+import io
 import time
 import datetime
-import re
 import sys
 import collections
+from concurrent.futures import ThreadPoolExecutor
 
 # handle if module can't be loaded to run wrapper
 WRAPPER_CANNOT_RUN = False
 EXCEPTION_ERR = ''
 try:
+    import numpy as np
+    import pandas as pd
     import matplotlib.pyplot as plt
     import matplotlib.ticker as mticker
     import cartopy.crs as ccrs
@@ -83,10 +86,14 @@ class CyclonePlotterWrapper(CommandBuilder):
         self.unique_storm_id = set()
         # Data structure to separate data based on storm id.
         self.storm_id_dict = {}
-        # Data/info which we want to retrieve from the track files.
-        self.columns_of_interest = ['AMODEL', 'STORM_ID', 'BASIN', 'INIT',
-                                    'LEAD', 'VALID', 'ALAT', 'ALON', 'BLAT',
-                                    'BLON', 'AMSLP', 'BMSLP']
+        # Number of track files to read at the same time
+        self.read_workers = (
+            self.config.getint('config',
+                               'CYCLONE_PLOTTER_READ_WORKERS', 1)
+        )
+        if self.read_workers is None or self.read_workers < 1:
+            self.log_error('CYCLONE_PLOTTER_READ_WORKERS must be a positive '
+                           'integer')
         self.circle_marker = (
             self.config.getint('config',
                                'CYCLONE_PLOTTER_CIRCLE_MARKER_SIZE')
@@ -118,233 +125,38 @@ class CyclonePlotterWrapper(CommandBuilder):
         self.create_plot()
 
     def retrieve_data(self):
-        """! Retrieve data from track files and return the min and max lon.
+        """! Read the track points that match the requested init date, init
+            hour, and model from all .tcst files in the input directory and
+            separate them by storm id.
             Returns:
                None
         """
         self.logger.debug("Begin retrieving data...")
-        all_tracks_list = []
-
-        # Store the data in the track list.
-        if os.path.isdir(self.input_data):
-            self.logger.debug("Generate plot for all files in the directory" +
-                              self.input_data)
-            # Get the list of all files (full file path) in this directory
-            all_init_files = util.get_files(self.input_data, ".*.tcst",
-                                            self.logger)
-
-            for init_file in all_init_files:
-                # Ignore empty files
-                if os.stat(init_file).st_size == 0:
-                    self.logger.info(f"Ignoring empty file {init_file}")
-                    continue
-
-                # logger.info("Consider all files under directory" +
-                #  init_file + " with " + " init time (ymd): " +
-                # self.init_date + " and lead time (hh):" + self.lead_hr)
-                with open(init_file, 'r') as infile:
-                    self.logger.debug("Parsing file {}".format(init_file))
-
-                    # Extract information from the header, which is
-                    # the first line.
-                    header = infile.readline()
-                    # print("header: {}".format(header))
-                    column_indices = self.get_columns_and_indices(header)
-
-                    # For the remaining lines of this file,
-                    # retrieve information from each row:
-                    # lon, lat, init time, lead hour, valid time,
-                    # model name, mslp, and basin.
-                    # NOTE: Some of these columns aren't used until we fully
-                    # emulate Guang Ping's plots (ie collect all columns).
-                    for line in infile:
-                        track_dict = {}
-                        col = line.split()
-                        lat = col[column_indices['ALAT']]
-                        lon = col[column_indices['ALON']]
-                        init_time = col[column_indices['INIT']]
-                        fcst_lead_hh = \
-                            str(col[column_indices['LEAD']]).zfill(3)
-                        model_name = col[column_indices['AMODEL']]
-                        valid_time = col[column_indices['VALID']]
-                        storm_id = col[column_indices['STORM_ID']]
-
-                        # Not needed until support for regional plots
-                        # is implemented.
-                        # mslp = col[column_indices['AMSLP']]
-                        # basin = col[column_indices['BASIN']]
-
-                        # Check for NA values in lon and lat, skip to
-                        # next line in file if 'NA' is encountered.
-                        if lon == 'NA' or lat == 'NA':
-                            continue
-                        else:
-                            # convert longitudes that are in the 0 to 360 scale
-                            # to the -180 to 180 scale
-                            track_dict['lon'] = self.rescale_lon(float(lon))
-                            track_dict['lat'] = float(lat)
-
-                        # If the lead hour is 'NA', skip to next line.
-                        # The track data was very likely generated with
-                        # TC-Stat set to match-pairs set to True.
-                        lead_hr = self.extract_lead_hr(fcst_lead_hh)
-                        if lead_hr == 'NA':
-                            continue
-
-                        # Check that the init date, init hour
-                        # and model name are what the user requested.
-                        init_ymd, init_hh = \
-                            self.extract_date_and_time_from_init(init_time)
-
-                        if init_ymd == self.init_date and \
-                                init_hh == self.init_hr:
-                            if model_name == self.model:
-                                # Check for the requested model,
-                                # if the model matches the requested
-                                # model name, then we have all the
-                                # necessary information to continue.
-                                # Store all data in dictionary
-                                track_dict['fcst_lead_hh'] = fcst_lead_hh
-                                track_dict['init_time'] = init_time
-                                track_dict['model_name'] = model_name
-                                track_dict['valid_time'] = valid_time
-                                track_dict['storm_id'] = storm_id
-
-                                # Identify the 'first' point of the
-                                # storm track.  If the storm id is novel, then
-                                # retrieve the date and hh from the valid time
-                                if storm_id in self.unique_storm_id:
-                                    track_dict['first_point'] = False
-                                    track_dict['valid_dd'] = ''
-                                    track_dict['valid_hh'] = ''
-                                else:
-                                    self.unique_storm_id.add(storm_id)
-                                    # Since this is the first storm_id with
-                                    # a valid value for lat and lon (ie not
-                                    # 'NA'), this is the first track point
-                                    # in the storm track and will be
-                                    # labelled with the corresponding
-                                    # date/hh z on the plot.
-                                    valid_match = \
-                                        re.match(r'[0-9]{6}([0-9]{2})_' +
-                                                 '([0-9]{2})[0-9]{4}',
-                                                 track_dict['valid_time'])
-                                    if valid_match:
-                                        valid_dd = valid_match.group(1)
-                                        valid_hh = valid_match.group(2)
-                                    else:
-                                        # Shouldn't get here if this is
-                                        # the first point of the track.
-                                        valid_dd = ''
-                                        valid_hh = ''
-                                    track_dict['first_point'] = True
-                                    track_dict['valid_dd'] = valid_dd
-                                    track_dict['valid_hh'] = valid_hh
-
-                                # Identify points based on valid time (hh).
-                                # Useful for plotting later on.
-                                valid_match = \
-                                    re.match(r'[0-9]{8}_([0-9]{2})[0-9]{4}',
-                                             track_dict['valid_time'])
-                                if valid_match:
-                                    # Since we are only interested in 00,
-                                    # 06, 12, and 18 hr times...
-                                    valid_hh = valid_match.group(1)
-
-                                if valid_hh == '00' or valid_hh == '12':
-                                    track_dict['lead_group'] = '0'
-                                elif valid_hh == '06' or valid_hh == '18':
-                                    track_dict['lead_group'] = '6'
-                                else:
-                                    # To gracefully handle any hours other
-                                    # than 0, 6, 12, or 18
-                                    track_dict['lead_group'] = ''
-
-                                all_tracks_list.append(track_dict)
-
-                                # For future work, support for MSLP when
-                                # generating regional plots-
-                                # implementation goes here...
-                                # Finishing up, do any cleaning up,
-                                # logging, etc.
-                                self.logger.info("All criteria met, " +
-                                                 "saving track data init " +
-                                                 track_dict['init_time'] +
-                                                 " lead " +
-                                                 track_dict['fcst_lead_hh'] +
-                                                 " lon " +
-                                                 str(track_dict['lon']) +
-                                                 " lat " +
-                                                 str(track_dict['lat']))
-
-                            else:
-                                # Not the requested model, move to next
-                                # row of data
-                                continue
-
-                        else:
-                            # Not the requested init ymd move to next
-                            # row of data
-                            continue
-
-                # Now separate the data based on storm id.
-                for cur_unique in self.unique_storm_id:
-                    cur_storm_list = []
-                    for cur_line in all_tracks_list:
-                        if cur_line['storm_id'] == cur_unique:
-                            cur_storm_list.append(cur_line)
-                        else:
-                            # Continue to next line in all_tracks_list
-                            continue
-
-                    # Create the storm_id_dict, which is the data
-                    # structure used to separate the storm data based on
-                    # storm id.
-                    self.storm_id_dict[cur_unique] = cur_storm_list
 
-        else:
+        if not os.path.isdir(self.input_data):
             self.log_error("{} should be a directory".format(self.input_data))
             sys.exit(1)
 
-    def get_columns_and_indices(self, header):
-        """ Parse the header for the columns of interest and store the
-            information in a dictionary where the key is the column name
-            and value is the index/column number.
-            Returns:
-                column_dict:  A dictionary containing the column name
-                              and its index
-        """
-
-        all_columns = header.split()
-        column_dict = {}
-
-        # Retrieve the index number of the column of interest in the header.
-        for col in self.columns_of_interest:
-            index = all_columns.index(col)
-            column_dict[col] = index
-        return column_dict
-
-    @staticmethod
-    def extract_date_and_time_from_init(init_time_str):
-        """ Extract and return the YYYYMMDD portion and the
-            hh portion from the init time taken from the .tcst file.
-        """
-        match_ymd = re.match(r'([0-9]{8}).*', init_time_str)
-        match_hh = re.match(r'[0-9]{8}_([0-9]{2,3})[0-9]{4}', init_time_str)
-        # pylint:disable=no-else-return
-        # Explicitly return None if no match is found
-        if match_ymd and match_hh:
-            return match_ymd.group(1), match_hh.group(1)
-        else:
-            return None
-
-    @staticmethod
-    def extract_lead_hr(lead_str):
-        """ Extract and return the lead hours from the hhmmss lead string.
-        """
-        match = re.match(r'([0-9]{2,3})[0-9]{4}', str(lead_str))
-        if match:
-            return match.group(1)
+        self.logger.debug("Generate plot for all files in the directory" +
+                          self.input_data)
+        # Get the list of all files (full file path) in this directory
+        all_init_files = util.get_files(self.input_data, ".*.tcst",
+                                        self.logger)
+
+        tracks = get_track_data(all_init_files, self.init_date, self.init_hr,
+                                self.model, self.read_workers, self.logger)
+        self.logger.info(f"Found {len(tracks)} track points that match init "
+                         f"{self.init_date} {self.init_hr}Z and model "
+                         f"{self.model}")
+
+        # Now separate the data based on storm id. The columns are converted
+        # to lists once instead of reading each value from the DataFrame
+        keys = tracks.columns.tolist()
+        for values in zip(*(tracks[key].tolist() for key in keys)):
+            track_dict = dict(zip(keys, values))
+            storm_id = track_dict['storm_id']
+            self.unique_storm_id.add(storm_id)
+            self.storm_id_dict.setdefault(storm_id, []).append(track_dict)
 
     def create_plot(self):
         """! Create the plot, using Cartopy.
@@ -580,14 +392,120 @@ class CyclonePlotterWrapper(CommandBuilder):
         # plt.show()
 
 
-    @staticmethod
-    def rescale_lon(lon):
-        """! Rescales longitude, using the same logic employed by MET
-        """
-
-        if float(lon) > 180.:
-            adj_lon = lon - 360.
-        else:
-            adj_lon = lon
-
-        return adj_lon
+# columns that are read from the .tcst files
+TRACK_COLUMNS = ['AMODEL', 'STORM_ID', 'INIT', 'LEAD', 'VALID', 'ALAT',
+                 'ALON']
+
+# names of the keys used for each track point
+TRACK_KEYS = {
+    'AMODEL': 'model_name',
+    'STORM_ID': 'storm_id',
+    'INIT': 'init_time',
+    'VALID': 'valid_time',
+    'ALAT': 'lat',
+    'ALON': 'lon',
+}
+
+
+def read_track_file(track_file, init_date, init_hr, model):
+    """! Read the track points from a .tcst file that have the requested
+         init date, init hour, and model. Only the columns in TRACK_COLUMNS
+         are parsed and points with NA lat, lon, or lead are removed before
+         any values are converted.
+
+         @param track_file path to .tcst file
+         @param init_date init date to keep (YYYYMMDD)
+         @param init_hr init hour to keep (HH)
+         @param model model name to keep
+         @returns pandas DataFrame with columns TRACK_COLUMNS in the order
+          the points appear in the file
+    """
+    # Ignore empty files
+    if os.stat(track_file).st_size == 0:
+        return pd.DataFrame(columns=TRACK_COLUMNS)
+
+    # skip lines that do not contain the requested init time before they are
+    # parsed. The columns are checked again after they are parsed
+    init_key = f'{init_date}_{init_hr}'
+    with open(track_file, 'r') as infile:
+        header = infile.readline()
+        lines = [line for line in infile if init_key in line]
+
+    tracks = pd.read_csv(io.StringIO(header + ''.join(lines)), sep=r'\s+',
+                         usecols=TRACK_COLUMNS, dtype=str, na_filter=False)
+
+    # init is formatted YYYYMMDD_HHMMSS
+    keep = ((tracks['AMODEL'] == model) &
+            (tracks['INIT'].str[:8] == init_date) &
+            (tracks['INIT'].str[9:11] == init_hr) &
+            (tracks['ALAT'] != 'NA') &
+            (tracks['ALON'] != 'NA') &
+            (tracks['LEAD'] != 'NA'))
+    return tracks[keep]
+
+
+def get_track_data(track_files, init_date, init_hr, model, num_workers=1,
+                   logger=None):
+    """! Read the track points from .tcst files that have the requested init
+         date, init hour, and model. The first point of each storm is the
+         first point with its storm id in the order of the files and is
+         labeled with the day and hour of its valid time. Points are grouped
+         by the hour of the valid time so that 00/12Z and 06/18Z positions
+         can be drawn with different markers.
+
+         @param track_files list of paths to .tcst files
+         @param init_date init date to keep (YYYYMMDD)
+         @param init_hr init hour to keep (HH)
+         @param model model name to keep
+         @param num_workers (optional) number of files to read at the same
+          time using a pool of threads. Default is 1
+         @param logger (optional) logger to output debug information
+         @returns pandas DataFrame with a row for each track point and
+          columns model_name, storm_id, init_time, valid_time, lat, lon,
+          fcst_lead_hh, first_point, valid_dd, valid_hh, and lead_group
+    """
+    def read_one(track_file):
+        if logger:
+            logger.debug(f"Parsing file {track_file}")
+        return read_track_file(track_file, init_date, init_hr, model)
+
+    if num_workers == 1 or len(track_files) < 2:
+        all_tracks = [read_one(track_file) for track_file in track_files]
+    else:
+        with ThreadPoolExecutor(max_workers=min(num_workers,
+                                                len(track_files))) as executor:
+            all_tracks = list(executor.map(read_one, track_files))
+
+    tracks = pd.concat([pd.DataFrame(columns=TRACK_COLUMNS)] + all_tracks,
+                       ignore_index=True)
+    tracks = tracks.rename(columns=TRACK_KEYS)
+
+    # convert longitudes that are in the 0 to 360 scale
+    # to the -180 to 180 scale, using the same logic employed by MET
+    lon = tracks['lon'].astype(float)
+    tracks['lon'] = lon.where(lon <= 180., lon - 360.)
+    tracks['lat'] = tracks['lat'].astype(float)
+    tracks['fcst_lead_hh'] = tracks.pop('LEAD').str.zfill(3)
+
+    # Identify the 'first' point of each storm track, which is
+    # labelled with the corresponding date/hh z on the plot
+    tracks['first_point'] = (
+        tracks.groupby('storm_id', sort=False).cumcount() == 0
+    )
+
+    # valid is formatted YYYYMMDD_HHMMSS
+    valid_parts = tracks['valid_time'].str.extract(
+        r'^[0-9]{6}([0-9]{2})_([0-9]{2})[0-9]{4}'
+    ).fillna('')
+    valid_dd, valid_hh = valid_parts[0], valid_parts[1]
+    tracks['valid_dd'] = valid_dd.where(tracks['first_point'], '')
+    tracks['valid_hh'] = valid_hh.where(tracks['first_point'], '')
+
+    # Identify points based on valid time (hh). Hours other than
+    # 0, 6, 12, or 18 are not put in a group
+    tracks['lead_group'] = np.select(
+        [valid_hh.isin(['00', '12']), valid_hh.isin(['06', '18'])],
+        ['0', '6'],
+        ''
+    )
+    return tracks
@@ -187,14 +187,18 @@ class ExtractTilesWrapper(CommandBuilder):
         # get indices of values from header
         idx_dict = self.get_header_indices(storm_dict['header'])
 
-        # Create tiles for each storm in the storm_dict dictionary
+        # get track points of every storm in the storm_dict dictionary
+        track_points = []
         for storm_id, storm_lines in storm_dict.items():
             if storm_id == 'header':
                 continue
 
-            self.create_tiles_from_storm(storm_id,
-                                         storm_lines,
-                                         idx_dict)
+            track_points.extend(self.get_track_points(storm_id,
+                                                      storm_lines,
+                                                      idx_dict))
+
+        # Create tiles for all track points
+        self.create_tiles(track_points)
 
         util.prune_empty(self.c_dict['OUTPUT_DIR'], self.logger)
 
@@ -207,8 +211,22 @@ class ExtractTilesWrapper(CommandBuilder):
                 @param storm_lines Each line from tcst file for given storm id
                 @param idx_dict dictionary of indices for each header value
         """
+        self.create_tiles(self.get_track_points(storm_id,
+                                                storm_lines,
+                                                idx_dict))
+
+    def get_track_points(self, storm_id, storm_lines, idx_dict):
+        """! Read the information needed to create tiles for each point of a
+            storm track
 
-        # loop over storm track
+            Args:
+                @param storm_id value from STORM_ID column to process
+                @param storm_lines Each line from tcst file for given storm id
+                @param idx_dict dictionary of indices for each header value
+                @returns list of tuples containing storm data dictionary,
+                 time info dictionary, and field list for each track point
+        """
+        track_points = []
         for storm_line in storm_lines:
             storm_data = self.get_storm_data_from_track_line(idx_dict,
                                                              storm_line)
@@ -217,24 +235,71 @@ class ExtractTilesWrapper(CommandBuilder):
                                                            storm_data)
 
             # set var list from config using time info
-            var_list = util.sub_var_list(self.c_dict['VAR_LIST_TEMP'], time_info)
+            var_list = util.sub_var_list(self.c_dict['VAR_LIST_TEMP'],
+                                         time_info)
+            track_points.append((storm_data, time_info, var_list))
+
+        return track_points
 
-            # set output grid and run for the forecast and observation data
-            for dtype in ['FCST', 'OBS']:
+    def create_tiles(self, track_points):
+        """! Run RegridDataPlane to create a tile for forecast and observation
+            data for each track point. The commands are started in the
+            background so up to METPLUS_COMMAND_WORKERS tiles are created at
+            the same time. The forecast tiles are created first and the
+            observation tile of a track point is skipped if its forecast tile
+            could not be created.
+
+            Args:
+                @param track_points list of tuples containing storm data
+                 dictionary, time info dictionary, and field list
+        """
+        for dtype in ['FCST', 'OBS']:
+            # keep futures of the commands started for each track point
+            started_points = []
+            for track_point in track_points:
+                storm_data, time_info, var_list = track_point
+
+                # set output grid for the current data type
                 self.regrid_data_plane.c_dict['VERIFICATION_GRID'] = (
                     self.get_grid(dtype, storm_data)
                 )
 
-                # run RegridDataPlane wrapper
-                ret = self.regrid_data_plane.run_at_time_once(time_info,
-                                                              var_list,
-                                                              data_type=dtype)
-                self.all_commands.extend(self.regrid_data_plane.all_commands)
-                self.regrid_data_plane.all_commands.clear()
+                # start RegridDataPlane wrapper
+                num_queued = len(self.regrid_data_plane.queued_commands)
+                if self.regrid_data_plane.run_at_time_once(time_info,
+                                                           var_list,
+                                                           data_type=dtype,
+                                                           queue=True):
+                    queued = (
+                        self.regrid_data_plane.queued_commands[num_queued:]
+                    )
+                    started_points.append(
+                        (track_point, [future for _, _, future in queued])
+                    )
+
+            # if RegridDataPlane failed to run for FCST, skip OBS
+            track_points = [track_point
+                            for track_point, futures in started_points
+                            if all(self._command_succeeded(future)
+                                   for future in futures)]
+
+            # wait for all tiles to be created
+            self.regrid_data_plane.wait_for_commands()
+            self.all_commands.extend(self.regrid_data_plane.all_commands)
+            self.regrid_data_plane.all_commands.clear()
+
+    @staticmethod
+    def _command_succeeded(future):
+        """! Wait for a command that was started in the background
 
-                # if RegridDataPlane failed to run for FCST, skip OBS
-                if not ret:
-                    break
+            @param future Future object of the command
+            @returns True if the command returned 0, False otherwise
+        """
+        try:
+            ret, _ = future.result()
+        except Exception:
+            return False
+        return not ret
 
     @staticmethod
     def get_header_indices(header_line):
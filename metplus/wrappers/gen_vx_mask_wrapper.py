@@ -11,6 +11,7 @@ Condition codes: 0 for success, 1 for failure
 """
 
 import os
+import shutil
 
 from ..util import met_util as util
 from ..util import time_util
@@ -119,7 +120,7 @@ class GenVxMaskWrapper(CommandBuilder):
 
         # create full output dir if it doesn't already exist
         if not os.path.exists(parent_dir):
-            os.makedirs(parent_dir)
+            os.makedirs(parent_dir, exist_ok=True)
 
         # add arguments
         cmd += ' ' + self.args
@@ -166,6 +167,13 @@ class GenVxMaskWrapper(CommandBuilder):
         # there is no config file, so using CommandBuilder implementation
         self.set_environment_variables(time_info)
 
+        # write temporary files to a directory for each process if run times
+        # are processed in parallel so they do not overwrite each other
+        temp_dir = os.path.join(self.config.getdir('STAGING_DIR'),
+                                'gen_vx_mask')
+        if self.config.getint('config', 'METPLUS_PARALLEL_WORKERS', 1) > 1:
+            temp_dir = os.path.join(temp_dir, str(os.getpid()))
+
         # loop over mask templates and command line args,
         temp_file = ''
         for index, (mask_template, cmd_args) in enumerate(zip(self.c_dict['MASK_INPUT_TEMPLATES'],
@@ -185,20 +193,20 @@ class GenVxMaskWrapper(CommandBuilder):
                 break
 
             # if not the last iteration, write to temporary file
-            temp_file = os.path.join(self.config.getdir('STAGING_DIR'),
-                                     'gen_vx_mask',
-                                     f'temp_{index}.nc')
+            temp_file = os.path.join(temp_dir, f'temp_{index}.nc')
             self.set_output_path(temp_file)
 
             # run GenVxMask
             self.build()
 
         # use final output path for last (or only) run
-        if not self.find_and_check_output_file(time_info):
-            return
+        if self.find_and_check_output_file(time_info):
+            # run GenVxMask
+            self.build()
 
-        # run GenVxMask
-        self.build()
+        # remove temporary files written by this process
+        if temp_file and os.path.basename(temp_dir) == str(os.getpid()):
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
     def find_input_files(self, time_info, temp_file):
         """!Handle setting of input file list.
@@ -12,11 +12,15 @@ Condition codes: 0 for success, 1 for failure
 
 import logging
 import os
+import sys
 import copy
 import re
+import runpy
 import subprocess
 import datetime
 import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 from ..util import met_util as util
 from . import CommandBuilder
@@ -65,7 +69,8 @@ class MakePlotsWrapper(CommandBuilder):
         'VERIF_CASE', 'VERIF_TYPE', 'INPUT_BASE_DIR', 'OUTPUT_BASE_DIR',
         'SCRIPTS_BASE_DIR', 'DATE_TYPE', 'VALID_BEG', 'VALID_END',
         'INIT_BEG', 'INIT_END', 'AVERAGE_METHOD', 'CI_METHOD',
-        'VERIF_GRID', 'EVENT_EQUALIZATION', 'LOG_METPLUS', 'LOG_LEVEL'
+        'VERIF_GRID', 'EVENT_EQUALIZATION', 'LOG_METPLUS', 'LOG_LEVEL',
+        'STAT_CACHE_DIR',
     ]
 
     def __init__(self, config, instance=None, config_overrides={}):
@@ -109,6 +114,11 @@ class MakePlotsWrapper(CommandBuilder):
         c_dict['INPUT_BASE_DIR'] = self.config.getdir('MAKE_PLOTS_INPUT_DIR')
         c_dict['OUTPUT_BASE_DIR'] = self.config.getdir('MAKE_PLOTS_OUTPUT_DIR')
         c_dict['SCRIPTS_BASE_DIR'] = self.config.getdir('MAKE_PLOTS_SCRIPTS_DIR')
+        # directory to store parsed .stat files that are read by the
+        # plotting scripts. Files are only parsed once if set
+        c_dict['STAT_CACHE_DIR'] = self.config.getdir(
+            'MAKE_PLOTS_STAT_CACHE_DIR', ''
+        )
         c_dict['DATE_TYPE'] = self.config.getstr('config', 'DATE_TYPE')
         c_dict['VALID_BEG'] = self.config.getstr('config', 'VALID_BEG', '')
         c_dict['VALID_END'] = self.config.getstr('config', 'VALID_END', '')
@@ -211,6 +221,26 @@ class MakePlotsWrapper(CommandBuilder):
         c_dict['EVENT_EQUALIZATION'] = (
             self.config.getstr('config', 'MAKE_PLOTS_EVENT_EQUALIZATION')
         )
+        # run plotting scripts in the wrapper process instead of starting a
+        # new python process for each script
+        c_dict['IN_PROCESS'] = self.config.getbool('config',
+                                                   'MAKE_PLOTS_IN_PROCESS',
+                                                   False)
+        c_dict['WORKERS'] = self.config.getint('config',
+                                               'MAKE_PLOTS_WORKERS',
+                                               1)
+        if c_dict['WORKERS'] is None or c_dict['WORKERS'] < 1:
+            self.log_error("MAKE_PLOTS_WORKERS must be a positive integer")
+
+        # scripts run in process are run in a forked process so that the
+        # environment of the wrapper process is not changed
+        if (c_dict['IN_PROCESS'] and
+                'fork' not in multiprocessing.get_all_start_methods()):
+            self.logger.warning("Cannot run plotting scripts in process on "
+                                "this platform. Running each script in a "
+                                "new process")
+            c_dict['IN_PROCESS'] = False
+
         c_dict['LOG_METPLUS'] = self.config.getstr('config', 'LOG_METPLUS')
         c_dict['LOG_LEVEL'] = self.config.getstr('config', 'LOG_LEVEL')
 
@@ -276,6 +306,9 @@ class MakePlotsWrapper(CommandBuilder):
             scripts_to_run = self.accepted_verif_lists.get(self.c_dict['VERIF_CASE'])\
                 .get(self.c_dict['VERIF_TYPE'])
 
+        # scripts to run for each run setting if running in process
+        plot_jobs = []
+
         # Loop over run settings.
         for runtime_settings_dict in runtime_settings_dict_list:
             # set environment variables
@@ -297,6 +330,23 @@ class MakePlotsWrapper(CommandBuilder):
             # send environment variables to logger
             self.set_environment_variables()
 
+            if self.c_dict['IN_PROCESS']:
+                plot_jobs.append((self.c_dict['SCRIPTS_BASE_DIR'],
+                                  scripts_to_run,
+                                  dict(self.env)))
+                # add scripts to list of all commands run
+                for script in scripts_to_run:
+                    self.plotting_script = (
+                        os.path.join(self.c_dict['SCRIPTS_BASE_DIR'],
+                                     script)
+                    )
+                    self.all_commands.append(
+                        (self.get_command(),
+                         self.print_all_envs(print_copyable=False))
+                    )
+                self.clear()
+                continue
+
             for script in scripts_to_run:
                 self.plotting_script = (
                     os.path.join(self.c_dict['SCRIPTS_BASE_DIR'],
@@ -305,3 +355,90 @@ class MakePlotsWrapper(CommandBuilder):
 
                 self.build()
                 self.clear()
+
+        if plot_jobs:
+            self.run_plots_in_process(plot_jobs)
+
+    def run_plots_in_process(self, plot_jobs):
+        """! Run plotting scripts without starting a new python process for
+             each script. The scripts for each run setting are run one after
+             the other in the same process so the modules they import and
+             the .stat files they read are loaded once and shared. Run
+             settings are split across MAKE_PLOTS_WORKERS processes that are
+             forked from the current process, so the environment of the
+             current process is never changed.
+
+             @param plot_jobs list of tuples containing the directory of the
+              plotting scripts, the list of scripts to run, and a dictionary
+              of the environment variables to set for the scripts
+        """
+        num_workers = min(self.c_dict['WORKERS'], len(plot_jobs))
+        self.logger.info(f"Running plotting scripts for {len(plot_jobs)} "
+                         f"run settings in process using {num_workers} "
+                         "worker(s)")
+        with ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=multiprocessing.get_context('fork')
+        ) as pool:
+            all_results = list(pool.map(run_plotting_scripts,
+                                        *zip(*plot_jobs)))
+
+        for results in all_results:
+            for script_path, error in results:
+                if error:
+                    self.log_error(f"Plotting script {script_path} "
+                                   f"failed: {error}")
+                else:
+                    self.logger.debug(f"Finished running {script_path}")
+
+
+def run_plotting_scripts(scripts_dir, scripts, env):
+    """! Run plotting scripts in the current process. The variables in env
+         are added to the environment of the process while the scripts run
+         and the environment is restored afterwards. Changing the environment
+         is not thread-safe, so MakePlotsWrapper calls this function in a
+         forked process. Log handlers that are added by a script and figures
+         that are left open are removed after each script finishes.
+
+         @param scripts_dir directory containing the plotting scripts
+         @param scripts list of plotting script names to run in order
+         @param env dictionary of environment variables to set
+         @returns list of tuples containing the path to each script and an
+          error message if it failed or None if it succeeded
+    """
+    # scripts import plot_util from the scripts directory
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
+
+    logger = logging.getLogger(env.get('LOG_METPLUS'))
+    original_env = dict(os.environ)
+    results = []
+    try:
+        os.environ.update(env)
+        for script in scripts:
+            script_path = os.path.join(scripts_dir, script)
+            original_handlers = list(logger.handlers)
+            error = None
+            try:
+                runpy.run_path(script_path, run_name='__main__')
+            except SystemExit as err:
+                if err.code not in (None, 0):
+                    error = f"exited with {err.code}"
+            except Exception as err:
+                error = f"{type(err).__name__}: {err}"
+            finally:
+                for handler in logger.handlers[:]:
+                    if handler not in original_handlers:
+                        logger.removeHandler(handler)
+                        handler.close()
+
+                pyplot = sys.modules.get('matplotlib.pyplot')
+                if pyplot is not None:
+                    pyplot.close('all')
+
+            results.append((script_path, error))
+    finally:
+        os.environ.clear()
+        os.environ.update(original_env)
+
+    return results
@@ -11,7 +11,10 @@ Condition codes: 0 for success, 1 for failure
 """
 
 import os
+import json
+import hashlib
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from ..util import met_util as util
 from ..util import time_util
@@ -23,6 +26,12 @@ from ..util import do_string_sub, getlist
 @endcode
 '''
 
+# extensions of files that are loaded into the database
+STAT_FILE_EXTENSIONS = ('.stat', '.tcst')
+
+# version of the format of the load manifest file
+LOAD_MANIFEST_VERSION = 1
+
 class METDbLoadWrapper(RuntimeFreqWrapper):
     """! Config variable names - All names are prepended with MET_DB_LOAD_MV_
          and all c_dict values are prepended with MV_.
@@ -51,6 +60,7 @@ class METDbLoadWrapper(RuntimeFreqWrapper):
                                      'ush',
                                      'met_db_load')
         self.app_name = os.path.basename(self.app_path)
+        self.stat_dir_signatures = {}
         super().__init__(config,
                          instance=instance,
                          config_overrides=config_overrides)
@@ -80,6 +90,17 @@ class METDbLoadWrapper(RuntimeFreqWrapper):
                                 True)
         )
 
+        c_dict['SCAN_WORKERS'] = (
+            self.config.getint('config', 'MET_DB_LOAD_SCAN_WORKERS', 1)
+        )
+        if c_dict['SCAN_WORKERS'] is None or c_dict['SCAN_WORKERS'] < 1:
+            self.log_error('MET_DB_LOAD_SCAN_WORKERS must be a positive '
+                           'integer')
+
+        c_dict['MANIFEST_FILE'] = (
+            self.config.getraw('config', 'MET_DB_LOAD_MANIFEST_FILE')
+        )
+
         # read config variables
         for name, type in self.CONFIG_NAMES.items():
             if type == 'int':
@@ -135,12 +156,21 @@ class METDbLoadWrapper(RuntimeFreqWrapper):
 
             self.set_environment_variables(time_info)
 
-            if not self.replace_values_in_xml(time_info):
+            input_paths = do_string_sub(self.c_dict['INPUT_TEMPLATE'],
+                                        **time_info)
+            stat_dirs = self.get_stat_directories(input_paths)
+            if self.c_dict['MANIFEST_FILE'] and not stat_dirs:
+                self.logger.info("No new or changed stat files to load")
+                continue
+
+            if not self.replace_values_in_xml(time_info, stat_dirs):
                 return
 
             # run command
             if not self.build():
                 success = False
+            elif self.c_dict['MANIFEST_FILE']:
+                self.update_load_manifest(stat_dirs)
 
             # remove tmp file
             if self.c_dict.get('REMOVE_TMP_XML', True):
@@ -160,30 +190,59 @@ class METDbLoadWrapper(RuntimeFreqWrapper):
 
     def get_stat_directories(self, input_paths):
         """! Traverse through files under input path and find all directories
-        that contain .stat or .tcst files.
+        that contain .stat or .tcst files. If MET_DB_LOAD_MANIFEST_FILE is
+        set, only directories that contain stat files that were added or
+        changed since they were last loaded are returned.
 
-        @param input_path top level directory to search
-        @returns list of unique directories that contain stat files
+        @param input_paths comma separated list of top level directories to
+         search
+        @returns sorted list of unique directories that contain stat files
         """
-        stat_dirs = set()
+        use_manifest = bool(self.c_dict.get('MANIFEST_FILE'))
+        stat_dirs = {}
         for input_path in getlist(input_paths):
             self.logger.debug("Finding directories with stat files "
                               f"under {input_path}")
-            for root, _, files in os.walk(input_path):
-                for filename in files:
-                    if (not filename.endswith('.stat') and
-                            not filename.endswith('.tcst')):
-                        continue
-                    filepath = os.path.join(root, filename)
-                    stat_dir = os.path.dirname(filepath)
-                    stat_dirs.add(stat_dir)
-
-        stat_dirs = list(stat_dirs)
+            stat_dirs.update(
+                find_stat_directories(input_path,
+                                      self.c_dict.get('SCAN_WORKERS', 1),
+                                      get_signature=use_manifest)
+            )
+
+        if use_manifest:
+            loaded = read_load_manifest(self.c_dict['MANIFEST_FILE'])
+            num_found = len(stat_dirs)
+            stat_dirs = {
+                stat_dir: signature
+                for stat_dir, signature in stat_dirs.items()
+                if loaded.get(os.path.abspath(stat_dir)) != signature
+            }
+            self.logger.debug(f"Skipping {num_found - len(stat_dirs)} "
+                              "directories that have not changed since "
+                              "they were loaded")
+
+        # signatures of directories that are loaded are added to the
+        # manifest after met_db_load runs successfully
+        self.stat_dir_signatures = stat_dirs
+
+        stat_dirs = sorted(stat_dirs)
         for stat_dir in stat_dirs:
             self.logger.info(f"Adding stat file directory: {stat_dir}")
 
         return stat_dirs
 
+    def update_load_manifest(self, stat_dirs):
+        """! Record that the stat files in a list of directories were loaded
+        so they are skipped on the next run
+
+        @param stat_dirs list of directories that were loaded
+        """
+        manifest_file = self.c_dict['MANIFEST_FILE']
+        self.logger.debug(f"Updating load manifest: {manifest_file}")
+        write_load_manifest(manifest_file,
+                            {stat_dir: self.stat_dir_signatures[stat_dir]
+                             for stat_dir in stat_dirs})
+
     def format_stat_dirs(self, stat_dirs):
         """! Format list of stat directories to substitute into XML file.
         <vaL></val> tags wil be added around each value.
@@ -198,15 +257,16 @@ class METDbLoadWrapper(RuntimeFreqWrapper):
         output_string = '\n      '.join(formatted_stat_dirs)
         return output_string
 
-    def populate_sub_dict(self, time_info):
+    def populate_sub_dict(self, time_info, stat_dirs=None):
         sub_dict = {}
 
         # substitute values from time dictionary
-        input_paths = (
-            do_string_sub(self.c_dict['INPUT_TEMPLATE'],
-                          **time_info)
-        )
-        stat_dirs = self.get_stat_directories(input_paths)
+        if stat_dirs is None:
+            input_paths = (
+                do_string_sub(self.c_dict['INPUT_TEMPLATE'],
+                              **time_info)
+            )
+            stat_dirs = self.get_stat_directories(input_paths)
         formatted_stat_dirs = self.format_stat_dirs(stat_dirs)
         sub_dict['METPLUS_INPUT_PATHS'] = formatted_stat_dirs
 
@@ -222,7 +282,7 @@ class METDbLoadWrapper(RuntimeFreqWrapper):
 
         return sub_dict
 
-    def replace_values_in_xml(self, time_info):
+    def replace_values_in_xml(self, time_info, stat_dirs=None):
         self.c_dict['XML_TMP_FILE'] = None
 
         xml_template = self.c_dict.get('XML_TEMPLATE')
@@ -230,7 +290,7 @@ class METDbLoadWrapper(RuntimeFreqWrapper):
             return False
 
         # set up dictionary of text to substitute in XML file
-        sub_dict = self.populate_sub_dict(time_info)
+        sub_dict = self.populate_sub_dict(time_info, stat_dirs)
 
         # open XML template file and replace any values encountered
         with open(xml_template, 'r') as file_handle:
@@ -254,3 +314,143 @@ class METDbLoadWrapper(RuntimeFreqWrapper):
 
         self.c_dict['XML_TMP_FILE'] = out_path
         return True
+
+
+def scan_stat_directory(dirpath, get_signature=False):
+    """! Read the contents of a directory to find stat files and
+    subdirectories. Symbolic links to directories are not followed, like
+    os.walk. Files are only examined with stat if get_signature is True.
+
+    @param dirpath directory to read
+    @param get_signature if True, compute a value from the name, size, and
+     modification time of each stat file that changes if any of them change
+    @returns tuple of list of subdirectory paths and signature of the stat
+     files in the directory. The signature is None if the directory does not
+     contain stat files or an empty string if get_signature is False
+    """
+    subdirs = []
+    stat_files = []
+    has_stat_files = False
+    try:
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+                    if not entry.name.endswith(STAT_FILE_EXTENSIONS):
+                        continue
+                    has_stat_files = True
+                    if get_signature:
+                        entry_stat = entry.stat()
+                        stat_files.append((entry.name, entry_stat.st_size,
+                                           entry_stat.st_mtime_ns))
+                except OSError:
+                    continue
+    except OSError:
+        return subdirs, None
+
+    if not has_stat_files:
+        return subdirs, None
+
+    if not get_signature:
+        return subdirs, ''
+
+    signature = hashlib.sha1()
+    for name, size, mtime_ns in sorted(stat_files):
+        signature.update(f'{name}\0{size}\0{mtime_ns}\n'.encode('utf-8'))
+    return subdirs, signature.hexdigest()
+
+
+def find_stat_directories(top, num_workers=1, get_signature=False):
+    """! Find all directories under a top level directory that contain
+    .stat or .tcst files. Directories are read at the same time using a
+    pool of threads if num_workers is greater than 1.
+
+    @param top directory to search
+    @param num_workers (optional) number of directories to read at the same
+     time. Default is 1
+    @param get_signature (optional) if True, compute a signature for each
+     directory from the name, size, and modification time of its stat files.
+     Default is False
+    @returns dictionary where the key is a directory that contains stat
+     files and the value is the signature of the directory (empty string if
+     get_signature is False)
+    """
+    stat_dirs = {}
+
+    if num_workers == 1:
+        dirs_to_scan = [top]
+        while dirs_to_scan:
+            dirpath = dirs_to_scan.pop()
+            subdirs, signature = scan_stat_directory(dirpath, get_signature)
+            if signature is not None:
+                stat_dirs[dirpath] = signature
+            dirs_to_scan.extend(subdirs)
+        return stat_dirs
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        pending = {executor.submit(scan_stat_directory, top, get_signature):
+                   top}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dirpath = pending.pop(future)
+                subdirs, signature = future.result()
+                if signature is not None:
+                    stat_dirs[dirpath] = signature
+                for subdir in subdirs:
+                    pending[executor.submit(scan_stat_directory, subdir,
+                                            get_signature)] = subdir
+
+    return stat_dirs
+
+
+def read_load_manifest(manifest_file):
+    """! Read the signatures of directories that have already been loaded
+
+    @param manifest_file path to load manifest file
+    @returns dictionary where the key is the absolute path of a directory
+     and the value is the signature of its stat files when it was loaded.
+     The dictionary is empty if the file does not exist or cannot be read
+    """
+    try:
+        with open(manifest_file, 'r') as file_handle:
+            manifest = json.load(file_handle)
+    except (OSError, ValueError):
+        return {}
+
+    if (not isinstance(manifest, dict) or
+            manifest.get('version') != LOAD_MANIFEST_VERSION):
+        return {}
+
+    return manifest.get('directories', {})
+
+
+def write_load_manifest(manifest_file, loaded_dirs):
+    """! Add signatures of directories that were loaded to the load manifest.
+    The manifest is read again before it is written so directories that
+    were added by another process in the meantime are kept. The file is
+    written to a temporary file that is renamed when it is complete.
+
+    @param manifest_file path to load manifest file
+    @param loaded_dirs dictionary where the key is a directory that was
+     loaded and the value is the signature of its stat files
+    """
+    directories = read_load_manifest(manifest_file)
+    for stat_dir, signature in loaded_dirs.items():
+        directories[os.path.abspath(stat_dir)] = signature
+
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_file))
+    os.makedirs(manifest_dir, exist_ok=True)
+    tmp_file = util.get_tmp_stage_path(manifest_file)
+    try:
+        with open(tmp_file, 'w') as file_handle:
+            json.dump({'version': LOAD_MANIFEST_VERSION,
+                       'directories': directories}, file_handle)
+        os.replace(tmp_file, manifest_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
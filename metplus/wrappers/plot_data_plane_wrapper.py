@@ -32,6 +32,10 @@ class PlotDataPlaneWrapper(CommandBuilder):
                          instance=instance,
                          config_overrides=config_overrides)
 
+        # postscript files from commands started in the background with
+        # the future of each command, converted to png after they finish
+        self.queued_conversions = []
+
     def create_c_dict(self):
         c_dict = super().create_c_dict()
         c_dict['VERBOSITY'] = (
@@ -137,10 +141,14 @@ class PlotDataPlaneWrapper(CommandBuilder):
 
                 self.run_at_time_once(time_info)
 
-    def run_at_time_once(self, time_info):
+    def run_at_time_once(self, time_info, queue=False):
         """! Process runtime and try to build command to run ascii2nc
              Args:
                 @param time_info dictionary containing timing information
+                @param queue (optional) if True, start the command in the
+                 background and return without waiting for it to finish.
+                 Call wait_for_commands to wait for it and convert the
+                 output to an image if requested
         """
         self.clear()
 
@@ -158,13 +166,44 @@ class PlotDataPlaneWrapper(CommandBuilder):
         # set environment variables if using config file
         self.set_environment_variables(time_info)
 
-        if not self.build():
+        if not self.build(queue=queue):
             return False
 
-        if self.c_dict['CONVERT_TO_IMAGE']:
-            return self.convert_to_png(self.get_output_path())
+        if not self.c_dict['CONVERT_TO_IMAGE']:
+            return True
+
+        # convert output to an image after the command finishes
+        if queue:
+            self.queued_conversions.append((self.get_output_path(),
+                                            self.queued_commands[-1][2]))
+            return True
+
+        return self.convert_to_png(self.get_output_path())
+
+    def wait_for_commands(self):
+        """! Wait for all commands that were queued to finish. If the output
+             of the commands should be converted to images, start the
+             conversions in the background for the commands that succeeded
+             and wait for them to finish.
+
+             @returns True if all queued commands succeeded, False otherwise
+        """
+        success = super().wait_for_commands()
+
+        queued_conversions = self.queued_conversions
+        self.queued_conversions = []
+        for ps_filename, future in queued_conversions:
+            # skip conversion if plot_data_plane failed
+            if future.exception() is not None or future.result()[0]:
+                continue
+
+            if not self.convert_to_png(ps_filename, queue=True):
+                success = False
+
+        if not super().wait_for_commands():
+            success = False
 
-        return True
+        return success
 
     def find_input_files(self, time_info):
         # if using python embedding input, don't check if file exists,
@@ -211,10 +250,12 @@ class PlotDataPlaneWrapper(CommandBuilder):
                                           **time_info)
             self.args.append(f" -plot_range {range_min_max}")
 
-    def convert_to_png(self, ps_filename):
+    def convert_to_png(self, ps_filename, queue=False):
         """! Convert output postscript file to a rotated png image file
 
             @param ps_filename ps file generated by plot_data_plane
+            @param queue (optional) if True, start the command in the
+             background and return without waiting for it to finish
             @returns True if success, False if error
         """
         convert_exe = self.c_dict.get('CONVERT_EXE')
@@ -228,4 +269,4 @@ class PlotDataPlaneWrapper(CommandBuilder):
                            f"-background white -flatten "
                            f"{ps_filename} {png_filename}")
 
-        return self.run_command(convert_command)
+        return self.run_command(convert_command, queue=queue)
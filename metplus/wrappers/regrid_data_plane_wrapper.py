@@ -176,14 +176,20 @@ class RegridDataPlaneWrapper(ReformatGriddedWrapper):
         time_info['level'] = time_util.get_seconds_from_string(level, 'H')
         return self.find_and_check_output_file(time_info)
 
-    def run_once_per_field(self, time_info, var_list, data_type):
+    def run_once_per_field(self, time_info, var_list, data_type,
+                           queue=False):
         """! Loop over fields and run command for each.
 
             @param time_info time dictionary used for string substitution
             @param var_list list of field dictionaries to process
             @param data_type type of data to process, i.e. FCST or OBS
+            @param queue (optional) if True, return without waiting for the
+             commands to finish. Call wait_for_commands to check them
         """
         return_status = True
+
+        # each field is written to a separate output file, so the commands
+        # are run in the background and checked after all are started
         for field_info in var_list:
             self.args.clear()
 
@@ -210,11 +216,15 @@ class RegridDataPlaneWrapper(ReformatGriddedWrapper):
             if not self.handle_output_file(time_info,
                                            field_info,
                                            data_type):
-                return False
+                return_status = False
+                break
 
-            if not self.build():
+            if not self.build(queue=True):
                 return_status = False
 
+        if not queue and not self.wait_for_commands():
+            return_status = False
+
         return return_status
 
     def get_output_names(self, var_list, data_type):
@@ -258,13 +268,16 @@ class RegridDataPlaneWrapper(ReformatGriddedWrapper):
 
         return output_names
 
-    def run_once_for_all_fields(self, time_info, var_list, data_type):
+    def run_once_for_all_fields(self, time_info, var_list, data_type,
+                                queue=False):
         """!Loop over fields to add each field info, then run command once to
             process all fields.
             Args:
                 @param time_info time dictionary used for string substitution
                 @param var_list list of field dictionaries to process
                 @param data_type type of data to process, i.e. FCST or OBS
+                @param queue (optional) if True, return without waiting for
+                 the command to finish. Call wait_for_commands to check it
         """
         self.set_command_line_arguments()
 
@@ -291,14 +304,20 @@ class RegridDataPlaneWrapper(ReformatGriddedWrapper):
             return False
 
         # build and run commands
-        return self.build()
+        return self.build(queue=queue)
 
-    def run_at_time_once(self, time_info, var_list, data_type):
+    def run_at_time_once(self, time_info, var_list, data_type, queue=False):
         """!Build command or commands to run at the given run time
             Args:
                 @param time_info time dictionary used for string substitution
                 @param var_list list of field dictionaries to process
                 @param data_type type of data to process, i.e. FCST or OBS
+                @param queue (optional) if True, start the commands in the
+                 background and return without waiting for them to finish.
+                 Call wait_for_commands to wait for them and check if they
+                 succeeded
+                @returns True if the commands were run (or started if queue
+                 is True) successfully, False otherwise
         """
         self.clear()
 
@@ -325,10 +344,12 @@ class RegridDataPlaneWrapper(ReformatGriddedWrapper):
         # determine if running once for all fields or once per field
         # if running once per field, loop over field list and run once for each
         if self.c_dict['ONCE_PER_FIELD']:
-            return self.run_once_per_field(time_info, var_list, data_type)
+            return self.run_once_per_field(time_info, var_list, data_type,
+                                           queue=queue)
 
         # if not running once per field, process all fields and run once
-        return self.run_once_for_all_fields(time_info, var_list, data_type)
+        return self.run_once_for_all_fields(time_info, var_list, data_type,
+                                            queue=queue)
 
     def find_input_files(self, time_info, data_type, var_list):
         """!Get input file and verification grid to process. Use the first field in the
@@ -236,7 +236,11 @@ class RuntimeFreqWrapper(CommandBuilder):
         self.logger.debug("Finding all input files")
         all_files = []
 
-        # loop over all init/valid times
+        # get all init/valid times and forecast leads, then compute the
+        # time information for all of them at once
+        loop_times = []
+        leads = []
+        input_dict = None
         loop_time = self.c_dict['START_TIME']
         while loop_time <= self.c_dict['END_TIME']:
             input_dict = set_input_dict(loop_time,
@@ -252,20 +256,25 @@ class RuntimeFreqWrapper(CommandBuilder):
                                          input_dict,
                                          wildcard_if_empty=wildcard_if_empty)
             for lead in lead_seq:
-                input_dict['lead'] = lead
-
-                # set current lead time config and environment variables
-                time_info = time_util.ti_calculate(input_dict)
-
-                file_dict = self.get_files_from_time(time_info)
-                if file_dict:
-                    if isinstance(file_dict, list):
-                        all_files.extend(file_dict)
-                    else:
-                        all_files.append(file_dict)
+                loop_times.append(loop_time)
+                leads.append(lead)
 
             loop_time += self.c_dict['TIME_INTERVAL']
 
+        time_table = time_util.ti_calculate_table(
+            loop_times,
+            leads,
+            loop_by='init' if use_init else 'valid',
+            input_dict=input_dict
+        )
+        for time_info in time_table:
+            file_dict = self.get_files_from_time(time_info)
+            if file_dict:
+                if isinstance(file_dict, list):
+                    all_files.extend(file_dict)
+                else:
+                    all_files.append(file_dict)
+
         if not all_files:
             return False
 
@@ -12,15 +12,7 @@ Condition codes: 0 for success, 1 for failure
 """
 
 import os
-
-# handle if module can't be loaded to run wrapper
-WRAPPER_CANNOT_RUN = False
-EXCEPTION_ERR = ''
-try:
-    import netCDF4
-except Exception as err_msg:
-    WRAPPER_CANNOT_RUN = True
-    EXCEPTION_ERR = err_msg
+import threading
 
 from ..util import met_util as util
 from ..util import do_string_sub, parse_template
@@ -30,6 +22,100 @@ from ..util import ti_get_lead_string
 from .plot_data_plane_wrapper import PlotDataPlaneWrapper
 from . import RuntimeFreqWrapper
 
+# prefix of SeriesAnalysis output variables that are read together
+SERIES_CNT_PREFIX = 'series_cnt_'
+
+# maximum number of values to read from a NetCDF variable at one time
+NETCDF_CHUNK_SIZE = 1024 * 1024
+
+# key is NetCDF file path, value is tuple of modification time of the file
+# and dictionary where key is variable name and value is tuple of
+# minimum, maximum, and number of values that are not masked
+_NETCDF_STATS_CACHE = {}
+_NETCDF_STATS_LOCK = threading.Lock()
+
+def get_netcdf_stats(filepath, variable_name):
+    """! Get the minimum, maximum, and number of valid values of a variable
+         in a NetCDF file. The first time a file is read, all of the
+         variables that start with series_cnt_ are read as well so that the
+         file is only opened once to get the values of every statistic. The
+         results are kept until the modification time of the file changes.
+
+         @param filepath NetCDF file to inspect
+         @param variable_name name of variable to read
+         @returns tuple containing the minimum, maximum, and number of values
+          that are not masked. Minimum and maximum are None if all values are
+          masked
+         @throws FileNotFoundError if the file does not exist or KeyError
+          if the variable is not found in the file
+    """
+    mtime = os.stat(filepath).st_mtime_ns
+    with _NETCDF_STATS_LOCK:
+        cached = _NETCDF_STATS_CACHE.get(filepath)
+    if cached is not None and cached[0] == mtime:
+        var_stats = cached[1]
+        if variable_name in var_stats:
+            return var_stats[variable_name]
+    else:
+        var_stats = {}
+
+    # netCDF4 is only needed to generate plots, so it is imported here
+    import netCDF4
+    with netCDF4.Dataset(filepath) as nc_file:
+        variables = nc_file.variables
+        names = [variable_name]
+        if not var_stats:
+            names.extend(name for name in variables
+                         if name.startswith(SERIES_CNT_PREFIX) and
+                         name != variable_name)
+        new_stats = {name: _read_variable_stats(variables[name])
+                     for name in names}
+
+    with _NETCDF_STATS_LOCK:
+        cached = _NETCDF_STATS_CACHE.get(filepath)
+        if cached is None or cached[0] != mtime:
+            cached = _NETCDF_STATS_CACHE[filepath] = (mtime, {})
+        cached[1].update(new_stats)
+
+    return new_stats[variable_name]
+
+def _read_variable_stats(nc_var):
+    """! Compute minimum, maximum, and number of valid values of a NetCDF
+         variable, reading a block of rows at a time so the whole variable
+         is not held in memory. Masked values are ignored.
+
+         @param nc_var netCDF4 Variable object
+         @returns tuple of minimum, maximum, and count of values
+    """
+    import numpy
+    min_value = None
+    max_value = None
+    count = 0
+
+    if nc_var.ndim == 0:
+        chunks = [nc_var[...]]
+    else:
+        row_size = int(numpy.prod(nc_var.shape[1:], dtype=numpy.int64))
+        num_rows = max(1, NETCDF_CHUNK_SIZE // max(1, row_size))
+        chunks = (nc_var[start:start + num_rows]
+                  for start in range(0, nc_var.shape[0], num_rows))
+
+    for chunk in chunks:
+        chunk = numpy.ma.asarray(chunk)
+        chunk_count = int(chunk.count())
+        if not chunk_count:
+            continue
+
+        count += chunk_count
+        chunk_min = chunk.min()
+        chunk_max = chunk.max()
+        if min_value is None or chunk_min < min_value:
+            min_value = chunk_min
+        if max_value is None or chunk_max > max_value:
+            max_value = chunk_max
+
+    return min_value, max_value, count
+
 class SeriesAnalysisWrapper(RuntimeFreqWrapper):
     """!  Performs series analysis with filtering options
     """
@@ -70,9 +156,14 @@ class SeriesAnalysisWrapper(RuntimeFreqWrapper):
         if self.c_dict['GENERATE_PLOTS']:
             self.plot_data_plane = self.plot_data_plane_init()
 
-        if WRAPPER_CANNOT_RUN:
-            self.log_error("There was a problem importing modules: "
-                           f"{EXCEPTION_ERR}\n")
+            # numpy and netCDF4 are only needed to read the output to
+            # generate plots, so they are not imported until they are used
+            try:
+                import numpy
+                import netCDF4
+            except Exception as err_msg:
+                self.log_error("There was a problem importing modules: "
+                               f"{err_msg}\n")
 
         self.logger.debug("Initialized SeriesAnalysisWrapper")
 
@@ -815,7 +906,9 @@ class SeriesAnalysisWrapper(RuntimeFreqWrapper):
         return cmd
 
     def generate_plots(self, fcst_path, time_info, storm_id):
-        """! Generate the plots from the series_analysis output.
+        """! Generate the plots from the series_analysis output. The
+             PlotDataPlane commands are started in the background so up to
+             METPLUS_COMMAND_WORKERS plots are created at the same time.
 
              @param time_info dictionary containing time information
              @param storm_id storm ID to process
@@ -864,7 +957,10 @@ class SeriesAnalysisWrapper(RuntimeFreqWrapper):
                     self.get_netcdf_min_max(plot_input,
                                             f'series_cnt_{cur_stat}')
                 )
-                range_min_max = f"{min_value} {max_value}"
+                # let plot_data_plane choose the range if all values are
+                # masked or the statistic could not be read
+                range_min_max = ('' if min_value is None
+                                 else f"{min_value} {max_value}")
 
                 plot_output = (f"{os.path.splitext(plot_input)[0]}_"
                                f"{cur_stat}.ps")
@@ -878,16 +974,20 @@ class SeriesAnalysisWrapper(RuntimeFreqWrapper):
                 self.plot_data_plane.c_dict['FIELD_NAME'] = f"series_cnt_{cur_stat}"
                 self.plot_data_plane.c_dict['FIELD_LEVEL'] = level
                 self.plot_data_plane.c_dict['RANGE_MIN_MAX'] = range_min_max
-                self.plot_data_plane.run_at_time_once(time_info)
-                self.all_commands.extend(self.plot_data_plane.all_commands)
-                self.plot_data_plane.all_commands.clear()
+                self.plot_data_plane.run_at_time_once(time_info, queue=True)
 
                 png_filename = f"{os.path.splitext(plot_output)[0]}.png"
                 self.c_dict['PNG_FILES'][key].append(png_filename)
 
+        # wait for all plots to be created and converted to png
+        self.plot_data_plane.wait_for_commands()
+        self.all_commands.extend(self.plot_data_plane.all_commands)
+        self.plot_data_plane.all_commands.clear()
+
     def generate_animations(self):
         """! Use ImageMagick convert to create an animated gif from the png
-              images generated from the current run
+              images generated from the current run. Up to
+              METPLUS_COMMAND_WORKERS gifs are created at the same time.
         """
         success = True
 
@@ -913,9 +1013,12 @@ class SeriesAnalysisWrapper(RuntimeFreqWrapper):
             gif_filepath = os.path.join(animate_dir, gif_file)
             convert_command = (f"{convert_exe} -dispose Background -delay 100 "
                                f"{' '.join(files)} {gif_filepath}")
-            if not self.run_command(convert_command):
+            if not self.run_command(convert_command, queue=True):
                 success = False
 
+        if not self.wait_for_commands():
+            success = False
+
         return success
 
     def get_fcst_file_info(self, fcst_path):
@@ -985,9 +1088,8 @@ class SeriesAnalysisWrapper(RuntimeFreqWrapper):
             None, None if something went wrong
         """
         try:
-            nc_var = netCDF4.Dataset(filepath).variables[variable_name]
-            min_value = nc_var[:].min()
-            max_value = nc_var[:].max()
+            min_value, max_value, _ = get_netcdf_stats(filepath,
+                                                       variable_name)
             return min_value, max_value
         except (FileNotFoundError, KeyError):
             return None, None
@@ -110,6 +110,49 @@ class StatAnalysisWrapper(CommandBuilder):
         'FCST_INIT_HOUR_LIST', 'OBS_INIT_HOUR_LIST'
     ]
 
+    # stat_analysis job command options used to filter each job when
+    # jobs that read the same lookin directories are run together
+    job_filter_options = {
+        'MODEL': '-model',
+        'DESC': '-desc',
+        'OBTYPE': '-obtype',
+        'FCST_LEAD': '-fcst_lead',
+        'OBS_LEAD': '-obs_lead',
+        'FCST_VALID_BEG': '-fcst_valid_beg',
+        'FCST_VALID_END': '-fcst_valid_end',
+        'FCST_VALID_HOUR': '-fcst_valid_hour',
+        'OBS_VALID_BEG': '-obs_valid_beg',
+        'OBS_VALID_END': '-obs_valid_end',
+        'OBS_VALID_HOUR': '-obs_valid_hour',
+        'FCST_INIT_BEG': '-fcst_init_beg',
+        'FCST_INIT_END': '-fcst_init_end',
+        'FCST_INIT_HOUR': '-fcst_init_hour',
+        'OBS_INIT_BEG': '-obs_init_beg',
+        'OBS_INIT_END': '-obs_init_end',
+        'OBS_INIT_HOUR': '-obs_init_hour',
+        'FCST_VAR': '-fcst_var',
+        'OBS_VAR': '-obs_var',
+        'FCST_UNITS': '-fcst_units',
+        'OBS_UNITS': '-obs_units',
+        'FCST_LEVEL': '-fcst_lev',
+        'OBS_LEVEL': '-obs_lev',
+        'VX_MASK': '-vx_mask',
+        'INTERP_MTHD': '-interp_mthd',
+        'INTERP_PNTS': '-interp_pnts',
+        'FCST_THRESH': '-fcst_thresh',
+        'OBS_THRESH': '-obs_thresh',
+        'COV_THRESH': '-cov_thresh',
+        'ALPHA': '-alpha',
+        'LINE_TYPE': '-line_type',
+    }
+
+    # settings that are unique to each job and do not prevent jobs from
+    # being run together
+    job_specific_settings = ['JOB',
+                             'DUMP_ROW_FILENAME',
+                             'OUT_STAT_FILENAME',
+                             ]
+
     def __init__(self, config, instance=None, config_overrides={}):
         self.app_path = os.path.join(config.getdir('MET_BIN_DIR', ''),
                                      'stat_analysis')
@@ -175,6 +218,10 @@ class StatAnalysisWrapper(CommandBuilder):
                                                    f'STAT_ANALYSIS_{job_conf}',
                                                    '')
 
+        c_dict['MERGE_JOBS'] = self.config.getbool('config',
+                                                   'STAT_ANALYSIS_MERGE_JOBS',
+                                                   False)
+
         # read in all lists except field lists, which will be read in afterwards and checked
         all_lists_to_read = self.expected_config_lists + self.list_categories
         non_field_lists = [conf_list for
@@ -237,6 +284,11 @@ class StatAnalysisWrapper(CommandBuilder):
         if not c_dict['OUTPUT_DIR']:
             self.log_error("Must set STAT_ANALYSIS_OUTPUT_DIR")
 
+        # jobs can only be combined using the jobs list in the config file
+        if c_dict['MERGE_JOBS'] and not c_dict.get('CONFIG_FILE'):
+            self.log_error("Must set STAT_ANALYSIS_CONFIG_FILE if "
+                           "STAT_ANALYSIS_MERGE_JOBS is True")
+
         for job_conf in ['JOB_NAME', 'JOB_ARGS']:
             if not c_dict[job_conf]:
                 self.log_error(f"Must set STAT_ANALYSIS_{job_conf} to run StatAnalysis")
@@ -1708,91 +1760,220 @@ class StatAnalysisWrapper(CommandBuilder):
 
     def run_stat_analysis_job(self, runtime_settings_dict_list):
         """! Sets environment variables need to run StatAnalysis jobs
-             and calls the tool for each job.
+             and calls the tool for each job. Up to METPLUS_COMMAND_WORKERS
+             jobs are run at the same time. A job that writes the same
+             -dump_row or -out_stat file as a job that is still running waits
+             for the running jobs to finish so the jobs write the file in
+             order. If STAT_ANALYSIS_MERGE_JOBS is True, jobs that read the
+             same lookin directories are run with a single call to the tool.
 
              Args:
                  @param runtime_settings_dict_list list of dictionaries
                   containing information needed to run a StatAnalysis job
         """
-        for runtime_settings_dict in runtime_settings_dict_list:
-            if not self.create_output_directories(runtime_settings_dict):
-                continue
+        runtime_settings_dict_list = [
+            runtime_settings_dict
+            for runtime_settings_dict in runtime_settings_dict_list
+            if self.create_output_directories(runtime_settings_dict)
+        ]
 
-            # Set environment variables and run stat_analysis.
-            for name, value in runtime_settings_dict.items():
-                self.add_env_var(name, value)
-
-            self.job_args = None
-            # set METPLUS_ env vars for MET config file to be consistent
-            # with other wrappers
-            mp_lists = ['MODEL',
-                        'DESC',
-                        'OBTYPE',
-                        'FCST_LEAD',
-                        'OBS_LEAD',
-                        'FCST_VALID_HOUR',
-                        'OBS_VALID_HOUR',
-                        'FCST_INIT_HOUR',
-                        'OBS_INIT_HOUR',
-                        'FCST_VAR',
-                        'OBS_VAR',
-                        'FCST_UNITS',
-                        'OBS_UNITS',
-                        'FCST_LEVEL',
-                        'OBS_LEVEL',
-                        'VX_MASK',
-                        'INTERP_MTHD',
-                        'INTERP_PNTS',
-                        'FCST_THRESH',
-                        'OBS_THRESH',
-                        'CONV_THRESH',
-                        'ALPHA',
-                        'LINE_TYPE'
-                        ]
-            for mp_list in mp_lists:
-                if not runtime_settings_dict.get(mp_list, ''):
-                    continue
-                value = (f"{mp_list.lower()} = "
-                         f"[{runtime_settings_dict.get(mp_list, '')}];")
-                self.env_var_dict[f'METPLUS_{mp_list}'] = value
-
-            mp_items = ['FCST_VALID_BEG',
-                        'FCST_VALID_END',
-                        'OBS_VALID_BEG',
-                        'OBS_VALID_END',
-                        'FCST_INIT_BEG',
-                        'FCST_INIT_END',
-                        'OBS_INIT_BEG',
-                        'OBS_INIT_END',
-                        'DESC',
-                        'OBTYPE',
-                        'FCST_LEAD'
-                        ]
-            for mp_item in mp_items:
-                if not runtime_settings_dict.get(mp_item, ''):
-                    continue
-                value = util.remove_quotes(runtime_settings_dict.get(mp_item,
-                                                                     ''))
-                value = (f"{mp_item.lower()} = \"{value}\";")
-                self.env_var_dict[f'METPLUS_{mp_item}'] = value
+        if self.c_dict['MERGE_JOBS']:
+            runtime_settings_dict_list = (
+                self.merge_jobs(runtime_settings_dict_list)
+            )
 
-            value = f'jobs = ["'
-            value += runtime_settings_dict.get('JOB', '')
-            value += '"];'
-            self.env_var_dict[f'METPLUS_JOBS'] = value
+        # files written by jobs that have been started
+        running_output_files = set()
+        for runtime_settings_dict in runtime_settings_dict_list:
+            output_files = self.get_job_output_files(runtime_settings_dict)
+            if output_files & running_output_files:
+                self.wait_for_commands()
+                running_output_files.clear()
+            running_output_files.update(output_files)
 
-            # send environment variables to logger
-            self.set_environment_variables()
+            self.set_job_environment(runtime_settings_dict)
 
             # set lookin dir
             self.logger.debug(f"Setting -lookindir to {runtime_settings_dict['LOOKIN_DIR']}")
             self.lookindir = runtime_settings_dict['LOOKIN_DIR']
             self.job_args = runtime_settings_dict['JOB']
 
-            self.build()
+            # environment is copied when the command is queued, so the
+            # settings can be changed for the next job right away
+            self.build(queue=True)
 
             self.clear()
 
+        self.wait_for_commands()
+
+    def set_job_environment(self, runtime_settings_dict):
+        """! Set environment variables needed to run a StatAnalysis job
+
+             @param runtime_settings_dict dictionary containing information
+              needed to run a StatAnalysis job
+        """
+        # Set environment variables and run stat_analysis.
+        for name, value in runtime_settings_dict.items():
+            self.add_env_var(name, value)
+
+        self.job_args = None
+        # set METPLUS_ env vars for MET config file to be consistent
+        # with other wrappers
+        mp_lists = ['MODEL',
+                    'DESC',
+                    'OBTYPE',
+                    'FCST_LEAD',
+                    'OBS_LEAD',
+                    'FCST_VALID_HOUR',
+                    'OBS_VALID_HOUR',
+                    'FCST_INIT_HOUR',
+                    'OBS_INIT_HOUR',
+                    'FCST_VAR',
+                    'OBS_VAR',
+                    'FCST_UNITS',
+                    'OBS_UNITS',
+                    'FCST_LEVEL',
+                    'OBS_LEVEL',
+                    'VX_MASK',
+                    'INTERP_MTHD',
+                    'INTERP_PNTS',
+                    'FCST_THRESH',
+                    'OBS_THRESH',
+                    'CONV_THRESH',
+                    'ALPHA',
+                    'LINE_TYPE'
+                    ]
+        for mp_list in mp_lists:
+            # unset value from previous job if not set for this job
+            if not runtime_settings_dict.get(mp_list, ''):
+                self.env_var_dict.pop(f'METPLUS_{mp_list}', None)
+                continue
+            value = (f"{mp_list.lower()} = "
+                     f"[{runtime_settings_dict.get(mp_list, '')}];")
+            self.env_var_dict[f'METPLUS_{mp_list}'] = value
+
+        mp_items = ['FCST_VALID_BEG',
+                    'FCST_VALID_END',
+                    'OBS_VALID_BEG',
+                    'OBS_VALID_END',
+                    'FCST_INIT_BEG',
+                    'FCST_INIT_END',
+                    'OBS_INIT_BEG',
+                    'OBS_INIT_END',
+                    'DESC',
+                    'OBTYPE',
+                    'FCST_LEAD'
+                    ]
+        for mp_item in mp_items:
+            # unset value from previous job if not set for this job
+            if not runtime_settings_dict.get(mp_item, ''):
+                self.env_var_dict.pop(f'METPLUS_{mp_item}', None)
+                continue
+            value = util.remove_quotes(runtime_settings_dict.get(mp_item,
+                                                                 ''))
+            value = (f"{mp_item.lower()} = \"{value}\";")
+            self.env_var_dict[f'METPLUS_{mp_item}'] = value
+
+        value = f'jobs = ["'
+        value += runtime_settings_dict.get('JOB', '')
+        value += '"];'
+        self.env_var_dict[f'METPLUS_JOBS'] = value
+
+        # send environment variables to logger
+        self.set_environment_variables()
+
+    def merge_jobs(self, runtime_settings_dict_list):
+        """! Combine jobs that read the same lookin directories so that the
+             .stat files are only read once by stat_analysis. Jobs are
+             combined only if all of their settings are the same except for
+             settings that can be passed to each job as job command options.
+             Those settings are removed from the config file settings and
+             added to each job instead. Jobs that write the same -dump_row or
+             -out_stat file are not combined, and a job is not combined with
+             a group if a later group writes the same file, so the files are
+             written in the same order as they would be without merging.
+
+             @param runtime_settings_dict_list list of dictionaries
+              containing information needed to run a StatAnalysis job
+             @returns list of dictionaries with one item for each group of
+              jobs that were combined in the order they were first found
+        """
+        # list of tuples of group key, list of jobs, and files written
+        groups = []
+        for runtime_settings_dict in runtime_settings_dict_list:
+            group_key = tuple(
+                (name, value) for name, value in runtime_settings_dict.items()
+                if name not in self.job_filter_options
+                and name not in self.job_specific_settings
+            )
+            output_files = self.get_job_output_files(runtime_settings_dict)
+
+            # find last group with the same key, then check that it and the
+            # groups after it do not write any of the same files
+            group = None
+            for index in range(len(groups) - 1, -1, -1):
+                if groups[index][2] & output_files:
+                    break
+                if groups[index][0] == group_key:
+                    group = groups[index]
+                    break
+
+            if group is None:
+                group = (group_key, [], set())
+                groups.append(group)
+            group[1].append(runtime_settings_dict)
+            group[2].update(output_files)
+
+        merged_dict_list = []
+        for _, group, _ in groups:
+            if len(group) == 1:
+                merged_dict_list.append(group[0])
+                continue
+
+            merged_dict = {}
+            filters_that_differ = []
+            for name, value in group[0].items():
+                if all(item.get(name) == value for item in group):
+                    merged_dict[name] = value
+                    continue
+
+                merged_dict[name] = ''
+                if name in self.job_filter_options:
+                    filters_that_differ.append(name)
+
+            jobs = []
+            for runtime_settings_dict in group:
+                job = runtime_settings_dict['JOB']
+                for name in filters_that_differ:
+                    option = self.job_filter_options[name]
+                    for value in util.getlist(runtime_settings_dict[name]):
+                        job += f' {option} {value}'
+                jobs.append(job)
+
+            # jobs are read from the config file as a list of strings
+            merged_dict['JOB'] = '", "'.join(jobs)
+
+            self.logger.debug(f"Running {len(jobs)} jobs that read "
+                              f"{merged_dict['LOOKIN_DIR']} in a single "
+                              "call to stat_analysis")
+            merged_dict_list.append(merged_dict)
+
+        return merged_dict_list
+
+    @staticmethod
+    def get_job_output_files(runtime_settings_dict):
+        """! Get the files that a job writes with -dump_row or -out_stat
+
+             @param runtime_settings_dict dictionary containing information
+              needed to run a StatAnalysis job
+             @returns set of output file paths
+        """
+        # jobs that were combined by merge_jobs are separated by ", "
+        args = runtime_settings_dict.get('JOB', '').replace('", "', ' ')
+        args = args.split()
+        return {args[index + 1] for index, arg in enumerate(args[:-1])
+                if arg in ('-dump_row', '-out_stat')}
+
     def create_output_directories(self, runtime_settings_dict):
         """! Check if output filename is set for dump_row or out_stat. If set,
              Check if the file already exists and if it should be skipped.
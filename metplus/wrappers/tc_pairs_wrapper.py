@@ -17,8 +17,11 @@ Condition codes: 0 for success, 1 for failure
 import os
 import re
 import csv
+import json
 import datetime
 import glob
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 from ..util import time_util
 from ..util import met_util as util
@@ -229,6 +232,14 @@ class TCPairsWrapper(CommandBuilder):
             self.log_error('Must set TC_PAIRS_REFORMAT_DIR if '
                            'TC_PAIRS_REFORMAT_DECK is True')
 
+        c_dict['REFORMAT_WORKERS'] = (
+            self.config.getint('config', 'TC_PAIRS_REFORMAT_WORKERS', 1)
+        )
+        if (c_dict['REFORMAT_WORKERS'] is None or
+                c_dict['REFORMAT_WORKERS'] < 1):
+            self.log_error('TC_PAIRS_REFORMAT_WORKERS must be a positive '
+                           'integer')
+
         c_dict['GET_ADECK'] = True if c_dict['ADECK_TEMPLATE'] else False
         c_dict['GET_EDECK'] = True if c_dict['EDECK_TEMPLATE'] else False
 
@@ -682,7 +693,11 @@ class TCPairsWrapper(CommandBuilder):
         return deck_list
 
     def reformat_files(self, file_list, deck_type, time_info):
-        """!Reformat track data to match expected ATCF format
+        """!Reformat track data to match expected ATCF format. Files that
+            were already reformatted from the current version of the input
+            file with the same storm month and missing values are not
+            reformatted again. Files are reformatted at the same time in
+            separate processes if TC_PAIRS_REFORMAT_WORKERS is greater than 1.
 
             @param file_list list of files to reformat
             @param deck_type type of deck (A or E)
@@ -697,20 +712,47 @@ class TCPairsWrapper(CommandBuilder):
         reformat_dir = self.c_dict['REFORMAT_DIR']
 
         outfiles = []
+        decks_to_reformat = []
         for deck in file_list:
             outfile = deck.replace(deck_dir,
                                    reformat_dir)
+            outfiles.append(outfile)
             if os.path.isfile(outfile) and self.c_dict.get('SKIP_REFORMAT'):
                 self.logger.debug(f'Skip processing {deck} because '
                                   'reformatted file already exists. Change '
                                   'TC_PAIRS_SKIP_IF_REFORMAT_EXISTS to '
                                   'False to overwrite file')
-            else:
-                self.logger.debug(f'Reformatting {deck} to {outfile}')
-                self.read_modify_write_file(deck, storm_month,
-                                            missing_values, outfile)
+                continue
 
-            outfiles.append(outfile)
+            if is_reformat_current(deck, storm_month, missing_values,
+                                   outfile):
+                self.logger.debug(f'Skip processing {deck} because '
+                                  f'{outfile} was already reformatted from '
+                                  'the current version of the file')
+                continue
+
+            self.logger.debug(f'Reformatting {deck} to {outfile}')
+            decks_to_reformat.append((deck, outfile))
+
+        num_workers = min(self.c_dict['REFORMAT_WORKERS'],
+                          len(decks_to_reformat))
+        if (num_workers > 1 and
+                'fork' not in multiprocessing.get_all_start_methods()):
+            num_workers = 1
+
+        if num_workers > 1:
+            with ProcessPoolExecutor(
+                    max_workers=num_workers,
+                    mp_context=multiprocessing.get_context('fork')
+            ) as pool:
+                futures = [pool.submit(reformat_deck_file, deck, storm_month,
+                                       missing_values, outfile)
+                           for deck, outfile in decks_to_reformat]
+                for future in futures:
+                    future.result()
+        else:
+            for deck, outfile in decks_to_reformat:
+                reformat_deck_file(deck, storm_month, missing_values, outfile)
 
         return outfiles
 
@@ -760,58 +802,126 @@ class TCPairsWrapper(CommandBuilder):
 
         return cmd
 
-    def read_modify_write_file(self, in_csvfile, storm_month, missing_values,
-                               out_csvfile):
-        """! Reads, modifies and writes file
-              Args:
-                @param in_csvfile input csv file that is being parsed
-                @param storm_month The storm month
-                @param missing_values a tuple where (MISSING_VAL_TO_REPLACE,
-                                                     MISSING_VAL)
-                @param out_csvfile the output csv file
-                @param logger the log where logging is directed
-        """
-        # create output directory if it does not exist
-        if not os.path.exists(os.path.dirname(out_csvfile)):
-            os.makedirs(os.path.dirname(out_csvfile))
 
-        # Open the output csv file
-        out_file = open(out_csvfile, "w", newline='')
+def get_reformat_info_path(out_csvfile):
+    """! Get path of the file that describes how a reformatted deck file was
+         created. It is a hidden file in the same directory as the
+         reformatted file.
 
-        # Tell the write to use the line separator
-        # "\n" instead of the DOS "\r\n"
-        writer = csv.writer(out_file, lineterminator="\n")
-
-        with open(in_csvfile, newline='') as csvfile:
+         @param out_csvfile path to reformatted file
+         @returns path to file with reformat information
+    """
+    out_dir, out_name = os.path.split(out_csvfile)
+    return os.path.join(out_dir, f'.{out_name}.reformat.json')
 
-            in_file_reader = csv.reader(csvfile)
 
-            for row in in_file_reader:
-                # Create a list for the modified lines
-                row_list = []
+def get_reformat_info(in_csvfile, storm_month, missing_values):
+    """! Get information that determines the contents of a reformatted deck
+         file. A reformatted file is current if it was created from an input
+         file with the same size and modification time using the same
+         storm month and missing values.
 
+         @param in_csvfile input csv file that is reformatted
+         @param storm_month The storm month
+         @param missing_values a tuple where (MISSING_VAL_TO_REPLACE,
+          MISSING_VAL)
+         @returns dictionary of reformat information
+    """
+    in_stat = os.stat(in_csvfile)
+    return {
+        'input': os.path.abspath(in_csvfile),
+        'size': in_stat.st_size,
+        'mtime_ns': in_stat.st_mtime_ns,
+        'storm_month': storm_month,
+        'missing_values': list(missing_values),
+    }
+
+
+def is_reformat_current(in_csvfile, storm_month, missing_values,
+                        out_csvfile):
+    """! Check if a reformatted deck file was created from the current
+         version of the input file with the same settings
+
+         @param in_csvfile input csv file that is reformatted
+         @param storm_month The storm month
+         @param missing_values a tuple where (MISSING_VAL_TO_REPLACE,
+          MISSING_VAL)
+         @param out_csvfile the output csv file
+         @returns True if the output file does not need to be created again
+    """
+    if not os.path.isfile(out_csvfile):
+        return False
+
+    try:
+        with open(get_reformat_info_path(out_csvfile), 'r') as file_handle:
+            previous_info = json.load(file_handle)
+        current_info = get_reformat_info(in_csvfile, storm_month,
+                                         missing_values)
+    except (OSError, ValueError):
+        return False
+
+    return previous_info == current_info
+
+
+def reformat_deck_file(in_csvfile, storm_month, missing_values, out_csvfile):
+    """! Reformat a deck file to match the expected ATCF format. The storm
+         number in the second column is prefixed with the storm month, the
+         third column is removed, and missing values are replaced. Rows are
+         written as they are read so the file is never held in memory. The
+         file is written to a temporary file that is renamed when it is
+         complete so that tc_pairs never reads a partially written file.
+
+         @param in_csvfile input csv file that is being parsed
+         @param storm_month The storm month
+         @param missing_values a tuple where (MISSING_VAL_TO_REPLACE,
+          MISSING_VAL)
+         @param out_csvfile the output csv file
+    """
+    # create output directory if it does not exist
+    os.makedirs(os.path.dirname(out_csvfile), exist_ok=True)
+
+    # read info before file is read so changes made while it is being read
+    # cause the file to be reformatted again next time
+    reformat_info = get_reformat_info(in_csvfile, storm_month,
+                                      missing_values)
+    missing_value = " " + missing_values[1]
+    info_path = get_reformat_info_path(out_csvfile)
+    tmp_outfile = util.get_tmp_stage_path(out_csvfile)
+    tmp_info_path = util.get_tmp_stage_path(info_path)
+    try:
+        # Tell the write to use the line separator
+        # "\n" instead of the DOS "\r\n"
+        with open(in_csvfile, newline='') as csvfile, \
+                open(tmp_outfile, "w", newline='') as out_file:
+            writer = csv.writer(out_file, lineterminator="\n")
+            for row in csv.reader(csvfile):
+                if not row:
+                    continue
                 # Replace the second column (storm number) with
                 # the month followed by the storm number
                 # e.g. Replace 0006 with 010006
                 # this is done because this data has many storms per month
-                # and we need to know which storm we are processing if running
-                # over multiple months
-                row[1] = " " + storm_month + (row[1]).strip()
-
-                # Iterate over the items, deleting or modifying the columns
-                for item in row:
-                    # Delete the third column
-                    if item == row[2]:
-                        continue
-                    # Replace MISSING_VAL_TO_REPLACE=missing_values[0] with
-                    # MISSING_VAL=missing_values[1]
-                    elif item.strip() == missing_values[0]:
-                        item = " " + missing_values[1]
-                    # Create a new row to write
-                    row_list.append(item)
-
-                # Write the modified file
-                writer.writerow(row_list)
-
-        csvfile.close()
-        out_file.close()
+                # and we need to know which storm we are processing if
+                # running over multiple months. The third column is removed
+                row = [row[0], " " + storm_month + row[1].strip()] + row[3:]
+
+                # Replace MISSING_VAL_TO_REPLACE=missing_values[0] with
+                # MISSING_VAL=missing_values[1]
+                writer.writerow([missing_value
+                                 if item.strip() == missing_values[0]
+                                 else item for item in row])
+
+        with open(tmp_info_path, 'w') as file_handle:
+            json.dump(reformat_info, file_handle)
+
+        # remove information about the old file before it is replaced so it
+        # is never used to describe a file created with other settings
+        if os.path.exists(info_path):
+            os.remove(info_path)
+        os.replace(tmp_outfile, out_csvfile)
+        os.replace(tmp_info_path, info_path)
+    except BaseException:
+        for tmp_path in (tmp_outfile, tmp_info_path):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        raise
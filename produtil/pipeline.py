@@ -188,7 +188,11 @@ def launch(cmd, env=None, stdin=None, stdout=None, stderr=None,
     elif stderr is not ERR2OUT:
         stderrC=stderr
 
-    pid=os.fork()
+    # Hold the module lock while forking so that the child does not
+    # inherit a copy of the lock that another thread is holding.  The
+    # child would wait forever for that lock in pclose_all.
+    with plock:
+        pid=os.fork()
     assert(pid>=0)
     if pid>0:
         # Parent process after successfull fork.
@@ -284,8 +288,14 @@ def launch(cmd, env=None, stdin=None, stdout=None, stderr=None,
         else:
             os.execvpe(cmd[0],cmd,env)
     except Exception as e:
-        logger.error("%s: could not exec: %s"%(cmd[0],str(e)),exc_info=True)
-        sys.exit(2)
+        # The parent may have other threads holding the logging locks
+        # when it forked, so report the error directly to stderr and
+        # exit without running the parent's exit handlers.
+        try:
+            os.write(2,("%s: could not exec: %s\n"%(
+                        cmd[0],str(e))).encode('utf-8','replace'))
+        finally:
+            os._exit(2)
 
 def filenoify(f):
     """!Tries to convert f to a fileno
@@ -81,6 +81,7 @@ input_base_dir = os.environ['INPUT_BASE_DIR']
 output_base_dir = os.environ['OUTPUT_BASE_DIR']
 log_metplus = os.environ['LOG_METPLUS']
 log_level = os.environ['LOG_LEVEL']
+stat_cache_dir = os.environ.get('STAT_CACHE_DIR', '')
 
 # General set up and settings
 # Plots
@@ -222,9 +223,6 @@ if cov_thresh != '':
     extra_plot_title+=', Cov. Thresh:'+cov_thresh
 if alpha != '':
     extra_plot_title+=', Alpha: '+alpha
-# MET .stat file formatting
-stat_file_base_columns = plot_util.get_stat_file_base_columns(met_version)
-nbase_columns = len(stat_file_base_columns)
 
 # Start looping to make plots
 for plot_info in plot_info_list:
@@ -440,37 +438,10 @@ for plot_info in plot_info_list:
                     logger.debug("Model "+str(model_num)+" "+model_name+" "
                                  +"with plot name "+model_plot_name+" "
                                  +"file: "+model_stat_file+" exists")
-                    model_level_now_stat_file_data = pd.read_csv(
-                            model_stat_file, sep=" ", skiprows=1,
-                            skipinitialspace=True, header=None
-                    )
-                    model_level_now_stat_file_data.rename(
-                        columns=dict(zip(
-                            model_level_now_stat_file_data \
-                            .columns[:nbase_columns],
-                            stat_file_base_columns
-                        )), inplace=True
-                    )
-                    line_type = model_level_now_stat_file_data['LINE_TYPE'][0]
-                    stat_file_line_type_columns = (
-                        plot_util.get_stat_file_line_type_columns(logger,
-                                                                  met_version,
-                                                                  line_type)
-                    )
-                    model_level_now_stat_file_data.rename(
-                        columns=dict(zip(
-                            model_level_now_stat_file_data \
-                            .columns[nbase_columns:],
-                            stat_file_line_type_columns
-                        )), inplace=True
-                    )
-                    model_level_now_stat_file_data_fcstvaliddates = (
-                        model_level_now_stat_file_data.loc[:] \
-                        ['FCST_VALID_BEG'].values
-                    )
-                    model_level_now_data = (
-                        pd.DataFrame(np.nan, index=model_level_now_data_index,
-                                     columns=stat_file_line_type_columns)
+                    (model_level_now_stat_file_data,
+                     stat_file_line_type_columns) = (
+                        plot_util.read_stat_file(logger, model_stat_file,
+                                                 met_version, stat_cache_dir)
                     )
                     model_level_now_stat_file_data.fillna(
                         {'FCST_UNITS':'NA', 'OBS_UNITS':'NA', 'VX_MASK':'NA'},
@@ -489,26 +460,14 @@ for plot_info in plot_info_list:
                             fcst_var_units_list.append(model_now_fcst_units)
                         if model_now_obs_units != 'NA':
                             obs_var_units_list.append(model_now_obs_units)
-                    for expected_date in expected_stat_file_dates:
-                        if expected_date in \
-                                model_level_now_stat_file_data_fcstvaliddates:
-                            matching_date_idx = (
-                                model_level_now_stat_file_data_fcstvaliddates \
-                                .tolist().index(expected_date)
-                            )
-                            model_level_now_stat_file_data_indexed = (
-                                model_level_now_stat_file_data \
-                                .loc[matching_date_idx][:]
-                            )
-                            for col in stat_file_line_type_columns:
-                                model_level_now_data.loc[
-                                    (model_plot_name,
-                                     fcst_var_level,
-                                     expected_date)
-                                ][col] = (
-                                    model_level_now_stat_file_data_indexed \
-                                    .loc[:][col]
-                                )
+                    model_level_now_data = (
+                        plot_util.get_stat_file_data_for_dates(
+                            model_level_now_stat_file_data,
+                            stat_file_line_type_columns,
+                            expected_stat_file_dates,
+                            model_level_now_data_index
+                        )
+                    )
             else:
                 logger.warning("Model "+str(model_num)+" "+model_name+" "
                                +"with plot name "+model_plot_name+" "
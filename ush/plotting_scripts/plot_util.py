@@ -1,6 +1,11 @@
 import os
 import datetime as datetime
 import time
+import json
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
 
@@ -339,6 +344,256 @@ def get_stat_file_line_type_columns(logger, met_version, line_type):
             ]
     return stat_file_line_type_columns
 
+# version of the layout of the files in the stat file cache. Increment if
+# the layout changes so that older cache entries are not read
+STAT_CACHE_VERSION = 2
+
+# maximum number of parsed .stat files that are kept in memory
+STAT_FILE_DATA_MAX_FILES = 16
+
+# parsed .stat files kept in memory in least recently used order, key is
+# absolute path of the file, value is tuple of file size, modification
+# time, MET version, the DataFrame, and the line type columns
+_STAT_FILE_DATA = OrderedDict()
+_STAT_FILE_DATA_LOCK = threading.Lock()
+
+def read_stat_file(logger, stat_file, met_version, cache_dir=None):
+    """! Read a MET .stat file written by stat_analysis and name the columns
+         using the standard columns and the columns of the line type of the
+         first line. The parsed file is kept in memory and, if cache_dir is
+         set, written to a columnar cache so that other plotting scripts
+         that read the same file do not need to parse the text again.
+         Numeric columns read from the cache are memory-mapped. A file is
+         parsed again if its size or modification time changes. Only the
+         STAT_FILE_DATA_MAX_FILES most recently read files are kept in
+         memory.
+
+             Args:
+                 logger      - logger to output messages
+                 stat_file   - string of the path to the .stat file
+                 met_version - string of MET version number
+                               being used to run stat_analysis
+                 cache_dir   - string of directory to store parsed
+                               files, or None or empty string to only
+                               keep parsed files in memory
+
+             Returns:
+                 stat_file_data              - DataFrame of the .stat
+                                               file lines
+                 stat_file_line_type_columns - list of the line
+                                               type columns
+    """
+    stat_file = os.path.abspath(stat_file)
+    file_stat = os.stat(stat_file)
+    file_key = (file_stat.st_size, file_stat.st_mtime_ns, str(met_version))
+
+    with _STAT_FILE_DATA_LOCK:
+        cached = _STAT_FILE_DATA.get(stat_file)
+        if cached is not None:
+            _STAT_FILE_DATA.move_to_end(stat_file)
+    if cached is not None and cached[:3] == file_key:
+        return cached[3].copy(), list(cached[4])
+
+    stat_file_data = None
+    if cache_dir:
+        entry_dir = get_stat_cache_entry_dir(cache_dir, stat_file, file_key)
+        stat_file_data = read_stat_cache_entry(logger, entry_dir)
+
+    if stat_file_data is None:
+        stat_file_data = pd.read_csv(
+            stat_file, sep=" ", skiprows=1,
+            skipinitialspace=True, header=None
+        )
+        stat_file_base_columns = get_stat_file_base_columns(met_version)
+        nbase_columns = len(stat_file_base_columns)
+        stat_file_data.rename(
+            columns=dict(zip(
+                stat_file_data.columns[:nbase_columns],
+                stat_file_base_columns
+            )), inplace=True
+        )
+        line_type = stat_file_data['LINE_TYPE'][0]
+        stat_file_data.rename(
+            columns=dict(zip(
+                stat_file_data.columns[nbase_columns:],
+                get_stat_file_line_type_columns(logger, met_version,
+                                                line_type)
+            )), inplace=True
+        )
+        if cache_dir:
+            write_stat_cache_entry(logger, entry_dir, stat_file,
+                                   stat_file_data)
+
+    line_type = stat_file_data['LINE_TYPE'][0]
+    stat_file_line_type_columns = (
+        get_stat_file_line_type_columns(logger, met_version, line_type)
+    )
+    with _STAT_FILE_DATA_LOCK:
+        _STAT_FILE_DATA[stat_file] = (
+            file_key + (stat_file_data, stat_file_line_type_columns)
+        )
+        _STAT_FILE_DATA.move_to_end(stat_file)
+        while len(_STAT_FILE_DATA) > STAT_FILE_DATA_MAX_FILES:
+            _STAT_FILE_DATA.popitem(last=False)
+    return stat_file_data.copy(), list(stat_file_line_type_columns)
+
+def get_stat_cache_entry_dir(cache_dir, stat_file, file_key):
+    """! Get the directory in the stat file cache for a version of a file
+
+             Args:
+                 cache_dir - string of stat file cache directory
+                 stat_file - string of absolute path to the .stat file
+                 file_key  - tuple of file size, modification time,
+                             and MET version
+
+             Returns:
+                 entry_dir - string of directory that holds the
+                             columns of the parsed file. The name
+                             starts with a hash of the file path
+                             followed by a hash of the file_key
+    """
+    path_hash = hashlib.sha1(stat_file.encode('utf-8')).hexdigest()
+    key_hash = hashlib.sha1(
+        repr((STAT_CACHE_VERSION,) + tuple(file_key)).encode('utf-8')
+    ).hexdigest()
+    return os.path.join(cache_dir, f'{path_hash}.{key_hash[:16]}')
+
+def read_stat_cache_entry(logger, entry_dir):
+    """! Read a parsed .stat file from the stat file cache
+
+             Args:
+                 logger    - logger to output messages
+                 entry_dir - string of directory that holds the
+                             columns of the parsed file
+
+             Returns:
+                 stat_file_data - DataFrame of the .stat file lines
+                                  or None if the entry does not exist
+                                  or could not be read
+    """
+    manifest_file = os.path.join(entry_dir, 'manifest.json')
+    if not os.path.exists(manifest_file):
+        return None
+    try:
+        with open(manifest_file, 'r') as manifest_handle:
+            manifest = json.load(manifest_handle)
+        columns = {}
+        for index, column in enumerate(manifest['columns']):
+            column_file = os.path.join(entry_dir, f'{index}.npy')
+            if os.path.exists(column_file):
+                # copy-on-write mapping so the data can be changed in memory
+                columns[column] = np.asarray(np.load(column_file,
+                                                     mmap_mode='c'))
+                continue
+
+            # text and mixed type columns keep the type of each value
+            with open(os.path.join(entry_dir, f'{index}.json'),
+                      'r') as column_handle:
+                values = json.load(column_handle)
+            columns[column] = pd.Series(values, dtype=object).astype(
+                manifest['dtypes'][index]
+            )
+    except (OSError, ValueError, KeyError) as err:
+        logger.warning(f"Could not read stat file cache {entry_dir}: {err}")
+        return None
+
+    logger.debug("Reading "+manifest['stat_file']+" from stat file cache "
+                 +entry_dir)
+    return pd.DataFrame(columns, columns=list(columns), copy=False)
+
+def write_stat_cache_entry(logger, entry_dir, stat_file, stat_file_data):
+    """! Write a parsed .stat file to the stat file cache. Each column is
+         written to its own .npy file so that numeric columns can be
+         memory-mapped when they are read. Other columns, i.e. text or
+         mixed type columns, are written as a JSON list so that each
+         value is read back with the same type. Older entries for the
+         same file are removed.
+
+             Args:
+                 logger         - logger to output messages
+                 entry_dir      - string of directory to write the
+                                  columns of the parsed file
+                 stat_file      - string of absolute path to the
+                                  .stat file
+                 stat_file_data - DataFrame of the .stat file lines
+    """
+    cache_dir = os.path.dirname(entry_dir)
+    tmp_dir = f'{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        os.makedirs(tmp_dir, exist_ok=True)
+        for index, column in enumerate(stat_file_data.columns):
+            values = stat_file_data[column].to_numpy()
+            if values.dtype.kind in 'biuf':
+                np.save(os.path.join(tmp_dir, f'{index}.npy'), values)
+                continue
+
+            with open(os.path.join(tmp_dir, f'{index}.json'),
+                      'w') as column_handle:
+                json.dump([value.item() if isinstance(value, np.generic)
+                           else value for value in values], column_handle)
+
+        # write manifest last so incomplete entries are not read
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as handle:
+            json.dump({'stat_file': stat_file,
+                       'columns': [column if isinstance(column, str)
+                                   else int(column)
+                                   for column in stat_file_data.columns],
+                       'dtypes': [str(dtype)
+                                  for dtype in stat_file_data.dtypes]},
+                      handle)
+        os.rename(tmp_dir, entry_dir)
+    except (OSError, TypeError, ValueError) as err:
+        # another process may have written the same entry first
+        if not os.path.exists(os.path.join(entry_dir, 'manifest.json')):
+            logger.warning(f"Could not write stat file cache {entry_dir}: "
+                           f"{err}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+
+    # remove entries for older versions of the same file
+    path_prefix = os.path.basename(entry_dir).split('.')[0] + '.'
+    for name in os.listdir(cache_dir):
+        if (name.startswith(path_prefix) and not name.endswith('.tmp')
+                and name != os.path.basename(entry_dir)):
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+def get_stat_file_data_for_dates(stat_file_data, stat_file_line_type_columns,
+                                 expected_dates, index):
+    """! Get the line type columns of a .stat file for each of the expected
+         dates. The first line in the file for a date is used. Dates that
+         are not found in the file are filled with NaN.
+
+             Args:
+                 stat_file_data              - DataFrame of the .stat
+                                               file lines
+                 stat_file_line_type_columns - list of the line
+                                               type columns
+                 expected_dates              - list of dates expected in
+                                               the .stat file in the
+                                               FCST_VALID_BEG format
+                 index                       - index to use for the
+                                               returned DataFrame with
+                                               one entry for each
+                                               expected date, in the
+                                               same order
+
+             Returns:
+                 date_data - DataFrame with the line type columns
+                             for each expected date
+    """
+    date_data = (
+        stat_file_data.drop_duplicates(subset='FCST_VALID_BEG', keep='first')
+        .set_index('FCST_VALID_BEG')
+        .reindex(index=expected_dates, columns=stat_file_line_type_columns)
+    )
+    # use floating point values for numeric columns so that dates that were
+    # not found are treated the same as dates that were found
+    date_data = date_data.astype({
+        col: float for col in stat_file_line_type_columns
+        if pd.api.types.is_numeric_dtype(date_data[col])
+    })
+    return date_data.set_axis(index)
+
 def get_clevels(data):
     """! Get contour levels for plotting
   